@@ -0,0 +1,152 @@
+"""Login throughput under concurrent load.
+
+Runs the app in-process against a throwaway SQLite database, logs many
+users in from parallel threads and reports logins per second, latency
+percentiles, and how long a cheap page takes to answer meanwhile. Compare
+hashing on the request thread with the bounded pool:
+
+    python benchmarks/login_throughput.py --kdf-workers 0
+    python benchmarks/login_throughput.py --kdf-workers 2
+
+--stuffing sends wrong passwords for a single account from one address,
+which the token buckets should turn away before any hashing happens.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = 'Bench-pass1!'
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(pct / 100 * len(values)) - 1))
+    return round(values[index] * 1000, 1)
+
+
+def build_app(args, db_path):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + db_path
+    os.environ['AUTH_KDF_WORKERS'] = str(args.kdf_workers)
+    os.environ['AUTH_PASSWORD_METHOD'] = args.method
+    os.environ.setdefault('ANALYTICS_BUFFERED', 'false')
+    sys.path.insert(0, ROOT)
+    from website import create_app
+    app = create_app()
+    app.config['TESTING'] = True
+    return app
+
+
+def seed_users(app, count, method):
+    from werkzeug.security import generate_password_hash
+    from website.models import db, User
+    # One hash shared by every user keeps seeding fast; verification cost is the same
+    password_hash = generate_password_hash(PASSWORD, method)
+    with app.app_context():
+        db.session.add_all([User(username=f"bench{i}", email=f"bench{i}@example.com", password=password_hash)
+                            for i in range(count)])
+        db.session.commit()
+
+
+def run(app, args):
+    latencies, probe_latencies = [], []
+    statuses = {}
+    lock = threading.Lock()
+    done = threading.Event()
+    counter = iter(range(args.requests))
+
+    def login_worker(n):
+        client = app.test_client()
+        address = '10.0.0.1' if args.stuffing else f"10.{n // 250}.{n % 250}.1"
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            email = 'bench0@example.com' if args.stuffing else f"bench{i % args.users}@example.com"
+            password = 'wrong' if args.stuffing else PASSWORD
+            start = time.perf_counter()
+            response = client.post('/login', data={'email': email, 'password': password},
+                                   environ_base={'REMOTE_ADDR': address})
+            elapsed = time.perf_counter() - start
+            client.get('/logout')
+            # Success and a wrong password are both redirects; only success goes home
+            outcome = 'ok' if response.location and response.location.endswith('/home') else str(response.status_code)
+            with lock:
+                latencies.append(elapsed)
+                statuses[outcome] = statuses.get(outcome, 0) + 1
+
+    def probe_worker():
+        client = app.test_client()
+        while not done.is_set():
+            start = time.perf_counter()
+            client.get('/login')
+            probe_latencies.append(time.perf_counter() - start)
+            time.sleep(0.05)
+
+    threads = [threading.Thread(target=login_worker, args=(n,)) for n in range(args.concurrency)]
+    probe = threading.Thread(target=probe_worker)
+    start = time.perf_counter()
+    probe.start()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    done.set()
+    probe.join()
+
+    from website.auth_service import auth_stats
+    return {
+        'kdf_workers': args.kdf_workers,
+        'method': args.method,
+        'concurrency': args.concurrency,
+        'requests': args.requests,
+        'stuffing': args.stuffing,
+        'seconds': round(wall, 2),
+        'logins_per_second': round(statuses.get('ok', 0) / wall, 2),
+        'requests_per_second': round(len(latencies) / wall, 2),
+        'statuses': statuses,
+        'login_ms': {'p50': percentile(latencies, 50), 'p95': percentile(latencies, 95),
+                     'p99': percentile(latencies, 99)},
+        'page_ms_during_load': {'p50': percentile(probe_latencies, 50), 'p95': percentile(probe_latencies, 95),
+                                'mean': round(statistics.mean(probe_latencies) * 1000, 1) if probe_latencies else None},
+        'auth': auth_stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--kdf-workers', type=int, default=2, help='0 hashes on the request thread')
+    parser.add_argument('--method', default='pbkdf2', help='werkzeug hash method, e.g. pbkdf2:sha256:100000')
+    parser.add_argument('--stuffing', action='store_true', help='wrong passwords for one account from one address')
+    parser.add_argument('--json', action='store_true', help='print the result as JSON')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = build_app(args, os.path.join(tmp, 'bench.db'))
+        seed_users(app, args.users, args.method)
+        result = run(app, args)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"{result['requests']} logins, {result['concurrency']} threads, kdf workers {result['kdf_workers']}")
+    print(f"  {result['logins_per_second']} logins/s, statuses {result['statuses']}")
+    print(f"  login latency ms  {result['login_ms']}")
+    print(f"  page latency ms   {result['page_ms_during_load']}")
+    print(f"  auth              {result['auth']}")
+
+
+if __name__ == '__main__':
+    main()
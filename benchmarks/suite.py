@@ -0,0 +1,393 @@
+"""Route benchmarks for the resume builder.
+
+Seeds a throwaway database with synthetic users and resumes, then drives
+the hot routes (view, download, dashboard, save, search, manage) through
+the Flask test client and through gunicorn serving the app on a local
+port. Reports throughput and p50/p95/p99 per route and writes the
+results as JSON, optionally comparing them with a stored baseline:
+
+    python benchmarks/suite.py --output results.json
+    python benchmarks/suite.py --baseline benchmarks/baseline.json --tolerance 0.2
+
+Runs exit with status 1 when a route is slower than the baseline by more
+than the tolerance. Only compare results from the same machine and the
+same seeding options.
+"""
+import argparse
+import http.cookiejar
+import json
+import multiprocessing
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = 'Bench-pass1!'
+# Cheap on purpose: login cost is measured by login_throughput.py, not here
+PASSWORD_METHOD = 'pbkdf2:sha256:1000'
+# Options that change the numbers; results are only comparable when these match
+COMPARABLE_OPTIONS = ('users', 'resumes', 'sections', 'events', 'seed', 'requests', 'concurrency',
+                      'gunicorn_workers', 'gunicorn_threads', 'fake_pdf')
+ROUTES = ('view_resume', 'download_resume', 'dashboard', 'create_resume', 'search_resume', 'manage_resumes')
+WORDS = ('python', 'flask', 'postgres', 'react', 'docker', 'kubernetes', 'analytics', 'design', 'testing',
+         'cloud', 'security', 'mobile', 'data', 'machine', 'learning', 'backend', 'frontend', 'leadership')
+
+
+def configure_environment(args, tmp):
+    """Settings for the app under test; must run before website is imported"""
+    os.environ['DATABASE_URL'] = args.database_url or 'sqlite:///' + os.path.join(tmp, 'bench.db')
+    os.environ['PDF_CACHE_DIR'] = os.path.join(tmp, 'pdf_cache')
+    os.environ['TEMPLATE_BYTECODE_DIR'] = os.path.join(tmp, 'jinja_cache')
+    os.environ['AUTH_PASSWORD_METHOD'] = PASSWORD_METHOD
+    # Every benchmark client logs in from the same address
+    os.environ['AUTH_IP_BURST'] = '0'
+    os.environ['AUTH_ACCOUNT_BURST'] = '0'
+    os.environ['SLOW_REQUEST_MS'] = '60000'
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+    sys.path.insert(0, ROOT)
+
+
+def fake_pdf_engines():
+    """Replace the PDF engines with a stub so download measures the Flask side only"""
+    from website.pdf_service import RENDERERS
+    for engine in RENDERERS.values():
+        engine.render = lambda html, css_path=None: b'%PDF-1.4 benchmark\n%%EOF\n'
+
+
+def seed(app, args):
+    """Bulk-load the synthetic data with `flask seed-data`'s generator; returns {email: [resume ids]}"""
+    from website.models import db, User, Resume
+    from website.search_service import rebuild_search_index
+    from website.seed_data import SEED_EMAIL_DOMAIN, seed_database
+
+    with app.app_context():
+        seed_database(args.users, args.resumes, args.sections, args.events, seed=args.seed,
+                      password=PASSWORD, password_method=PASSWORD_METHOD)
+        rebuild_search_index()
+        ids = {}
+        rows = db.session.execute(db.select(User.email, Resume.id).join(Resume, Resume.user_id == User.id)
+                                  .where(User.email.like(f"%@{SEED_EMAIL_DOMAIN}")).order_by(Resume.id))
+        for email, resume_id in rows:
+            ids.setdefault(email, []).append(resume_id)
+        db.session.remove()
+        db.engine.dispose()
+    return ids
+
+
+def save_form(resume_id, sections, i):
+    """Form body for POST /Resume/<id>; the summary changes so every save writes"""
+    n = range(sections)
+    return {
+        'full_name': 'Bench User', 'resume_email': 'bench@example.com', 'phone': '5550100',
+        'summary': f"Benchmark save {i} for resume {resume_id}",
+        'degree[]': [f"BSc {k}" for k in n], 'institution[]': [f"University {k}" for k in n],
+        'start_year[]': ['2000'] * sections, 'end_year[]': ['2004'] * sections, 'edu_description[]': [''] * sections,
+        'job_title[]': [f"Engineer {k}" for k in n], 'company[]': [f"Company {k}" for k in n],
+        'start_date[]': ['2010'] * sections, 'end_date[]': ['2012'] * sections,
+        'exp_description[]': ['Built things'] * sections,
+        'project_title[]': [f"Project {k}" for k in n], 'project_description[]': ['Side project'] * sections,
+        'tech_stack[]': ['flask'] * sections, 'project_link[]': [''] * sections,
+        'skill_name[]': [WORDS[k % len(WORDS)] for k in n], 'skill_level[]': ['advanced'] * sections,
+        'cert_name[]': [f"Cert {k}" for k in n], 'issuer[]': ['Bench Institute'] * sections,
+        'issue_date[]': ['2020-01-01'] * sections, 'credential_link[]': [''] * sections,
+    }
+
+
+def route_request(route, resume_id, sections, i):
+    """(method, path, form, expected statuses) for one request to route"""
+    if route == 'view_resume':
+        return 'GET', f"/resume/view/{resume_id}", None, (200,)
+    if route == 'download_resume':
+        return 'GET', f"/resume/download/{resume_id}", None, (200,)
+    if route == 'dashboard':
+        return 'GET', '/dashboard', None, (200,)
+    if route == 'create_resume':
+        return 'POST', f"/Resume/{resume_id}", save_form(resume_id, sections, i), (302,)
+    if route == 'search_resume':
+        return 'GET', '/resume/search?' + urllib.parse.urlencode({'q': WORDS[i % len(WORDS)]}), None, (200,)
+    if route == 'manage_resumes':
+        return 'GET', '/resume/manage', None, (200,)
+    raise ValueError(f"Unknown route {route}")
+
+
+class TestClientDriver:
+    """Requests through app.test_client(), one logged-in client per thread"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def session(self, email):
+        client = self.app.test_client()
+        response = client.post('/login', data={'email': email, 'password': PASSWORD})
+        if response.status_code != 302 or not response.location.endswith('/home'):
+            raise RuntimeError(f"Login failed for {email}: {response.status_code}")
+
+        def send(method, path, form):
+            response = client.open(path, method=method, data=form)
+            response.close()
+            return response.status_code
+        return send
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpDriver:
+    """Requests over HTTP to a running server, one cookie jar per thread"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    def session(self, email):
+        opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+                                             _NoRedirect())
+
+        def send(method, path, form):
+            data = urllib.parse.urlencode(form, doseq=True).encode() if form is not None else None
+            request = urllib.request.Request(self.base_url + path, data=data, method=method)
+            try:
+                with opener.open(request, timeout=120) as response:
+                    response.read()
+                    return response.status
+            except urllib.error.HTTPError as e:
+                e.read()
+                return e.code
+
+        if send('POST', '/login', {'email': email, 'password': PASSWORD}) != 302:
+            raise RuntimeError(f"Login failed for {email}")
+        return send
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(pct / 100 * len(values)) - 1))
+    return round(values[index] * 1000, 2)
+
+
+def run_route(driver, route, resume_ids, args):
+    """args.requests requests to route from args.concurrency threads"""
+    emails = sorted(resume_ids)
+    latencies, errors = [], {}
+    lock = threading.Lock()
+    counter = iter(range(args.requests))
+    # Log in before the clock starts
+    sessions = [driver.session(emails[t % len(emails)]) for t in range(args.concurrency)]
+
+    def worker(t):
+        user_resumes = resume_ids[emails[t % len(emails)]]
+        send = sessions[t]
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            method, path, form, expected = route_request(route, user_resumes[i % len(user_resumes)],
+                                                         args.sections, i)
+            start = time.perf_counter()
+            status = send(method, path, form)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                if status not in expected:
+                    errors[str(status)] = errors.get(str(status), 0) + 1
+
+    for i in range(min(args.warmup, args.requests)):
+        method, path, form, _ = route_request(route, resume_ids[emails[0]][0], args.sections, i)
+        sessions[0](method, path, form)
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(args.concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'seconds': round(wall, 3),
+        'throughput': round(len(latencies) / wall, 2) if wall else None,
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'max_ms': round(max(latencies) * 1000, 2) if latencies else None,
+    }
+
+
+def run_routes(driver, resume_ids, args):
+    results = {}
+    for route in args.routes:
+        results[route] = run_route(driver, route, resume_ids, args)
+        print_route(route, results[route])
+    return results
+
+
+def print_route(route, result):
+    errors = f"  errors {result['errors']}" if result['errors'] else ''
+    print(f"  {route:<16} {result['throughput']:>8} req/s  p50 {result['p50_ms']:>8} ms  "
+          f"p95 {result['p95_ms']:>8} ms  p99 {result['p99_ms']:>8} ms{errors}")
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _serve_gunicorn(port, workers, threads, fake_pdf):
+    from gunicorn.app.base import BaseApplication
+
+    class BenchmarkApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f"127.0.0.1:{port}")
+            self.cfg.set('workers', workers)
+            self.cfg.set('threads', threads)
+            self.cfg.set('timeout', 120)
+            self.cfg.set('loglevel', 'warning')
+            # Schema upgrades ran while seeding; workers must not race to repeat them
+            os.environ['DB_AUTO_UPGRADE'] = 'false'
+
+        def load(self):
+            if fake_pdf:
+                fake_pdf_engines()
+            from website import create_app
+            return create_app()
+
+    BenchmarkApplication().run()
+
+
+def run_gunicorn(resume_ids, args):
+    port = _free_port()
+    server = multiprocessing.get_context('fork').Process(
+        target=_serve_gunicorn, args=(port, args.gunicorn_workers, args.gunicorn_threads, args.fake_pdf))
+    server.start()
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                urllib.request.urlopen(base_url + '/login', timeout=2).read()
+                break
+            except (urllib.error.URLError, ConnectionError):
+                if time.monotonic() > deadline or not server.is_alive():
+                    raise RuntimeError('gunicorn did not start')
+                time.sleep(0.2)
+        return run_routes(HttpDriver(base_url), resume_ids, args)
+    finally:
+        server.terminate()
+        server.join(timeout=30)
+
+
+def compare(results, baseline, tolerance):
+    """Regressions of p95 latency or throughput beyond tolerance, as printable lines"""
+    regressions = []
+    for mode, routes in results['results'].items():
+        for route, current in routes.items():
+            previous = baseline.get('results', {}).get(mode, {}).get(route)
+            if not previous:
+                continue
+            p95_change = (current['p95_ms'] - previous['p95_ms']) / previous['p95_ms'] if previous['p95_ms'] else 0
+            rps_change = (current['throughput'] - previous['throughput']) / previous['throughput'] \
+                if previous['throughput'] else 0
+            line = f"  {mode:<9} {route:<16} p95 {p95_change:+.1%}  throughput {rps_change:+.1%}"
+            if p95_change > tolerance or rps_change < -tolerance:
+                regressions.append(line)
+                line += '  REGRESSION'
+            print(line)
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--users', type=int, default=4)
+    parser.add_argument('--resumes', type=int, default=5, help='resumes per user')
+    parser.add_argument('--sections', type=int, default=3, help='average rows per resume section')
+    parser.add_argument('--events', type=int, default=200, help='analytics events per resume')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--requests', type=int, default=200, help='requests per route')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--routes', default=','.join(ROUTES), type=lambda value: value.split(','))
+    parser.add_argument('--mode', choices=['client', 'gunicorn', 'both'], default='both')
+    parser.add_argument('--gunicorn-workers', type=int, default=2)
+    parser.add_argument('--gunicorn-threads', type=int, default=4)
+    parser.add_argument('--fake-pdf', action='store_true', help='stub the PDF engines out of download_resume')
+    parser.add_argument('--database-url', help='benchmark against this database instead of a temporary SQLite file')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--baseline', help='compare with results written by an earlier run')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown before failing, 0.2 = 20%%')
+    args = parser.parse_args()
+    unknown = set(args.routes) - set(ROUTES)
+    if unknown:
+        parser.error(f"unknown routes: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_environment(args, tmp)
+        if args.fake_pdf:
+            fake_pdf_engines()
+        from website import create_app
+        app = create_app()
+        started = time.perf_counter()
+        resume_ids = seed(app, args)
+        print(f"Seeded {args.users} users x {args.resumes} resumes in {time.perf_counter() - started:.1f}s")
+
+        results = {
+            'meta': {
+                'revision': git_revision(),
+                'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'cpus': os.cpu_count(),
+                'database': app.config['SQLALCHEMY_DATABASE_URI'].split(':', 1)[0],
+                'options': {key: value for key, value in vars(args).items()
+                            if key not in ('output', 'baseline', 'tolerance', 'database_url')},
+            },
+            'results': {},
+        }
+        if args.mode in ('client', 'both'):
+            print('Flask test client')
+            results['results']['client'] = run_routes(TestClientDriver(app), resume_ids, args)
+        if args.mode in ('gunicorn', 'both'):
+            print(f"gunicorn, {args.gunicorn_workers} workers x {args.gunicorn_threads} threads")
+            results['results']['gunicorn'] = run_gunicorn(resume_ids, args)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        previous = baseline.get('meta', {}).get('options', {})
+        changed = [key for key in COMPARABLE_OPTIONS if previous.get(key) != results['meta']['options'].get(key)]
+        if changed:
+            print(f"Warning: the baseline was recorded with different {', '.join(changed)}")
+        print(f"Compared with {args.baseline} ({baseline.get('meta', {}).get('revision')})")
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
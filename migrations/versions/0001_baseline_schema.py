@@ -0,0 +1,145 @@
+"""baseline schema
+
+The tables as the first release created them with db.create_all().
+Databases that predate migrations are stamped at this revision by
+create_database and upgraded from here.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 08:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(length=20), nullable=False),
+    sa.Column('email', sa.String(length=60), nullable=False),
+    sa.Column('password', sa.String(length=140), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email')
+    )
+    op.create_table('email_notification',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('subject', sa.String(length=200), nullable=True),
+    sa.Column('body', sa.Text(), nullable=True),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.Column('is_sent', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('resume',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('title', sa.String(length=50), nullable=False),
+    sa.Column('style', sa.String(length=20), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('download_count', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('certification',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('resume_id', sa.Integer(), nullable=True),
+    sa.Column('name', sa.String(length=100), nullable=True),
+    sa.Column('issuer', sa.String(length=100), nullable=True),
+    sa.Column('issue_date', sa.String(length=20), nullable=True),
+    sa.Column('credential_link', sa.String(length=200), nullable=True),
+    sa.ForeignKeyConstraint(['resume_id'], ['resume.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('education',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('resume_id', sa.Integer(), nullable=True),
+    sa.Column('degree', sa.String(length=100), nullable=True),
+    sa.Column('institution', sa.String(length=100), nullable=True),
+    sa.Column('start_year', sa.Integer(), nullable=True),
+    sa.Column('end_year', sa.Integer(), nullable=True),
+    sa.Column('cgpa', sa.Float(), nullable=True),
+    sa.Column('description', sa.String(length=300), nullable=True),
+    sa.ForeignKeyConstraint(['resume_id'], ['resume.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('experience',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('resume_id', sa.Integer(), nullable=True),
+    sa.Column('job_title', sa.String(length=100), nullable=True),
+    sa.Column('company', sa.String(length=100), nullable=True),
+    sa.Column('start_date', sa.String(length=20), nullable=True),
+    sa.Column('end_date', sa.String(length=20), nullable=True),
+    sa.Column('description', sa.String(length=300), nullable=True),
+    sa.ForeignKeyConstraint(['resume_id'], ['resume.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('personal_info',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('resume_id', sa.Integer(), nullable=True),
+    sa.Column('profile_pic', sa.String(length=150), nullable=True),
+    sa.Column('full_name', sa.String(length=50), nullable=False),
+    sa.Column('phone', sa.String(length=15), nullable=False),
+    sa.Column('resume_email', sa.String(length=60), nullable=False),
+    sa.Column('linkedin', sa.String(length=100), nullable=True),
+    sa.Column('github', sa.String(length=100), nullable=True),
+    sa.Column('address', sa.String(length=200), nullable=True),
+    sa.Column('summary', sa.String(length=300), nullable=False),
+    sa.ForeignKeyConstraint(['resume_id'], ['resume.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('resume_id')
+    )
+    op.create_table('project',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('resume_id', sa.Integer(), nullable=True),
+    sa.Column('title', sa.String(length=100), nullable=True),
+    sa.Column('description', sa.String(length=300), nullable=True),
+    sa.Column('tech_stack', sa.String(length=200), nullable=True),
+    sa.Column('link', sa.String(length=200), nullable=True),
+    sa.ForeignKeyConstraint(['resume_id'], ['resume.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('resume_analytic',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('resume_id', sa.Integer(), nullable=True),
+    sa.Column('action', sa.String(length=50), nullable=True),
+    sa.Column('details', sa.String(length=500), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['resume_id'], ['resume.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('skill',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('resume_id', sa.Integer(), nullable=True),
+    sa.Column('name', sa.String(length=50), nullable=True),
+    sa.Column('level', sa.String(length=20), nullable=True),
+    sa.ForeignKeyConstraint(['resume_id'], ['resume.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('skill')
+    op.drop_table('resume_analytic')
+    op.drop_table('project')
+    op.drop_table('personal_info')
+    op.drop_table('experience')
+    op.drop_table('education')
+    op.drop_table('certification')
+    op.drop_table('resume')
+    op.drop_table('email_notification')
+    op.drop_table('user')
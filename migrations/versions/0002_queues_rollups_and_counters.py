@@ -0,0 +1,150 @@
+"""queues, analytics rollups and resume counters
+
+Everything the models gained between the baseline and the move to
+migrations: the email outbox columns, the PDF job queue, analytics
+rollup tables, and the resume version stamp and completeness counters.
+
+Databases that ran a build in between were created or extended by
+db.create_all(), so each step only runs when its object is missing.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 08:06:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def _resume_columns():
+    return [
+        sa.Column('version', sa.Integer(), server_default='1', nullable=False),
+        sa.Column('has_personal_info', sa.Boolean(), server_default=sa.false(), nullable=False),
+        sa.Column('education_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('experience_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('project_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('skill_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('certification_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('completion_percentage', sa.Float(), server_default='0', nullable=False),
+    ]
+
+
+def _email_columns():
+    return [
+        sa.Column('recipients', sa.Text(), nullable=True),
+        sa.Column('html', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), server_default='queued', nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('last_error', sa.String(length=500), nullable=True),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+    ]
+
+
+def _tables():
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def _columns(table):
+    return {column['name'] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def _add_missing_columns(table, columns):
+    existing = _columns(table)
+    missing = [column for column in columns if column.name not in existing]
+    if missing:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column in missing:
+                batch_op.add_column(column)
+    return {column.name for column in missing}
+
+
+def _sqlite_autoincrement_missing(table):
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return False
+    sql = bind.execute(sa.text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                       {'name': table}).scalar()
+    return 'AUTOINCREMENT' not in (sql or '').upper()
+
+
+def upgrade():
+    _add_missing_columns('resume', _resume_columns())
+
+    added = _add_missing_columns('email_notification', _email_columns())
+    if 'status' in added:
+        # Rows from before the outbox were written after the send attempt; never resend them
+        op.execute("UPDATE email_notification SET status = CASE WHEN is_sent THEN 'sent' ELSE 'dead' END")
+    if 'created_at' in added:
+        op.execute("UPDATE email_notification SET created_at = sent_at")
+    # The outbox and analytics lookup indexes are built concurrently in 0003
+
+    if _sqlite_autoincrement_missing('resume_analytic'):
+        # The rollup watermark needs ids that are never reused after pruning
+        with op.batch_alter_table('resume_analytic', recreate='always',
+                                  table_kwargs={'sqlite_autoincrement': True}) as batch_op:
+            pass
+
+    tables = _tables()
+    if 'analytics_rollup_state' not in tables:
+        op.create_table('analytics_rollup_state',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('last_event_id', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+        )
+    if 'resume_analytic_rollup' not in tables:
+        op.create_table('resume_analytic_rollup',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('resume_id', sa.Integer(), nullable=True),
+        sa.Column('action', sa.String(length=50), nullable=False),
+        sa.Column('granularity', sa.String(length=10), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['resume_id'], ['resume.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('granularity', 'bucket_start', 'resume_id', 'action', name='uq_resume_analytic_rollup_bucket')
+        )
+        with op.batch_alter_table('resume_analytic_rollup', schema=None) as batch_op:
+            batch_op.create_index('ix_resume_analytic_rollup_user_bucket', ['user_id', 'granularity', 'bucket_start'], unique=False)
+    if 'pdf_job' not in tables:
+        op.create_table('pdf_job',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('resume_id', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('error', sa.String(length=500), nullable=True),
+        sa.Column('file_path', sa.String(length=300), nullable=True),
+        sa.Column('available_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['resume_id'], ['resume.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+
+def downgrade():
+    op.drop_table('pdf_job')
+    with op.batch_alter_table('resume_analytic_rollup', schema=None) as batch_op:
+        batch_op.drop_index('ix_resume_analytic_rollup_user_bucket')
+    op.drop_table('resume_analytic_rollup')
+    op.drop_table('analytics_rollup_state')
+
+    with op.batch_alter_table('email_notification', schema=None) as batch_op:
+        for column in _email_columns():
+            batch_op.drop_column(column.name)
+    with op.batch_alter_table('resume', schema=None) as batch_op:
+        for column in _resume_columns():
+            batch_op.drop_column(column.name)
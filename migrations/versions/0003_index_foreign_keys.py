@@ -0,0 +1,69 @@
+"""index foreign keys and queue lookups
+
+Every section table is read and deleted by resume_id, resumes are listed
+by user_id, the PDF queue and email outbox are polled by status, and the
+dashboard counts analytics per user, resume and action. Without these
+indexes each of those is a full table scan.
+
+On PostgreSQL the indexes are built with CREATE INDEX CONCURRENTLY
+outside the migration transaction, so writes to the live tables are not
+blocked while they build. A concurrent build that fails leaves an
+INVALID index behind; IF NOT EXISTS would then skip it, so drop it and
+rerun `flask db upgrade`.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 08:07:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_resume_user_id', 'resume', ['user_id']),
+    ('ix_education_resume_id', 'education', ['resume_id']),
+    ('ix_experience_resume_id', 'experience', ['resume_id']),
+    ('ix_project_resume_id', 'project', ['resume_id']),
+    ('ix_skill_resume_id', 'skill', ['resume_id']),
+    ('ix_certification_resume_id', 'certification', ['resume_id']),
+    ('ix_resume_analytic_resume_id', 'resume_analytic', ['resume_id']),
+    ('ix_resume_analytic_created_at', 'resume_analytic', ['created_at']),
+    ('ix_resume_analytic_user_resume_action_created', 'resume_analytic', ['user_id', 'resume_id', 'action', 'created_at']),
+    ('ix_resume_analytic_rollup_resume_id', 'resume_analytic_rollup', ['resume_id']),
+    ('ix_email_notification_user_id', 'email_notification', ['user_id']),
+    ('ix_email_notification_status_next_attempt', 'email_notification', ['status', 'next_attempt_at']),
+    ('ix_pdf_job_user_id', 'pdf_job', ['user_id']),
+    ('ix_pdf_job_resume_status', 'pdf_job', ['resume_id', 'status']),
+    ('ix_pdf_job_status_available', 'pdf_job', ['status', 'available_at']),
+]
+
+
+def _concurrently():
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def upgrade():
+    if _concurrently():
+        with op.get_context().autocommit_block():
+            for name, table, columns in INDEXES:
+                op.create_index(name, table, columns, unique=False, if_not_exists=True,
+                                postgresql_concurrently=True)
+        return
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    if _concurrently():
+        with op.get_context().autocommit_block():
+            for name, table, _ in reversed(INDEXES):
+                op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+        return
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,32 @@
+"""analytics rollup commit horizon
+
+On PostgreSQL the rollup remembers the newest event id it saw together
+with its snapshot's xmax, and only moves the watermark past that id once
+every transaction that could still hold a lower id has finished.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 12:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('analytics_rollup_state', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('pending_event_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('pending_xmax', sa.BigInteger(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('analytics_rollup_state', schema=None) as batch_op:
+        batch_op.drop_column('pending_xmax')
+        batch_op.drop_column('pending_event_id')
@@ -0,0 +1,124 @@
+"""resume full-text search table
+
+The search documents live in resume_search, outside the models: a
+tsvector table with a GIN index on PostgreSQL, an FTS5 virtual table on
+SQLite builds that have FTS5, and a plain table searched with LIKE on
+those that do not. Databases that already have the table (it used to be
+created at startup) keep it and its contents.
+
+The table is filled from the resume tables when it is created here;
+`flask search-reindex` rebuilds it at any time. On PostgreSQL the
+indexes are built with CREATE INDEX CONCURRENTLY, like 0003.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 14:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+SQLITE_FTS_DDL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS resume_search USING fts5(
+    resume_id UNINDEXED, user_id UNINDEXED,
+    title, full_name, summary, skills, experience, projects,
+    tokenize='porter unicode61'
+)
+"""
+
+SQLITE_PLAIN_DDL = """
+CREATE TABLE IF NOT EXISTS resume_search (
+    resume_id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL,
+    title TEXT, full_name TEXT, summary TEXT, skills TEXT, experience TEXT, projects TEXT
+)
+"""
+
+POSTGRES_DDL = """
+CREATE TABLE IF NOT EXISTS resume_search (
+    resume_id INTEGER PRIMARY KEY REFERENCES resume(id) ON DELETE CASCADE,
+    user_id INTEGER NOT NULL,
+    title TEXT, full_name TEXT, summary TEXT, skills TEXT, experience TEXT, projects TEXT,
+    document TSVECTOR NOT NULL
+)
+"""
+
+POSTGRES_INDEXES = [
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_resume_search_document ON resume_search USING GIN (document)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_resume_search_user_id ON resume_search (user_id)",
+]
+
+SKILLS = "coalesce(s.name, '')"
+EXPERIENCE = "trim(coalesce(e.job_title, '') || ' ' || coalesce(e.company, '') || ' ' || coalesce(e.description, ''))"
+PROJECTS = "trim(coalesce(j.title, '') || ' ' || coalesce(j.description, '') || ' ' || coalesce(j.tech_stack, ''))"
+
+
+def _documents(aggregate):
+    """One row per resume with the fields search_service._document() builds; aggregate joins with spaces"""
+    return f"""
+    SELECT r.id AS resume_id, r.user_id, r.title, p.full_name, p.summary,
+           (SELECT {aggregate(SKILLS)} FROM skill s WHERE s.resume_id = r.id) AS skills,
+           (SELECT {aggregate(EXPERIENCE)} FROM experience e WHERE e.resume_id = r.id) AS experience,
+           (SELECT {aggregate(PROJECTS)} FROM project j WHERE j.resume_id = r.id) AS projects
+    FROM resume r
+    LEFT JOIN personal_info p ON p.resume_id = r.id
+    WHERE r.user_id IS NOT NULL
+    """
+
+
+def _postgres_backfill():
+    documents = _documents(lambda value: f"string_agg({value}, ' ')")
+    return f"""
+    INSERT INTO resume_search (resume_id, user_id, title, full_name, summary, skills, experience, projects, document)
+    SELECT d.*,
+        setweight(to_tsvector('english', coalesce(d.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(d.full_name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(d.skills, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(d.summary, '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(d.experience, '') || ' ' || coalesce(d.projects, '')), 'D')
+    FROM ({documents}) d
+    ON CONFLICT (resume_id) DO NOTHING
+    """
+
+
+def _sqlite_backfill():
+    documents = _documents(lambda value: f"group_concat({value}, ' ')")
+    # rowid mirrors resume_id, which is how search_service replaces a document
+    return f"""
+    INSERT INTO resume_search (rowid, resume_id, user_id, title, full_name, summary, skills, experience, projects)
+    SELECT d.resume_id, d.* FROM ({documents}) d
+    """
+
+
+def _sqlite_has_fts5(bind):
+    return bool(bind.execute(sa.text("SELECT sqlite_compileoption_used('ENABLE_FTS5')")).scalar())
+
+
+def upgrade():
+    bind = op.get_bind()
+    created = not sa.inspect(bind).has_table('resume_search')
+    if bind.dialect.name == 'postgresql':
+        op.execute(POSTGRES_DDL)
+        if created:
+            op.execute(_postgres_backfill())
+        with op.get_context().autocommit_block():
+            for ddl in POSTGRES_INDEXES:
+                op.execute(ddl)
+        return
+    op.execute(SQLITE_FTS_DDL if _sqlite_has_fts5(bind) else SQLITE_PLAIN_DDL)
+    if created:
+        op.execute(_sqlite_backfill())
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_resume_search_user_id")
+            op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_resume_search_document")
+    op.execute("DROP TABLE IF EXISTS resume_search")
@@ -0,0 +1,92 @@
+import pytest
+from website import create_app, pdf_service
+from website.analytics_service import event_buffer
+from website.email_service import email_sender
+from website.models import db
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """Build the app on a throwaway SQLite database; keyword arguments become environment variables"""
+    apps = []
+
+    def make(**env):
+        settings = {
+            'DATABASE_URL': f"sqlite:///{tmp_path / 'test.db'}",
+            'PDF_CACHE_DIR': str(tmp_path / 'pdf_cache'),
+            'TEMPLATE_BYTECODE_DIR': str(tmp_path / 'jinja_cache'),
+            'STORAGE_BACKEND': 'memory',
+            'MAIL_OUTBOX_IN_PROCESS': 'false',
+        }
+        settings.update(env)
+        for name, value in settings.items():
+            monkeypatch.setenv(name, str(value))
+        app = create_app()
+        app.config['TESTING'] = True
+        apps.append(app)
+        return app
+
+    yield make
+    # The background threads are process-wide; stop them before the database goes away
+    event_buffer.shutdown()
+    email_sender.shutdown()
+    for app in apps:
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def fake_renderer(monkeypatch):
+    """Stand in for Chromium; the rendered documents are kept in .documents"""
+    documents = []
+
+    def render(html, css_path=None):
+        documents.append(html)
+        return b'%PDF-1.4 test'
+
+    monkeypatch.setattr(pdf_service.renderer, 'render', render)
+    render.documents = documents
+    return render
+
+
+PASSWORD = 'Passw0rd!'
+
+RESUME_FORM = {
+    'full_name': 'Alice Smith', 'resume_email': 'alice@example.com', 'phone': '555-0100',
+    'summary': 'Python developer',
+    'degree[]': ['BSc', 'MSc'], 'institution[]': ['U1', 'U2'], 'start_year[]': ['2010', '2014'],
+    'end_year[]': ['2014', '2016'], 'edu_description[]': ['', ''],
+    'job_title[]': ['Engineer'], 'company[]': ['Acme'], 'start_date[]': ['2016'], 'end_date[]': ['now'],
+    'exp_description[]': ['Built flask apps'],
+    'project_title[]': ['Resume'], 'project_description[]': ['builder'], 'tech_stack[]': ['flask'],
+    'project_link[]': [''],
+    'skill_name[]': ['Python', 'SQL'], 'skill_level[]': ['advanced', 'intermediate'],
+    'cert_name[]': ['AWS'], 'issuer[]': ['Amazon'], 'issue_date[]': ['2020-01-01'], 'credential_link[]': [''],
+}
+
+
+@pytest.fixture
+def resume_id(client):
+    """Sign up and create a resume with every section filled in; returns its id"""
+    response = client.post('/Sign-Up', data={'name': 'Alice', 'email': 'alice@example.com',
+                                             'password1': PASSWORD, 'password2': PASSWORD})
+    assert response.status_code == 302
+    response = client.post('/home', data={'full_name': RESUME_FORM['full_name'],
+                                          'resume_email': RESUME_FORM['resume_email'],
+                                          'phone': RESUME_FORM['phone'], 'summary': RESUME_FORM['summary'],
+                                          'template': 'modern'})
+    resume_id = int(response.location.rsplit('/', 1)[1])
+    response = client.post(f'/Resume/{resume_id}', data=RESUME_FORM)
+    assert response.status_code == 302
+    return resume_id
@@ -0,0 +1,78 @@
+"""Rollup reads must match counting the raw events"""
+from collections import Counter
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import func, select
+from website.analytics_rollup import get_watermark, prune_events, roll_up_events, rolled_up_counts
+from website.models import db, Resume, ResumeAnalytic, User
+
+ACTIONS = ['download', 'view']
+
+
+@pytest.fixture
+def history(app):
+    """Two resumes with events spread over four days, returns (user_id, start hour)"""
+    with app.app_context():
+        user = User(username='dana', email='dana@example.com', password='x')
+        db.session.add(user)
+        db.session.flush()
+        resumes = [Resume(user_id=user.id, title=f"Resume {i}") for i in range(2)]
+        db.session.add_all(resumes)
+        db.session.flush()
+        start = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(days=4)
+        for k in range(40):
+            db.session.add(ResumeAnalytic(
+                user_id=user.id, resume_id=resumes[k % 2].id, action=ACTIONS[k % 3 == 0],
+                created_at=start + timedelta(hours=k * 2.3, minutes=7)
+            ))
+        db.session.commit()
+        yield user.id, start
+
+
+def _raw_counts(user_id, since=None):
+    conditions = [ResumeAnalytic.user_id == user_id, ResumeAnalytic.action.in_(ACTIONS)]
+    if since is not None:
+        conditions.append(ResumeAnalytic.created_at >= since)
+    return Counter({
+        (resume_id, action): count
+        for resume_id, action, count in db.session.execute(
+            select(ResumeAnalytic.resume_id, ResumeAnalytic.action, func.count())
+            .where(*conditions)
+            .group_by(ResumeAnalytic.resume_id, ResumeAnalytic.action)
+        )
+    })
+
+
+def _windows(start):
+    # Whole hours, as the hourly buckets are; one of them falls mid-day
+    return [None, start + timedelta(hours=13), start + timedelta(days=2), start + timedelta(days=3, hours=22)]
+
+
+def test_counts_match_the_raw_events(history):
+    user_id, start = history
+    for since in _windows(start):
+        assert rolled_up_counts(user_id, ACTIONS, since) == _raw_counts(user_id, since)
+
+    # Folded in several id ranges, then a tail that is not rolled up yet
+    assert roll_up_events(batch_size=7) == 40
+    assert get_watermark() == db.session.scalar(select(func.max(ResumeAnalytic.id)))
+    resume_id = db.session.scalar(select(Resume.id).where(Resume.user_id == user_id).limit(1))
+    db.session.add_all(ResumeAnalytic(user_id=user_id, resume_id=resume_id, action='view',
+                                      created_at=datetime.utcnow()) for _ in range(3))
+    db.session.commit()
+
+    for since in _windows(start):
+        assert rolled_up_counts(user_id, ACTIONS, since) == _raw_counts(user_id, since)
+    assert roll_up_events() == 3
+    assert roll_up_events() == 0
+
+
+def test_pruned_events_stay_counted(history):
+    user_id, start = history
+    before = {since: _raw_counts(user_id, since) for since in _windows(start)}
+    roll_up_events()
+
+    assert prune_events(retention_days=2) > 0
+    assert _raw_counts(user_id) != before[None]
+    for since, counts in before.items():
+        assert rolled_up_counts(user_id, ACTIONS, since) == counts
@@ -0,0 +1,43 @@
+"""The route benchmark runs end to end and its baseline gate flags regressions"""
+import json
+import os
+import subprocess
+import sys
+from benchmarks.suite import ROUTES, compare
+
+SUITE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'suite.py')
+TINY_RUN = ['--mode', 'client', '--users', '1', '--resumes', '1', '--sections', '1', '--events', '5',
+            '--requests', '3', '--concurrency', '1', '--warmup', '0', '--fake-pdf']
+
+
+def _result(p95_ms, throughput):
+    return {'p95_ms': p95_ms, 'throughput': throughput}
+
+
+def test_compare_flags_slower_routes_only():
+    baseline = {'results': {'client': {'view_resume': _result(10, 100), 'dashboard': _result(10, 100),
+                                       'manage_resumes': _result(10, 100)}}}
+    results = {'results': {'client': {'view_resume': _result(11.5, 95), 'dashboard': _result(13, 100),
+                                      'manage_resumes': _result(10, 70), 'search_resume': _result(50, 1)}}}
+
+    regressions = compare(results, baseline, tolerance=0.2)
+
+    assert len(regressions) == 2
+    assert 'dashboard' in regressions[0]
+    assert 'manage_resumes' in regressions[1]
+
+
+def test_suite_runs_every_route_and_passes_against_itself(tmp_path):
+    output = tmp_path / 'results.json'
+    subprocess.run([sys.executable, SUITE, *TINY_RUN, '--output', str(output)], check=True,
+                   capture_output=True)
+
+    routes = json.loads(output.read_text())['results']['client']
+    assert set(routes) == set(ROUTES)
+    assert not any(route['errors'] for route in routes.values())
+
+    # Timings this small are noise; the gate itself must pass with a generous tolerance
+    rerun = subprocess.run([sys.executable, SUITE, *TINY_RUN, '--baseline', str(output), '--tolerance', '100'],
+                           capture_output=True, text=True)
+    assert rerun.returncode == 0, rerun.stdout + rerun.stderr
+    assert 'REGRESSION' not in rerun.stdout
@@ -0,0 +1,59 @@
+"""stream_resume_zip and its manifest when some resumes fail"""
+import io
+import json
+import zipfile
+import pytest
+from website import bulk_export
+from website.bulk_export import stream_resume_zip
+
+pytestmark = pytest.mark.usefixtures('fake_renderer')
+
+
+def _export(app, resume_ids):
+    data = b''.join(stream_resume_zip(app, resume_ids, concurrency=2))
+    archive = zipfile.ZipFile(io.BytesIO(data))
+    manifest = json.loads(archive.read('manifest.json'))
+    return archive, manifest
+
+
+def _failing_chunks(after):
+    def chunks(result):
+        for chunk in (b'%PDF-', b'1.4 test')[:after]:
+            yield chunk
+        raise OSError('storage went away')
+    return chunks
+
+
+def test_export_reports_missing_resumes(app, resume_id):
+    archive, manifest = _export(app, [resume_id, 9999])
+
+    assert manifest['requested'] == 2
+    assert manifest['exported'] == 1
+    assert manifest['failed'] == 1
+    ok, missing = sorted(manifest['resumes'], key=lambda entry: entry['resume_id'])
+    assert ok['status'] == 'ok'
+    assert archive.read(ok['file']) == b'%PDF-1.4 test'
+    assert missing == {'resume_id': 9999, 'status': 'error', 'error': 'Resume no longer exists'}
+    assert archive.namelist() == [ok['file'], 'manifest.json']
+
+
+def test_unreadable_pdf_leaves_no_member(app, resume_id, monkeypatch):
+    monkeypatch.setattr(bulk_export, '_pdf_chunks', _failing_chunks(after=0))
+    archive, manifest = _export(app, [resume_id])
+
+    assert archive.namelist() == ['manifest.json']
+    assert manifest['failed'] == 1
+    assert manifest['resumes'] == [{'resume_id': resume_id, 'status': 'error', 'error': 'storage went away'}]
+
+
+def test_pdf_failing_midway_is_flagged_truncated(app, resume_id, monkeypatch):
+    monkeypatch.setattr(bulk_export, '_pdf_chunks', _failing_chunks(after=1))
+    archive, manifest = _export(app, [resume_id])
+
+    entry, = manifest['resumes']
+    assert entry['status'] == 'error'
+    assert entry['truncated'] is True
+    assert entry['bytes'] == 5
+    assert archive.namelist() == [entry['file'], 'manifest.json']
+    assert archive.read(entry['file']) == b'%PDF-'
+    assert manifest['exported'] == 0
@@ -0,0 +1,141 @@
+"""Outbox delivery against a local aiosmtpd server"""
+import socket
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import update
+from website.email_service import email_sender, mail, send_email_async
+from website.models import db, EmailNotification
+
+controller_module = pytest.importorskip('aiosmtpd.controller')
+
+RETRY_DELAY = 30
+
+
+class RecordingHandler:
+    """Accepts messages, remembering which connection each came over; fail_next answers 451 instead"""
+
+    def __init__(self):
+        self.messages = []
+        self.fail_next = 0
+        self.fail_always = False
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.fail_always or self.fail_next:
+            self.fail_next = max(0, self.fail_next - 1)
+            return '451 4.3.0 Try again later'
+        self.messages.append((session.peer, envelope.rcpt_tos))
+        return '250 OK'
+
+    def connections(self):
+        return {peer for peer, _ in self.messages}
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp():
+    handler = RecordingHandler()
+    controller = controller_module.Controller(handler, hostname='127.0.0.1', port=_free_port())
+    controller.start()
+    yield controller, handler
+    controller.stop()
+
+
+@pytest.fixture
+def outbox_app(make_app, smtp):
+    controller, _ = smtp
+    app = make_app(MAIL_SERVER=controller.hostname, MAIL_PORT=controller.port, MAIL_OUTBOX_MAX_ATTEMPTS=3,
+                   MAIL_OUTBOX_RETRY_DELAY=RETRY_DELAY, MAIL_OUTBOX_BATCH_SIZE=10)
+    app.config.update(MAIL_USE_TLS=False, MAIL_USE_SSL=False, MAIL_SUPPRESS_SEND=False)
+    # Flask-Mail reads its settings once at init_app
+    mail.init_app(app)
+    with app.app_context():
+        yield app
+
+
+def _queue(count):
+    for i in range(count):
+        assert send_email_async(f"Message {i}", [f"user{i}@example.com"], text_body='Hello')
+    return db.session.scalars(db.select(EmailNotification.id).order_by(EmailNotification.id)).all()
+
+
+def _make_due():
+    """Skip the backoff wait instead of sleeping through it"""
+    db.session.execute(update(EmailNotification).values(next_attempt_at=datetime.utcnow() - timedelta(seconds=1)))
+    db.session.commit()
+
+
+def _notifications():
+    db.session.expire_all()
+    return db.session.scalars(db.select(EmailNotification).order_by(EmailNotification.id)).all()
+
+
+def test_batch_is_sent_over_one_connection(outbox_app, smtp):
+    _, handler = smtp
+    _queue(3)
+
+    assert email_sender.send_pending() == 3
+
+    assert len(handler.messages) == 3
+    assert len(handler.connections()) == 1
+    assert [rcpt for _, rcpt in handler.messages] == [['user0@example.com'], ['user1@example.com'],
+                                                      ['user2@example.com']]
+    for notification in _notifications():
+        assert notification.status == 'sent'
+        assert notification.is_sent
+        assert notification.attempts == 1
+    assert email_sender.send_pending() == 0
+
+
+def test_transient_failure_is_retried_with_backoff(outbox_app, smtp):
+    _, handler = smtp
+    _queue(1)
+    handler.fail_next = 2
+
+    before = datetime.utcnow()
+    assert email_sender.send_pending() == 1
+    notification, = _notifications()
+    assert notification.status == 'queued'
+    assert notification.attempts == 1
+    assert '451' in notification.last_error
+    assert notification.next_attempt_at >= before + timedelta(seconds=RETRY_DELAY)
+    # Not due yet: nothing is claimed
+    assert email_sender.send_pending() == 0
+
+    _make_due()
+    before = datetime.utcnow()
+    assert email_sender.send_pending() == 1
+    notification, = _notifications()
+    assert notification.attempts == 2
+    # The delay doubles with every attempt
+    assert notification.next_attempt_at >= before + timedelta(seconds=2 * RETRY_DELAY)
+
+    _make_due()
+    assert email_sender.send_pending() == 1
+    notification, = _notifications()
+    assert notification.status == 'sent'
+    assert notification.attempts == 3
+    assert notification.last_error is None
+    assert len(handler.messages) == 1
+
+
+def test_message_is_dead_lettered_after_max_attempts(outbox_app, smtp):
+    _, handler = smtp
+    handler.fail_always = True
+    _queue(1)
+
+    for attempt in range(1, 4):
+        _make_due()
+        assert email_sender.send_pending() == 1
+        notification, = _notifications()
+        assert notification.attempts == attempt
+    assert notification.status == 'dead'
+    assert not notification.is_sent
+
+    _make_due()
+    assert email_sender.send_pending() == 0
+    assert handler.messages == []
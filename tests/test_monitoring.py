@@ -0,0 +1,25 @@
+"""Access to the monitoring endpoints"""
+import pytest
+
+ENDPOINTS = ['/health/db', '/health/user-cache', '/metrics']
+
+
+@pytest.mark.parametrize('path', ENDPOINTS)
+def test_hidden_without_a_token_in_production(app, client, path):
+    app.testing = False
+    assert client.get(path).status_code == 404
+
+
+@pytest.mark.parametrize('path', ENDPOINTS)
+def test_open_without_a_token_while_testing(client, path):
+    assert client.get(path).status_code == 200
+
+
+@pytest.mark.parametrize('path', ENDPOINTS)
+def test_token_is_required_once_configured(make_app, path):
+    app = make_app(MONITORING_TOKEN='s3cret')
+    app.testing = False
+    client = app.test_client()
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    assert client.get(path, headers={'Authorization': 'Bearer s3cret'}).status_code == 200
@@ -0,0 +1,70 @@
+"""PdfCache size tracking and eviction against the in-memory pdf store"""
+import pytest
+from website.pdf_cache import pdf_cache
+from website.storage import storage
+
+PDF = b'%PDF-' + b'x' * 95
+
+
+@pytest.fixture
+def listings(app, monkeypatch):
+    """Record the full listings of the pdf store that eviction makes"""
+    calls = []
+    original = storage.pdfs.list
+
+    def list_pdfs(prefix=''):
+        if prefix == 'resume_':
+            calls.append(prefix)
+        return original(prefix)
+
+    monkeypatch.setattr(storage.pdfs, 'list', list_pdfs)
+    monkeypatch.setattr(pdf_cache, 'max_bytes', 10 * len(PDF))
+    monkeypatch.setattr(pdf_cache, 'scan_interval', 3600)
+    return calls
+
+
+def _stored():
+    return {name: size for name, size, _ in storage.pdfs.list()}
+
+
+def test_puts_under_the_limit_list_the_store_once(listings):
+    for i in range(8):
+        pdf_cache.put(1, f"key{i}", PDF)
+    assert listings == ['resume_']
+    assert len(_stored()) == 8
+
+
+def test_going_over_the_limit_evicts_down_to_the_low_water_mark(listings):
+    for i in range(10):
+        pdf_cache.put(1, f"key{i}", PDF)
+    assert len(listings) == 1
+
+    newest = pdf_cache.put(2, 'newest', PDF)
+    assert len(listings) == 2
+    stored = _stored()
+    assert newest in stored
+    assert sum(stored.values()) <= pdf_cache.max_bytes * 0.9
+    # The headroom means the next put does not list again
+    pdf_cache.put(2, 'after', PDF)
+    assert len(listings) == 2
+
+
+def test_store_is_relisted_after_the_scan_interval(listings, monkeypatch):
+    pdf_cache.put(1, 'first', PDF)
+    monkeypatch.setattr(pdf_cache, 'scan_interval', 0)
+    pdf_cache.put(1, 'second', PDF)
+    assert listings == ['resume_', 'resume_']
+
+
+def test_invalidate_shrinks_the_tracked_size(listings):
+    for i in range(9):
+        pdf_cache.put(1, f"key{i}", PDF)
+    pdf_cache.put(2, 'other', PDF)
+    pdf_cache.invalidate(1)
+    assert list(_stored()) == [pdf_cache._name(2, 'other')]
+
+    # Room again for nine more without listing the whole store
+    calls = len(listings)
+    for i in range(9):
+        pdf_cache.put(3, f"key{i}", PDF)
+    assert len(listings) == calls
@@ -0,0 +1,89 @@
+"""The pooled Playwright renderer, with a stand-in page instead of Chromium"""
+import asyncio
+import concurrent.futures
+import time
+import pytest
+from website.pdf_service import PlaywrightRenderer
+
+
+class FakeContext:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class FakePage:
+    def __init__(self, delay):
+        self.delay = delay
+
+    async def set_content(self, html, **options):
+        await asyncio.sleep(self.delay)
+
+    async def pdf(self, **options):
+        return b'%PDF-1.4 fake'
+
+    def is_closed(self):
+        return False
+
+
+class FakeSlot:
+    def __init__(self, delay):
+        self.context = FakeContext()
+        self.page = FakePage(delay)
+        self.generation = 0
+        self.uses = 0
+
+
+@pytest.fixture
+def pool():
+    renderer = PlaywrightRenderer(pool_size=1, render_timeout=0.2)
+    slots = []
+
+    async def checkout(slot):
+        slot = FakeSlot(renderer.delay)
+        slots.append(slot)
+        return slot
+
+    renderer.delay = 0
+    renderer._checkout = checkout
+    yield renderer, slots
+    renderer.shutdown()
+
+
+def _idle_pages(renderer, expected, timeout=2):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if renderer.health_check()['idle_pages'] == expected:
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_render_returns_the_slot(pool):
+    renderer, slots = pool
+    assert renderer.render('<p>hi</p>') == b'%PDF-1.4 fake'
+    assert _idle_pages(renderer, 1)
+    assert not slots[0].context.closed
+
+
+def test_timed_out_render_is_cancelled_and_frees_its_slot(pool):
+    renderer, slots = pool
+    renderer.delay = 30
+    with pytest.raises(concurrent.futures.TimeoutError):
+        renderer.render('<p>slow</p>')
+    # The cancelled render gives the slot back and throws its page away
+    assert _idle_pages(renderer, 1)
+    assert slots[0].context.closed
+
+    renderer.delay = 0
+    assert renderer.render('<p>next</p>') == b'%PDF-1.4 fake'
+
+
+def test_pdf_health_endpoint(client):
+    response = client.get('/health/pdf')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['ok'] is True
+    assert set(body['engines']) == {'playwright', 'weasyprint'}
@@ -0,0 +1,139 @@
+"""The PdfJob queue and worker, rendering with the stand-in renderer"""
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import update
+from website import pdf_service
+from website.models import db, PdfJob, PersonalInfo, Resume, User
+from website.pdf_worker import claim_jobs, enqueue_pdf_job, process_job, recover_stale_jobs, run_worker
+
+pytestmark = pytest.mark.usefixtures('fake_renderer')
+
+RETRY_DELAY = 60
+
+
+@pytest.fixture
+def worker_app(make_app):
+    app = make_app(PDF_JOB_MAX_ATTEMPTS=2, PDF_JOB_RETRY_DELAY=RETRY_DELAY)
+    with app.app_context():
+        yield app
+
+
+def _resumes(*counts):
+    """One user per count, each with that many resumes; returns the resumes per user"""
+    owners = []
+    for n, count in enumerate(counts):
+        user = User(username=f"user{n}", email=f"user{n}@example.com", password='x')
+        db.session.add(user)
+        db.session.flush()
+        resumes = [Resume(user_id=user.id, title=f"Resume {i}", style='modern') for i in range(count)]
+        db.session.add_all(resumes)
+        db.session.flush()
+        db.session.add_all(PersonalInfo(resume_id=resume.id, full_name='Test User', phone='555-0100',
+                                        resume_email=user.email, summary='Summary') for resume in resumes)
+        owners.append(resumes)
+    db.session.commit()
+    return owners
+
+
+def _job(job_id):
+    db.session.expire_all()
+    return db.session.get(PdfJob, job_id)
+
+
+def _make_due():
+    db.session.execute(update(PdfJob).values(available_at=datetime.utcnow() - timedelta(seconds=1)))
+    db.session.commit()
+
+
+def test_enqueue_reuses_the_queued_job(worker_app):
+    (resume,), = _resumes(1)
+    job = enqueue_pdf_job(resume)
+    assert enqueue_pdf_job(resume).id == job.id
+    assert PdfJob.query.count() == 1
+
+    # Once it is running, a new download needs a fresh render
+    job.status = 'running'
+    db.session.commit()
+    assert enqueue_pdf_job(resume).id != job.id
+
+
+def test_claim_gives_every_user_a_turn(worker_app):
+    heavy, light = _resumes(3, 1)
+    heavy_jobs = [enqueue_pdf_job(resume).id for resume in heavy]
+    light_job = enqueue_pdf_job(light[0]).id
+
+    # The light user's job was queued last but is not stuck behind the heavy user's backlog
+    assert claim_jobs(limit=3, per_user_limit=1) == [heavy_jobs[0], light_job]
+    # Both users are at their running limit
+    assert claim_jobs(limit=3, per_user_limit=1) == []
+    assert claim_jobs(limit=3, per_user_limit=2) == [heavy_jobs[1]]
+    assert _job(heavy_jobs[1]).status == 'running'
+    assert _job(heavy_jobs[1]).attempts == 1
+    assert _job(heavy_jobs[2]).status == 'queued'
+
+
+def test_failing_render_is_retried_then_failed(worker_app, monkeypatch):
+    def broken(html, css_path=None):
+        raise RuntimeError('browser crashed')
+
+    monkeypatch.setattr(pdf_service.renderer, 'render', broken)
+    (resume,), = _resumes(1)
+    job_id = enqueue_pdf_job(resume).id
+
+    before = datetime.utcnow()
+    assert claim_jobs(1, 1) == [job_id]
+    process_job(worker_app, job_id, max_attempts=2, retry_delay=RETRY_DELAY)
+    job = _job(job_id)
+    assert job.status == 'queued'
+    assert job.error == 'PDF generation failed: browser crashed'
+    assert job.available_at >= before + timedelta(seconds=RETRY_DELAY)
+    # Backing off: not claimable yet
+    assert claim_jobs(1, 1) == []
+
+    _make_due()
+    assert claim_jobs(1, 1) == [job_id]
+    process_job(worker_app, job_id, max_attempts=2, retry_delay=RETRY_DELAY)
+    job = _job(job_id)
+    assert job.status == 'failed'
+    assert job.attempts == 2
+
+
+def test_recover_stale_jobs(worker_app):
+    (first, second), = _resumes(2)
+    retried = enqueue_pdf_job(first).id
+    exhausted = enqueue_pdf_job(second).id
+    long_ago = datetime.utcnow() - timedelta(hours=1)
+    db.session.execute(update(PdfJob).where(PdfJob.id == retried)
+                       .values(status='running', attempts=1, started_at=long_ago))
+    db.session.execute(update(PdfJob).where(PdfJob.id == exhausted)
+                       .values(status='running', attempts=2, started_at=long_ago))
+    db.session.commit()
+
+    assert recover_stale_jobs(timeout=300, max_attempts=2) == 2
+    assert _job(retried).status == 'queued'
+    assert _job(exhausted).status == 'failed'
+    assert _job(exhausted).error == 'Render timed out or worker exited'
+    # Jobs that are still within the timeout are left alone
+    assert recover_stale_jobs(timeout=300, max_attempts=2) == 0
+
+
+def test_status_and_file_follow_the_job(app, client, resume_id):
+    assert client.get(f'/resume/download/{resume_id}/status').status_code == 404
+
+    response = client.get(f'/resume/download/{resume_id}?async=1')
+    assert response.status_code == 202
+    job = response.get_json()
+    assert job['status'] == 'queued'
+    assert 'file_url' not in job
+
+    assert client.get(job['status_url']).get_json()['status'] == 'queued'
+    assert client.get(f'/resume/download/{resume_id}/file').status_code == 409
+
+    run_worker(app, once=True, poll_interval=0.05)
+
+    status = client.get(job['status_url']).get_json()
+    assert status['status'] == 'done'
+    response = client.get(status['file_url'])
+    assert response.status_code == 200
+    assert response.mimetype == 'application/pdf'
+    assert response.get_data() == b'%PDF-1.4 test'
@@ -0,0 +1,54 @@
+"""SQL statements per request on the hot routes.
+
+A change in these numbers is usually a lazy load that slipped back into
+a template or an N+1 loop; if the new count is intended, update it here.
+"""
+import threading
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+from website.models import db
+
+EXPECTED = {
+    # Stamp lookup, then the resume and its five sections in one selectin each
+    'view': ('/resume/view/{id}', 7),
+    # The same snapshot, plus the download_count bump
+    'download': ('/resume/download/{id}', 7),
+    # Resumes with personal info joined, and the bulk statistics
+    'manage': ('/resume/manage', 2),
+    'export-json': ('/resume/export-json/{id}', 6),
+    'stats': ('/resume/stats/{id}', 1),
+}
+
+pytestmark = pytest.mark.usefixtures('fake_renderer')
+
+
+@contextmanager
+def count_statements(app):
+    """Collect the statements run on this thread; the analytics flusher has its own"""
+    statements = []
+    thread = threading.get_ident()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == thread:
+            statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+@pytest.mark.parametrize('route', EXPECTED)
+def test_route_query_count(app, client, resume_id, route):
+    url, expected = EXPECTED[route]
+    url = url.format(id=resume_id)
+    # The first request warms the user cache, the PDF cache and the compiled templates
+    assert client.get(url).status_code == 200
+    for _ in range(2):
+        with count_statements(app) as statements:
+            assert client.get(url).status_code == 200
+        assert len(statements) == expected, '\n'.join(statements)
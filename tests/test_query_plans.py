@@ -0,0 +1,25 @@
+"""The hot queries must be served by an index on the migrated schema"""
+import pytest
+from sqlalchemy import text
+from website.models import db
+from website.query_plans import check_query_plans, plan_checks
+
+
+@pytest.fixture
+def plans(app):
+    with app.app_context():
+        yield {description: (ok, lines) for description, ok, lines in check_query_plans()}
+
+
+@pytest.mark.parametrize('description', [description for description, _, _ in plan_checks()])
+def test_query_uses_an_index(plans, description):
+    ok, lines = plans[description]
+    assert ok, '\n'.join(lines)
+
+
+def test_missing_index_is_reported(app):
+    with app.app_context():
+        db.session.execute(text('DROP INDEX ix_resume_user_id'))
+        db.session.commit()
+        results = {description: ok for description, ok, _ in check_query_plans()}
+    assert results['manage page: resumes of a user'] is False
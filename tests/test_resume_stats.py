@@ -0,0 +1,39 @@
+"""Repairing the denormalized completeness counters"""
+from sqlalchemy import delete, select, update
+from website.models import db, Resume, Skill
+from website.resume_stats import STAT_COLUMNS, reconcile_resume_stats
+
+
+def _stats(resume_id):
+    db.session.expire_all()
+    return db.session.execute(select(Resume.updated_at, *STAT_COLUMNS).where(Resume.id == resume_id)).one()
+
+
+def test_drifted_counters_are_repaired(app, client, resume_id):
+    other_id = int(client.post('/home', data={'full_name': 'Alice', 'resume_email': 'alice@example.com',
+                                              'phone': '555-0100', 'summary': 'Second',
+                                              'template': 'classic'}).location.rsplit('/', 1)[1])
+    with app.app_context():
+        saved = _stats(resume_id)
+        untouched = _stats(other_id)
+
+        # Counters written by something that bypassed the save path
+        db.session.execute(update(Resume).where(Resume.id == resume_id).values(
+            skill_count=0, education_count=7, completion_percentage=100, updated_at=saved.updated_at))
+        db.session.commit()
+        assert reconcile_resume_stats(batch_size=1, dry_run=True) == (2, 1)
+        assert _stats(resume_id).education_count == 7
+
+        assert reconcile_resume_stats(batch_size=1) == (2, 1)
+        assert _stats(resume_id) == saved
+        assert _stats(other_id) == untouched
+
+        # Rows removed behind the counters' back
+        db.session.execute(delete(Skill).where(Skill.resume_id == resume_id))
+        db.session.commit()
+        assert reconcile_resume_stats() == (2, 1)
+        repaired = _stats(resume_id)
+        assert repaired.skill_count == 0
+        assert repaired.completion_percentage < saved.completion_percentage
+        assert repaired.updated_at == saved.updated_at
+        assert reconcile_resume_stats() == (2, 0)
@@ -0,0 +1,79 @@
+"""Saving a resume reconciles its list sections row by row"""
+from sqlalchemy import select
+from website.models import db, Education, Resume, Skill
+from website.section_sync import SECTIONS, save_stats
+from conftest import RESUME_FORM
+
+
+def _rows(app, model, resume_id):
+    with app.app_context():
+        return db.session.execute(
+            select(model).where(model.resume_id == resume_id).order_by(model.id)
+        ).scalars().all()
+
+
+def _form(app, resume_id, **changes):
+    """RESUME_FORM with the stored row ids filled in, as the edit page renders it"""
+    form = dict(RESUME_FORM)
+    for section in SECTIONS:
+        form[section['id_field']] = [str(row.id) for row in _rows(app, section['model'], resume_id)]
+    form.update(changes)
+    return form
+
+
+def test_unchanged_resubmit_writes_no_rows(app, client, resume_id):
+    education = [(row.id, row.degree) for row in _rows(app, Education, resume_id)]
+    touched = save_stats['rows_touched']
+    updated = save_stats['rows_updated']
+
+    client.post(f'/Resume/{resume_id}', data=_form(app, resume_id))
+
+    assert [(row.id, row.degree) for row in _rows(app, Education, resume_id)] == education
+    assert save_stats['rows_touched'] == touched
+    assert save_stats['rows_updated'] == updated
+
+
+def test_edited_rows_keep_their_ids_and_removed_rows_go(app, client, resume_id):
+    bsc, msc = _rows(app, Education, resume_id)
+    python, sql = _rows(app, Skill, resume_id)
+
+    # Drop the BSc, edit the MSc, add a new first row; drop SQL and add Go
+    form = _form(app, resume_id, **{
+        'edu_id[]': ['', str(msc.id)], 'degree[]': ['PhD', 'MSc (Hons)'], 'institution[]': ['U3', 'U2'],
+        'start_year[]': ['2016', '2014'], 'end_year[]': ['2020', '2016'], 'edu_description[]': ['', ''],
+        'skill_id[]': [str(python.id), ''], 'skill_name[]': ['Python', 'Go'],
+        'skill_level[]': ['advanced', 'beginner'],
+    })
+    assert client.post(f'/Resume/{resume_id}', data=form).status_code == 302
+
+    education = {row.id: row.degree for row in _rows(app, Education, resume_id)}
+    assert education[msc.id] == 'MSc (Hons)'
+    assert bsc.id not in education
+    assert sorted(education.values()) == ['MSc (Hons)', 'PhD']
+    skills = {row.id: row.name for row in _rows(app, Skill, resume_id)}
+    assert skills[python.id] == 'Python'
+    assert sql.id not in skills
+    assert sorted(skills.values()) == ['Go', 'Python']
+
+    with app.app_context():
+        resume = db.session.get(Resume, resume_id)
+        assert (resume.education_count, resume.skill_count) == (2, 2)
+
+
+def test_foreign_row_ids_are_inserted_not_updated(app, client, resume_id):
+    client.get('/logout')
+    client.post('/Sign-Up', data={'name': 'Bob', 'email': 'bob@example.com',
+                                  'password1': 'Passw0rd!', 'password2': 'Passw0rd!'})
+    response = client.post('/home', data={'full_name': 'Bob', 'resume_email': 'bob@example.com',
+                                          'phone': '555-0101', 'summary': 'Mallory', 'template': 'modern'})
+    bobs_resume = int(response.location.rsplit('/', 1)[1])
+    alices_rows = _rows(app, Education, resume_id)
+
+    form = _form(app, bobs_resume, **{'edu_id[]': [str(row.id) for row in alices_rows]})
+    assert client.post(f'/Resume/{bobs_resume}', data=form).status_code == 302
+
+    assert [(row.id, row.degree) for row in _rows(app, Education, resume_id)] == \
+        [(row.id, row.degree) for row in alices_rows]
+    bobs_rows = _rows(app, Education, bobs_resume)
+    assert [row.degree for row in bobs_rows] == ['BSc', 'MSc']
+    assert {row.id for row in bobs_rows}.isdisjoint(row.id for row in alices_rows)
@@ -0,0 +1,120 @@
+"""One contract for every storage backend: local disk, memory and S3 (through moto)"""
+import io
+from urllib.parse import parse_qs, urlparse
+import pytest
+from website.storage import LocalStorage, MemoryStorage, S3Storage, StorageError
+
+BUCKET = 'resume-builder-test'
+
+
+@pytest.fixture
+def s3_storage(monkeypatch):
+    moto = pytest.importorskip('moto')
+    boto3 = pytest.importorskip('boto3')
+    for name, value in {'AWS_ACCESS_KEY_ID': 'testing', 'AWS_SECRET_ACCESS_KEY': 'testing',
+                        'AWS_DEFAULT_REGION': 'us-east-1'}.items():
+        monkeypatch.setenv(name, value)
+    with moto.mock_aws():
+        boto3.client('s3', region_name='us-east-1').create_bucket(Bucket=BUCKET)
+        yield S3Storage(BUCKET, prefix='pdfs/', region='us-east-1', presign_ttl=60,
+                        public_url='https://cdn.example.com/')
+
+
+@pytest.fixture(params=['local', 'memory', 's3'])
+def store(request, tmp_path):
+    if request.param == 'local':
+        return LocalStorage(str(tmp_path / 'files'), static_prefix='uploads/')
+    if request.param == 'memory':
+        return MemoryStorage()
+    return request.getfixturevalue('s3_storage')
+
+
+def test_save_read_open(store):
+    assert store.save('a.pdf', b'%PDF-1.4 one') == 'a.pdf'
+    assert store.exists('a.pdf')
+    assert store.read('a.pdf') == b'%PDF-1.4 one'
+    with store.open('a.pdf') as f:
+        assert f.read() == b'%PDF-1.4 one'
+
+    # Streams are accepted too, and a second save replaces the content
+    store.save('a.pdf', io.BytesIO(b'%PDF-1.4 two'))
+    assert store.read('a.pdf') == b'%PDF-1.4 two'
+
+
+def test_missing_names(store):
+    assert not store.exists('missing.pdf')
+    with pytest.raises(FileNotFoundError):
+        store.read('missing.pdf')
+    with pytest.raises(FileNotFoundError):
+        store.open('missing.pdf')
+    # Deleting what is not there is not an error
+    store.delete('missing.pdf')
+
+
+def test_delete(store):
+    store.save('a.pdf', b'data')
+    store.delete('a.pdf')
+    assert not store.exists('a.pdf')
+    with pytest.raises(FileNotFoundError):
+        store.read('a.pdf')
+
+
+def test_list_and_touch(store):
+    store.save('resume_1.pdf', b'12345')
+    store.save('resume_2.pdf', b'123')
+    store.save('other.txt', b'x')
+    listed = {name: size for name, size, _ in store.list('resume_')}
+    assert listed == {'resume_1.pdf': 5, 'resume_2.pdf': 3}
+    assert store.touch('resume_1.pdf')
+    assert not store.touch('missing.pdf')
+
+
+def test_url(store, app):
+    store.save('a.pdf', b'data')
+    with app.test_request_context():
+        url = store.url('a.pdf')
+    if isinstance(store, LocalStorage):
+        assert url == '/static/uploads/a.pdf'
+    elif isinstance(store, S3Storage):
+        assert url == 'https://cdn.example.com/pdfs/a.pdf'
+    else:
+        assert url is None
+
+
+def test_send(store, app):
+    store.save('a.pdf', b'%PDF-1.4 data')
+    with app.test_request_context():
+        response = store.send('a.pdf', mimetype='application/pdf', as_attachment=True,
+                              download_name='Alice.pdf')
+        with pytest.raises(FileNotFoundError):
+            store.send('missing.pdf')
+
+    if isinstance(store, S3Storage):
+        # The bytes never pass through the worker: the client is sent to a presigned URL
+        assert response.status_code == 302
+        location = urlparse(response.location)
+        query = parse_qs(location.query)
+        assert location.path.endswith('/pdfs/a.pdf')
+        assert 'Signature' in query or 'X-Amz-Signature' in query
+        assert query['response-content-disposition'] == ['attachment; filename="Alice.pdf"']
+        assert query['response-content-type'] == ['application/pdf']
+        requests = pytest.importorskip('requests')
+        fetched = requests.get(response.location)
+        assert fetched.status_code == 200
+        assert fetched.content == b'%PDF-1.4 data'
+        return
+
+    response.direct_passthrough = False
+    assert response.status_code == 200
+    assert response.mimetype == 'application/pdf'
+    assert 'Alice.pdf' in response.headers['Content-Disposition']
+    assert response.get_data() == b'%PDF-1.4 data'
+    response.close()
+
+
+def test_local_storage_refuses_paths_outside_its_root(tmp_path):
+    store = LocalStorage(str(tmp_path / 'files'))
+    assert not store.exists('../escape.pdf')
+    with pytest.raises(StorageError):
+        store.save('../escape.pdf', b'data')
+    assert not (tmp_path / 'escape.pdf').exists()
@@ -0,0 +1,108 @@
+"""Profile picture uploads: limits enforced while parsing, and content-hash storage"""
+import io
+import pytest
+from PIL import Image
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+from website.image_service import DEFAULT_PICTURE, UploadStream, thumb_name
+from website.models import db, PersonalInfo
+from website.storage import storage
+from conftest import RESUME_FORM
+
+
+def _png(size=(64, 48), color=(200, 30, 30)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def _upload(client, resume_id, data, filename='me.png', content_type='image/png'):
+    form = dict(RESUME_FORM, profile_pic=(io.BytesIO(data), filename, content_type))
+    return client.post(f'/Resume/{resume_id}', data=form, content_type='multipart/form-data',
+                       headers={'Referer': f'/Resume/{resume_id}'})
+
+
+def _profile_pic(app, resume_id):
+    with app.app_context():
+        return db.session.execute(
+            db.select(PersonalInfo.profile_pic).where(PersonalInfo.resume_id == resume_id)
+        ).scalar_one()
+
+
+def _last_flash(client):
+    with client.session_transaction() as session:
+        return session['_flashes'][-1][1]
+
+
+def _resume(client):
+    client.post('/Sign-Up', data={'name': 'Erin', 'email': 'erin@example.com',
+                                  'password1': 'Passw0rd!', 'password2': 'Passw0rd!'})
+    response = client.post('/home', data={'full_name': 'Erin', 'resume_email': 'erin@example.com',
+                                          'phone': '555-0102', 'summary': 'Designer', 'template': 'modern'})
+    return int(response.location.rsplit('/', 1)[1])
+
+
+def test_stream_rejects_oversized_and_unknown_files():
+    stream = UploadStream(max_bytes=1024, spool_bytes=256)
+    stream.write(_png()[:64])
+    with pytest.raises(RequestEntityTooLarge) as error:
+        stream.write(b'\0' * 1024)
+    assert error.value.code == 413
+
+    stream = UploadStream(max_bytes=1024, spool_bytes=256)
+    with pytest.raises(UnsupportedMediaType) as error:
+        stream.write(b'MZ' + b'\0' * 62)
+    assert error.value.code == 415
+
+
+@pytest.fixture
+def small_limit(make_app):
+    return make_app(UPLOAD_MAX_FILE_MB=1)
+
+
+@pytest.mark.parametrize('data, content_type, message', [
+    # Over the per-file limit but under MAX_CONTENT_LENGTH, so it is cut off while parsing
+    (_png()[:64] + b'\0' * (1536 * 1024), 'image/png', 'Profile pictures are limited to 1 MB.'),
+    # Over MAX_CONTENT_LENGTH, refused before the body is read
+    (_png()[:64] + b'\0' * (3 * 1024 * 1024), 'image/png', 'The data value transmitted exceeds the capacity limit.'),
+    (b'%PDF-1.4' + b'\0' * 1024, 'image/png', 'The uploaded file is not a JPEG, PNG, WebP or GIF image.'),
+    (_png(), 'application/octet-stream', 'Only image uploads are accepted.'),
+], ids=['over-file-limit', 'over-content-length', 'bad-signature', 'bad-content-type'])
+def test_rejected_upload_changes_nothing(small_limit, data, content_type, message):
+    app = small_limit
+    client = app.test_client()
+    resume_id = _resume(client)
+
+    response = _upload(client, resume_id, data, content_type=content_type)
+
+    assert response.status_code == 302
+    assert response.location.endswith(f'/Resume/{resume_id}')
+    assert _last_flash(client) == message
+    assert _profile_pic(app, resume_id) == DEFAULT_PICTURE
+
+
+def test_identical_uploads_share_files_until_unreferenced(app, client, resume_id):
+    other_id = int(client.post('/home', data={'full_name': 'Alice', 'resume_email': 'alice@example.com',
+                                              'phone': '555-0100', 'summary': 'Second',
+                                              'template': 'classic'}).location.rsplit('/', 1)[1])
+    red, blue = _png(color=(200, 30, 30)), _png(color=(30, 30, 200))
+
+    _upload(client, resume_id, red, filename='red.png')
+    _upload(client, other_id, red, filename='copy-of-red.png')
+    shared = _profile_pic(app, resume_id)
+    assert shared.startswith('img_')
+    assert _profile_pic(app, other_id) == shared
+    assert _stored_images() == {shared, thumb_name(shared)}
+
+    # Still referenced by the other resume, so the shared files stay
+    _upload(client, resume_id, blue)
+    replacement = _profile_pic(app, resume_id)
+    assert replacement != shared
+    assert _stored_images() == {shared, thumb_name(shared), replacement, thumb_name(replacement)}
+
+    _upload(client, other_id, blue)
+    assert _profile_pic(app, other_id) == replacement
+    assert _stored_images() == {replacement, thumb_name(replacement)}
+
+
+def _stored_images():
+    return {name for name, _, _ in storage.uploads.list('img_')}
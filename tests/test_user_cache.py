@@ -0,0 +1,21 @@
+"""User cache invalidation through the session and mapper events"""
+from website.models import db, User
+from website.user_cache import user_cache
+
+
+def test_listeners_fire_once_however_many_apps_exist(make_app, monkeypatch):
+    app = make_app()
+    make_app()
+    calls = []
+    with app.app_context():
+        user = User(username='carol', email='carol@example.com', password='x')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+        monkeypatch.setattr(user_cache, 'invalidate', calls.append)
+        user.username = 'caroline'
+        db.session.commit()
+
+    # Once when the row is flushed and once after the commit, not once per app
+    assert calls == [user_id, user_id]
@@ -1,12 +1,35 @@
 from flask import Flask
+from werkzeug.middleware.proxy_fix import ProxyFix
 from flask_sqlalchemy import SQLAlchemy
+from flask_migrate import Migrate
 from os import path, environ
 from flask_login import LoginManager
-from .email_service import init_email
 
 app = Flask(__name__)
 
 db = SQLAlchemy()
+# Migrations live next to the package, whatever directory the app is started from
+migrate = Migrate(directory=path.join(path.dirname(path.dirname(path.abspath(__file__))), 'migrations'))
+
+from .database import engine_options, init_database, normalize_database_url
+from .email_service import init_email
+from .analytics_service import init_analytics
+from .analytics_rollup import init_analytics_rollup
+from .pdf_service import init_pdf
+from .storage import init_storage
+from .pdf_cache import init_pdf_cache
+from .pdf_worker import init_pdf_worker
+from .pdf_compare import init_pdf_compare
+from .bulk_export import init_bulk_export
+from .search_service import init_search
+from .image_service import init_images
+from .template_cache import init_template_cache
+from .resume_stats import init_resume_stats
+from .query_plans import init_query_plans
+from .user_cache import init_user_cache
+from .auth_service import init_auth_service
+from .metrics import init_metrics
+from .seed_data import init_seed_data
 
 def create_app():
     app = Flask(__name__)
@@ -14,27 +37,146 @@ def create_app():
 
     database_url = environ.get('DATABASE_URL')
     if database_url:
-        app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+        app.config['SQLALCHEMY_DATABASE_URI'] = normalize_database_url(database_url)
     else:
         app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///ResumeBuilder.db'
 
+    # Connection pool, per worker process: workers x (size + overflow) must fit the server's max_connections
+    app.config['DB_POOL_SIZE'] = int(environ.get('DB_POOL_SIZE', 5))
+    app.config['DB_MAX_OVERFLOW'] = int(environ.get('DB_MAX_OVERFLOW', 5))
+    app.config['DB_POOL_TIMEOUT'] = int(environ.get('DB_POOL_TIMEOUT', 10))
+    app.config['DB_POOL_RECYCLE'] = int(environ.get('DB_POOL_RECYCLE', 1800))
+    app.config['DB_CONNECT_TIMEOUT'] = int(environ.get('DB_CONNECT_TIMEOUT', 5))
+    app.config['DB_STATEMENT_TIMEOUT_MS'] = int(environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))
+    app.config['DB_LOCK_TIMEOUT_MS'] = int(environ.get('DB_LOCK_TIMEOUT_MS', 5000))
+    app.config['DB_APPLICATION_NAME'] = environ.get('DB_APPLICATION_NAME', 'resume-builder')
+    app.config['DB_SLOW_CHECKOUT_MS'] = int(environ.get('DB_SLOW_CHECKOUT_MS', 100))
+    # SQLite: WAL journal, synchronous=NORMAL and a busy timeout instead of immediate "database is locked"
+    app.config['DB_SQLITE_WAL'] = environ.get('DB_SQLITE_WAL', 'true').lower() == 'true'
+    app.config['DB_BUSY_TIMEOUT_MS'] = int(environ.get('DB_BUSY_TIMEOUT_MS', 5000))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'], app.config)
+    # Bearer token for /health/* and /metrics; without it they 404 unless debugging or testing
+    app.config['MONITORING_TOKEN'] = environ.get('MONITORING_TOKEN')
+    # Apply pending migrations on startup; turn off where a release step runs `flask db upgrade`
+    app.config['DB_AUTO_UPGRADE'] = environ.get('DB_AUTO_UPGRADE', 'true').lower() == 'true'
+
+    # Users are loaded on every authenticated request; cache them per worker for a short TTL
+    app.config['USER_CACHE_TTL'] = int(environ.get('USER_CACHE_TTL', 60))
+    app.config['USER_CACHE_MAX_ENTRIES'] = int(environ.get('USER_CACHE_MAX_ENTRIES', 10000))
+    # Serve GET pages from the user fields kept in the signed session cookie, re-checked after max age
+    app.config['USER_SESSION_IDENTITY'] = environ.get('USER_SESSION_IDENTITY', 'false').lower() == 'true'
+    app.config['USER_SESSION_IDENTITY_MAX_AGE'] = int(environ.get('USER_SESSION_IDENTITY_MAX_AGE', 300))
+
+    # Password hashing runs on its own small pool; queue_factor x workers requests may wait for it
+    app.config['AUTH_KDF_WORKERS'] = int(environ.get('AUTH_KDF_WORKERS', 2))
+    app.config['AUTH_KDF_QUEUE_FACTOR'] = int(environ.get('AUTH_KDF_QUEUE_FACTOR', 4))
+    app.config['AUTH_KDF_QUEUE_TIMEOUT'] = float(environ.get('AUTH_KDF_QUEUE_TIMEOUT', 5))
+    # Hashes stored with other parameters are upgraded on the next successful login
+    app.config['AUTH_PASSWORD_METHOD'] = environ.get('AUTH_PASSWORD_METHOD', 'pbkdf2')
+    app.config['AUTH_IP_BURST'] = int(environ.get('AUTH_IP_BURST', 20))
+    app.config['AUTH_IP_PER_MINUTE'] = float(environ.get('AUTH_IP_PER_MINUTE', 10))
+    app.config['AUTH_ACCOUNT_BURST'] = int(environ.get('AUTH_ACCOUNT_BURST', 10))
+    app.config['AUTH_ACCOUNT_PER_MINUTE'] = float(environ.get('AUTH_ACCOUNT_PER_MINUTE', 5))
+    # Proxies in front of the app (1 on Heroku) whose X-Forwarded-For is trusted for the client IP
+    app.config['PROXY_FIX_X_FOR'] = int(environ.get('PROXY_FIX_X_FOR', 0))
+
+    # Prometheus /metrics (behind MONITORING_TOKEN) and slow request/query logging
+    app.config['METRICS_ENABLED'] = environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    app.config['SLOW_REQUEST_MS'] = int(environ.get('SLOW_REQUEST_MS', 1000))
+    app.config['SLOW_REQUEST_QUERIES'] = int(environ.get('SLOW_REQUEST_QUERIES', 10))
+    app.config['SLOW_QUERY_MS'] = int(environ.get('SLOW_QUERY_MS', 500))
+
     app.config['MAIL_SERVER'] = environ.get('MAIL_SERVER', 'smtp.gmail.com')
     app.config['MAIL_PORT'] = int(environ.get('MAIL_PORT', 587))
     app.config['MAIL_USE_TLS'] = environ.get('MAIL_USE_TLS', True)
     app.config['MAIL_USERNAME'] = environ.get('MAIL_USERNAME')
     app.config['MAIL_PASSWORD'] = environ.get('MAIL_PASSWORD')
     app.config['MAIL_DEFAULT_SENDER'] = environ.get('MAIL_DEFAULT_SENDER', 'noreply@resumebuilder.com')
+    app.config['MAIL_OUTBOX_IN_PROCESS'] = environ.get('MAIL_OUTBOX_IN_PROCESS', 'true').lower() == 'true'
+    app.config['MAIL_OUTBOX_BATCH_SIZE'] = int(environ.get('MAIL_OUTBOX_BATCH_SIZE', 50))
+    app.config['MAIL_OUTBOX_POLL_INTERVAL'] = float(environ.get('MAIL_OUTBOX_POLL_INTERVAL', 5.0))
+    app.config['MAIL_OUTBOX_MAX_ATTEMPTS'] = int(environ.get('MAIL_OUTBOX_MAX_ATTEMPTS', 5))
+    app.config['MAIL_OUTBOX_RETRY_DELAY'] = int(environ.get('MAIL_OUTBOX_RETRY_DELAY', 30))
+
+    app.config['PDF_ENGINE'] = environ.get('PDF_ENGINE', 'playwright')
+    app.config['PDF_ENGINE_BY_STYLE'] = environ.get('PDF_ENGINE_BY_STYLE', '')
+    app.config['PDF_POOL_SIZE'] = int(environ.get('PDF_POOL_SIZE', 2))
+    app.config['PDF_PAGE_MAX_USES'] = int(environ.get('PDF_PAGE_MAX_USES', 50))
+    app.config['PDF_RENDER_TIMEOUT'] = int(environ.get('PDF_RENDER_TIMEOUT', 60))
+    app.config['PDF_CACHE_DIR'] = environ.get('PDF_CACHE_DIR')
+    app.config['PDF_CACHE_MAX_BYTES'] = int(environ.get('PDF_CACHE_MAX_MB', 200)) * 1024 * 1024
+    # Seconds between full listings of the pdf store; other workers' writes are only seen then
+    app.config['PDF_CACHE_SCAN_INTERVAL'] = int(environ.get('PDF_CACHE_SCAN_INTERVAL', 60))
+    app.config['PDF_ASYNC_DOWNLOADS'] = environ.get('PDF_ASYNC_DOWNLOADS', 'false').lower() == 'true'
+    app.config['PDF_WORKER_CONCURRENCY'] = int(environ.get('PDF_WORKER_CONCURRENCY', 2))
+    app.config['PDF_WORKER_PER_USER'] = int(environ.get('PDF_WORKER_PER_USER', 1))
+    app.config['PDF_JOB_MAX_ATTEMPTS'] = int(environ.get('PDF_JOB_MAX_ATTEMPTS', 3))
+    app.config['PDF_JOB_RETRY_DELAY'] = int(environ.get('PDF_JOB_RETRY_DELAY', 5))
+    app.config['PDF_JOB_TIMEOUT'] = int(environ.get('PDF_JOB_TIMEOUT', 300))
+    app.config['PDF_EXPORT_CONCURRENCY'] = int(environ.get('PDF_EXPORT_CONCURRENCY', 2))
+    app.config['PDF_EXPORT_MAX_RESUMES'] = int(environ.get('PDF_EXPORT_MAX_RESUMES', 200))
+
+    # Compiled template bytecode and rendered resume fragments
+    app.config['TEMPLATE_BYTECODE_DIR'] = environ.get('TEMPLATE_BYTECODE_DIR')
+    app.config['FRAGMENT_CACHE_MAX_BYTES'] = int(environ.get('FRAGMENT_CACHE_MAX_MB', 32)) * 1024 * 1024
+    # Set per deploy (e.g. the git sha) to invalidate cached pages when code changes
+    app.config['BUILD_ID'] = environ.get('BUILD_ID')
+
+    # Where pictures and generated PDFs live: local, memory or s3
+    app.config['STORAGE_BACKEND'] = environ.get('STORAGE_BACKEND', 'local')
+    app.config['STORAGE_ACCEL_PREFIX'] = environ.get('STORAGE_ACCEL_PREFIX')
+    app.config['USE_X_SENDFILE'] = environ.get('USE_X_SENDFILE', 'false').lower() == 'true'
+    app.config['STORAGE_S3_BUCKET'] = environ.get('STORAGE_S3_BUCKET')
+    app.config['STORAGE_S3_ENDPOINT_URL'] = environ.get('STORAGE_S3_ENDPOINT_URL')
+    app.config['STORAGE_S3_REGION'] = environ.get('STORAGE_S3_REGION')
+    app.config['STORAGE_S3_PUBLIC_URL'] = environ.get('STORAGE_S3_PUBLIC_URL')
+    app.config['STORAGE_PRESIGN_TTL'] = int(environ.get('STORAGE_PRESIGN_TTL', 300))
+
+    # Uploads stream through image_service.UploadStream; bodies over the
+    # request limit are refused from Content-Length before any is read
+    app.config['UPLOAD_MAX_FILE_BYTES'] = int(environ.get('UPLOAD_MAX_FILE_MB', 5)) * 1024 * 1024
+    app.config['UPLOAD_SPOOL_BYTES'] = int(environ.get('UPLOAD_SPOOL_KB', 256)) * 1024
+    app.config['MAX_CONTENT_LENGTH'] = app.config['UPLOAD_MAX_FILE_BYTES'] + 1024 * 1024
+    app.config['MAX_FORM_MEMORY_SIZE'] = 512 * 1024
+
+    app.config['ANALYTICS_BUFFERED'] = environ.get('ANALYTICS_BUFFERED', 'true').lower() == 'true'
+    app.config['ANALYTICS_BUFFER_SIZE'] = int(environ.get('ANALYTICS_BUFFER_SIZE', 10000))
+    app.config['ANALYTICS_BATCH_SIZE'] = int(environ.get('ANALYTICS_BATCH_SIZE', 500))
+    app.config['ANALYTICS_FLUSH_INTERVAL'] = float(environ.get('ANALYTICS_FLUSH_INTERVAL', 2.0))
+    app.config['ANALYTICS_RETENTION_DAYS'] = int(environ.get('ANALYTICS_RETENTION_DAYS', 90))
+    app.config['ANALYTICS_HOURLY_RETENTION_DAYS'] = int(environ.get('ANALYTICS_HOURLY_RETENTION_DAYS', 45))
+    app.config['ANALYTICS_ROLLUP_BATCH_SIZE'] = int(environ.get('ANALYTICS_ROLLUP_BATCH_SIZE', 50000))
+
+    if app.config['PROXY_FIX_X_FOR']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'], x_proto=1)
 
     db.init_app(app)
+    migrate.init_app(app, db, render_as_batch=True)
+    # First, so request timings include the connection checkout in init_database
+    init_metrics(app)
+    init_database(app)
     init_email(app)
+    init_analytics(app)
+    init_analytics_rollup(app)
+    init_template_cache(app)
+    init_pdf(app)
+    init_storage(app)
+    init_pdf_cache(app)
+    init_pdf_worker(app)
+    init_pdf_compare(app)
+    init_bulk_export(app)
+    init_search(app)
+    init_images(app)
+    init_resume_stats(app)
+    init_query_plans(app)
+    init_seed_data(app)
 
     login_manager = LoginManager()
     login_manager.login_view = 'auth.login'
     login_manager.init_app(app)
 
-    @login_manager.user_loader
-    def load_user(id):
-        return User.query.get(int(id))
+    init_user_cache(app, login_manager)
+    init_auth_service(app)
 
     from .views import views
     from .auth import auth
@@ -47,7 +189,23 @@ def create_app():
 
 from .models import *
 
+# Schema of the first release, which created its tables with db.create_all()
+BASELINE_REVISION = '0001'
+
+
+def upgrade_database():
+    """Apply pending migrations, adopting a database that predates them at the baseline"""
+    from flask_migrate import stamp, upgrade
+    from sqlalchemy import inspect
+
+    tables = set(inspect(db.engine).get_table_names())
+    if 'user' in tables and 'alembic_version' not in tables:
+        stamp(revision=BASELINE_REVISION)
+    upgrade()
+
+
 def create_database(app):
     with app.app_context():
-        db.create_all()
+        if app.config['DB_AUTO_UPGRADE']:
+            upgrade_database()
         print('Database initialized')
@@ -0,0 +1,261 @@
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+import click
+from sqlalchemy import and_, delete, func, or_, select, text
+from .models import db, Resume, ResumeAnalytic, ResumeAnalyticRollup, AnalyticsRollupState
+
+ROLLUP_STATE_NAME = 'resume_analytic'
+GRANULARITIES = ('hour', 'day')
+UPSERT_CHUNK = 500
+
+
+def _dialect():
+    return db.engine.dialect.name
+
+
+def _insert():
+    if _dialect() == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def _bucket(granularity):
+    column = ResumeAnalytic.created_at
+    if _dialect() == 'postgresql':
+        return func.date_trunc(granularity, column)
+    fmt = '%Y-%m-%d %H:00:00' if granularity == 'hour' else '%Y-%m-%d 00:00:00'
+    return func.strftime(fmt, column)
+
+
+def _as_datetime(value):
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+
+def get_watermark():
+    """Id of the newest raw event already folded into the rollups"""
+    state = db.session.get(AnalyticsRollupState, ROLLUP_STATE_NAME)
+    return state.last_event_id if state else 0
+
+
+def _lock_state():
+    state = db.session.execute(
+        select(AnalyticsRollupState)
+        .where(AnalyticsRollupState.name == ROLLUP_STATE_NAME)
+        .with_for_update()
+    ).scalar_one_or_none()
+    if state is None:
+        # Two first runs may race to create the row; the loser's insert does nothing
+        db.session.execute(
+            _insert()(AnalyticsRollupState)
+            .values(name=ROLLUP_STATE_NAME, last_event_id=0, updated_at=datetime.utcnow())
+            .on_conflict_do_nothing(index_elements=['name'])
+        )
+        state = db.session.execute(
+            select(AnalyticsRollupState)
+            .where(AnalyticsRollupState.name == ROLLUP_STATE_NAME)
+            .with_for_update()
+        ).scalar_one()
+    return state
+
+
+def _commit_horizon():
+    """Highest event id whose writers have all finished, or None when every visible id is settled.
+
+    SQLite has one writer at a time, so an id is only visible once every
+    lower id has been committed or rolled back. PostgreSQL hands ids out
+    at insert time and transactions commit in any order, so an EventBuffer
+    batch still in flight can hold ids below rows that are already visible.
+    Each run remembers the newest visible id with the snapshot's xmax; once
+    the oldest running transaction is past that xmax, every transaction
+    that could hold a lower id is finished and the remembered id is safe.
+    """
+    if _dialect() != 'postgresql':
+        return None
+    state = _lock_state()
+    horizon = state.last_event_id
+    snapshot = db.session.execute(text(
+        "SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint, "
+        "pg_snapshot_xmax(pg_current_snapshot())::text::bigint, "
+        "(SELECT MAX(id) FROM resume_analytic)"
+    )).one()
+    xmin, xmax, newest = snapshot
+    if state.pending_xmax is not None and xmin >= state.pending_xmax:
+        horizon = max(horizon, state.pending_event_id)
+        state.pending_xmax = None
+    if state.pending_xmax is None and newest is not None and newest > horizon:
+        state.pending_event_id = newest
+        state.pending_xmax = xmax
+    db.session.commit()
+    return horizon
+
+
+def _upsert_counts(rows):
+    insert = _insert()
+    for start in range(0, len(rows), UPSERT_CHUNK):
+        stmt = insert(ResumeAnalyticRollup).values(rows[start:start + UPSERT_CHUNK])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['granularity', 'bucket_start', 'resume_id', 'action'],
+            set_={'count': ResumeAnalyticRollup.count + stmt.excluded['count']}
+        )
+        db.session.execute(stmt)
+
+
+def roll_up_events(batch_size=50000):
+    """Fold new raw events into hourly and daily counters; returns how many were folded.
+
+    Works forward from the stored watermark in id ranges of batch_size,
+    each range in its own transaction together with the watermark update,
+    so a crash never double counts. On PostgreSQL the watermark stops at
+    the commit horizon, so events still being inserted are left for a
+    later run instead of being skipped for good.
+    """
+    folded = 0
+    horizon = _commit_horizon()
+    while True:
+        state = _lock_state()
+        pending = [ResumeAnalytic.id > state.last_event_id]
+        if horizon is not None:
+            pending.append(ResumeAnalytic.id <= horizon)
+        # Pruned or rolled back ranges leave gaps; start the window at the next id that exists
+        first = db.session.scalar(select(func.min(ResumeAnalytic.id)).where(*pending))
+        if first is None:
+            db.session.commit()
+            return folded
+        ready = db.session.scalar(
+            select(func.max(ResumeAnalytic.id)).where(*pending, ResumeAnalytic.id < first + batch_size)
+        )
+
+        id_range = and_(ResumeAnalytic.id > state.last_event_id, ResumeAnalytic.id <= ready)
+        for granularity in GRANULARITIES:
+            bucket = _bucket(granularity).label('bucket')
+            # Joining Resume skips events for resumes deleted before the rollup ran
+            grouped = db.session.execute(
+                select(Resume.user_id, ResumeAnalytic.resume_id, ResumeAnalytic.action, bucket, func.count())
+                .join(Resume, Resume.id == ResumeAnalytic.resume_id)
+                .where(id_range, ResumeAnalytic.action.isnot(None))
+                .group_by(Resume.user_id, ResumeAnalytic.resume_id, ResumeAnalytic.action, bucket)
+            ).all()
+            _upsert_counts([
+                {
+                    'user_id': user_id,
+                    'resume_id': resume_id,
+                    'action': action,
+                    'granularity': granularity,
+                    'bucket_start': _as_datetime(bucket_start),
+                    'count': count
+                }
+                for user_id, resume_id, action, bucket_start, count in grouped
+            ])
+
+        folded += db.session.scalar(select(func.count()).select_from(ResumeAnalytic).where(id_range))
+        state.last_event_id = ready
+        db.session.commit()
+
+
+def prune_events(retention_days, batch_size=5000):
+    """Delete raw events older than retention_days that are already rolled up"""
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    watermark = get_watermark()
+    deleted = 0
+    while True:
+        ids = db.session.scalars(
+            select(ResumeAnalytic.id)
+            .where(ResumeAnalytic.id <= watermark, ResumeAnalytic.created_at < cutoff)
+            .order_by(ResumeAnalytic.id)
+            .limit(batch_size)
+        ).all()
+        if not ids:
+            return deleted
+        db.session.execute(delete(ResumeAnalytic).where(ResumeAnalytic.id.in_(ids)))
+        db.session.commit()
+        deleted += len(ids)
+
+
+def prune_hourly_rollups(retention_days):
+    """Drop hourly buckets past retention; daily buckets are kept"""
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    result = db.session.execute(
+        delete(ResumeAnalyticRollup).where(
+            ResumeAnalyticRollup.granularity == 'hour',
+            ResumeAnalyticRollup.bucket_start < cutoff
+        )
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def rolled_up_counts(user_id, actions, since=None, resume_id=None):
+    """Count events per (resume_id, action) from the rollups plus the un-rolled tail.
+
+    With since, hourly buckets cover the partial first day and daily buckets
+    the rest, so the read touches at most ~24 + days rows per resume/action.
+    """
+    rollup = ResumeAnalyticRollup
+    conditions = [rollup.user_id == user_id, rollup.action.in_(actions)]
+    if resume_id is not None:
+        conditions.append(rollup.resume_id == resume_id)
+
+    if since is None:
+        conditions.append(rollup.granularity == 'day')
+    else:
+        start = since.replace(minute=0, second=0, microsecond=0)
+        first_midnight = start.replace(hour=0)
+        if first_midnight < start:
+            first_midnight += timedelta(days=1)
+        conditions.append(or_(
+            and_(rollup.granularity == 'hour', rollup.bucket_start >= start, rollup.bucket_start < first_midnight),
+            and_(rollup.granularity == 'day', rollup.bucket_start >= first_midnight)
+        ))
+
+    counts = Counter()
+    for row_resume_id, action, total in db.session.execute(
+        select(rollup.resume_id, rollup.action, func.sum(rollup.count))
+        .where(*conditions)
+        .group_by(rollup.resume_id, rollup.action)
+    ):
+        counts[(row_resume_id, action)] += total or 0
+
+    tail = [
+        ResumeAnalytic.id > get_watermark(),
+        ResumeAnalytic.user_id == user_id,
+        ResumeAnalytic.action.in_(actions)
+    ]
+    if resume_id is not None:
+        tail.append(ResumeAnalytic.resume_id == resume_id)
+    if since is not None:
+        tail.append(ResumeAnalytic.created_at >= since)
+    for row_resume_id, action, total in db.session.execute(
+        select(ResumeAnalytic.resume_id, ResumeAnalytic.action, func.count())
+        .where(*tail)
+        .group_by(ResumeAnalytic.resume_id, ResumeAnalytic.action)
+    ):
+        counts[(row_resume_id, action)] += total
+
+    return counts
+
+
+def run_maintenance(app, prune=True):
+    folded = roll_up_events(app.config['ANALYTICS_ROLLUP_BATCH_SIZE'])
+    pruned = hourly = 0
+    if prune:
+        pruned = prune_events(app.config['ANALYTICS_RETENTION_DAYS'])
+        hourly = prune_hourly_rollups(app.config['ANALYTICS_HOURLY_RETENTION_DAYS'])
+    return folded, pruned, hourly
+
+
+def init_analytics_rollup(app):
+    @app.cli.command('analytics-rollup')
+    @click.option('--no-prune', is_flag=True, help='Only roll up, keep raw events.')
+    @click.option('--interval', type=float, help='Repeat every N seconds instead of running once.')
+    def analytics_rollup_command(no_prune, interval):
+        """Roll analytics events into hourly/daily counters and prune old raw events."""
+        while True:
+            folded, pruned, hourly = run_maintenance(app, prune=not no_prune)
+            click.echo(f"Rolled up {folded} events, pruned {pruned} raw events and {hourly} hourly buckets")
+            if not interval:
+                break
+            db.session.remove()
+            time.sleep(interval)
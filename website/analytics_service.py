@@ -1,19 +1,180 @@
 from .models import db, ResumeAnalytic
-from datetime import datetime
+from datetime import datetime, timedelta
+from sqlalchemy import insert, select
+from .analytics_rollup import rolled_up_counts
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Tracked action -> key in the stats dicts
+STAT_ACTIONS = {'download': 'downloads', 'view': 'views'}
+
+class EventBuffer:
+    """Bounded in-process queue of analytics events, written in batches.
+
+    track_event only enqueues. A daemon thread per worker flushes when
+    batch_size events are waiting or flush_interval seconds have passed,
+    using one executemany INSERT on its own session. When the queue is full
+    new events are dropped and counted rather than blocking the request.
+    """
+
+    def __init__(self, max_size=10000, batch_size=500, flush_interval=2.0):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enabled = True
+        self.enqueued = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.failed = 0
+        self._app = None
+        self._queue = queue.Queue(maxsize=max_size)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def init_app(self, app):
+        self._app = app
+        self.enabled = app.config.get('ANALYTICS_BUFFERED', self.enabled)
+        self.max_size = app.config.get('ANALYTICS_BUFFER_SIZE', self.max_size)
+        self.batch_size = app.config.get('ANALYTICS_BATCH_SIZE', self.batch_size)
+        self.flush_interval = app.config.get('ANALYTICS_FLUSH_INTERVAL', self.flush_interval)
+        self._queue = queue.Queue(maxsize=self.max_size)
+        atexit.register(self.shutdown)
+
+    def put(self, event):
+        """Enqueue an event without blocking; returns False if it was dropped"""
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def flush(self):
+        """Write everything queued so far from the calling thread"""
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                return
+            self._write(batch)
+
+    def shutdown(self):
+        """Stop the flusher and write whatever is still queued"""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and self._pid == os.getpid():
+            thread.join(timeout=self.flush_interval + 5)
+        self._thread = None
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'queued': self._queue.qsize(),
+                'capacity': self.max_size,
+                'enqueued': self.enqueued,
+                'flushed': self.flushed,
+                'dropped': self.dropped,
+                'failed': self.failed,
+            }
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            # A forked worker inherits the attributes but not the thread
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._stop.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='analytics-flusher', daemon=True)
+            self._thread.start()
+
+    def _drain(self, limit):
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            deadline = time.monotonic() + self.flush_interval
+            while self._queue.qsize() < self.batch_size and not self._stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._stop.wait(min(remaining, 0.1))
+            batch = self._drain(self.batch_size)
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch):
+        with self._write_lock:
+            with self._app.app_context():
+                try:
+                    db.session.execute(insert(ResumeAnalytic), batch)
+                    db.session.commit()
+                    written = len(batch)
+                except Exception as e:
+                    # One bad row (e.g. a resume deleted meanwhile) should not lose the batch
+                    db.session.rollback()
+                    logger.warning(f"Error flushing {len(batch)} analytics events, retrying one by one: {e}")
+                    written = self._write_rows(batch)
+            with self._lock:
+                self.flushed += written
+                self.failed += len(batch) - written
+
+    def _write_rows(self, batch):
+        written = 0
+        for event in batch:
+            try:
+                db.session.execute(insert(ResumeAnalytic), [event])
+                db.session.commit()
+                written += 1
+            except Exception:
+                db.session.rollback()
+        return written
+
+
+event_buffer = EventBuffer()
+
+
+def init_analytics(app):
+    event_buffer.init_app(app)
+
 
 def track_event(user_id, resume_id, action, details=None):
+    event = {
+        'user_id': user_id,
+        'resume_id': resume_id,
+        'action': action,
+        'details': details,
+        'created_at': datetime.utcnow()
+    }
+    if event_buffer.enabled and event_buffer._app is not None:
+        return event_buffer.put(event)
+
     try:
-        analytic = ResumeAnalytic(
-            user_id=user_id,
-            resume_id=resume_id,
-            action=action,
-            details=details
-        )
-        db.session.add(analytic)
+        db.session.add(ResumeAnalytic(**event))
         db.session.commit()
         return True
     except Exception as e:
-        print(f"Error tracking event: {e}")
+        logger.exception(f"Error tracking event: {e}")
         return False
 
 def get_user_analytics(user_id):
@@ -24,38 +185,54 @@ def get_resume_analytics(resume_id):
     analytics = ResumeAnalytic.query.filter_by(resume_id=resume_id).all()
     return analytics
 
-def get_resume_stats(resume_id):
+def _window_start(days):
+    return datetime.utcnow() - timedelta(days=days) if days else None
+
+def get_resume_stats(resume_id, days=None):
     from .models import Resume
-    resume = Resume.query.get(resume_id)
+    resume = db.session.get(Resume, resume_id)
 
     if not resume:
         return None
 
-    downloads = ResumeAnalytic.query.filter_by(
-        resume_id=resume_id,
-        action='download'
-    ).count()
-
-    views = ResumeAnalytic.query.filter_by(
-        resume_id=resume_id,
-        action='view'
-    ).count()
+    counts = rolled_up_counts(resume.user_id, list(STAT_ACTIONS), _window_start(days), resume_id=resume_id)
 
     return {
         'resume_id': resume_id,
         'title': resume.title,
-        'downloads': downloads,
-        'views': views,
+        'downloads': counts.get((resume_id, 'download'), 0),
+        'views': counts.get((resume_id, 'view'), 0),
         'created_at': resume.created_at,
         'updated_at': resume.updated_at
     }
 
-def get_all_user_stats(user_id):
-    from .models import Resume
-    resumes = Resume.query.filter_by(user_id=user_id).all()
+def get_all_user_stats(user_id, days=None):
+    """Per-resume download and view counts for a user.
+
+    Counts are read from the hourly/daily rollup tables plus the raw
+    events newer than the rollup watermark, so the cost grows with the
+    number of buckets rather than the number of events. days limits them
+    to a recent window.
+    """
+    from .models import Resume, PersonalInfo
 
-    stats = []
-    for resume in resumes:
-        stats.append(get_resume_stats(resume.id))
+    counts = rolled_up_counts(user_id, list(STAT_ACTIONS), _window_start(days))
+    resumes = db.session.execute(
+        select(Resume.id, Resume.title, Resume.created_at, Resume.updated_at, PersonalInfo.profile_pic)
+        .outerjoin(PersonalInfo, PersonalInfo.resume_id == Resume.id)
+        .where(Resume.user_id == user_id)
+        .order_by(Resume.id)
+    ).all()
 
-    return stats
+    return [
+        {
+            'resume_id': resume_id,
+            'title': title,
+            'downloads': counts.get((resume_id, 'download'), 0),
+            'views': counts.get((resume_id, 'view'), 0),
+            'created_at': created_at,
+            'updated_at': updated_at,
+            'profile_pic': profile_pic
+        }
+        for resume_id, title, created_at, updated_at, profile_pic in resumes
+    ]
@@ -1,26 +1,50 @@
 import string
 from flask import Blueprint , render_template ,request,flash,redirect,url_for
 from .models import *
-from werkzeug.security import generate_password_hash , check_password_hash
 from flask_login import login_user,login_required,logout_user,current_user
+from .auth_service import kdf_pool, login_throttle, AuthBusy, Throttled
 
 auth = Blueprint('auth', __name__)
 
+def _throttled(e, template):
+    flash(f"Too many attempts. Try again in {e.retry_after} seconds.", category='error')
+    return render_template(template), 429, {'Retry-After': str(e.retry_after)}
+
+def _busy(template):
+    flash("We're handling a lot of sign-ins right now. Please try again in a moment.", category='error')
+    return render_template(template), 503, {'Retry-After': '5'}
+
 @auth.route('/login',methods=['GET','POST'])
 def login():
     if request.method=='GET':
         return render_template('login.html')
     elif request.method=="POST":
         em=request.form.get('email')
-        pw=request.form.get('password')
+        pw=request.form.get('password') or ''
+
+        try:
+            login_throttle.check(request.remote_addr, em)
+        except Throttled as e:
+            return _throttled(e, 'login.html')
 
         user=User.query.filter_by(email=em).first()
         if user:
-            if check_password_hash(user.password,pw):
+            # Hashing takes a while; don't hold a pooled connection through it
+            db.session.close()
+            try:
+                ok, new_hash = kdf_pool.verify(user.password, pw)
+            except AuthBusy:
+                return _busy('login.html')
+            if ok:
+                if new_hash:
+                    # Stored with older hash parameters; upgrade while the password is at hand
+                    user.password = new_hash
+                    db.session.add(user)
+                    db.session.commit()
                 flash("Logged in Successfully!",category="success")
                 login_user(user,remember=True)
                 return redirect(url_for('views.home'))
-            if not check_password_hash(user.password,pw):
+            else:
                 flash('Incorrrect Password! Try Again!!!',category='error')
                 return redirect(url_for('auth.login'))
         else:
@@ -83,7 +107,15 @@ def Sign_Up():
             flash("Special Character is Missing",category='Add_it')
             return redirect(url_for('auth.Sign_Up'))
         else:
-            new_user=User(username=nm,email=em,password=generate_password_hash(pw1,method='pbkdf2'))
+            try:
+                login_throttle.check(request.remote_addr)
+                db.session.close()
+                password_hash=kdf_pool.hash_password(pw1)
+            except Throttled as e:
+                return _throttled(e, 'signup.html')
+            except AuthBusy:
+                return _busy('signup.html')
+            new_user=User(username=nm,email=em,password=password_hash)
             db.session.add(new_user)
             db.session.commit()
             login_user(new_user,remember=True)
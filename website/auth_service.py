@@ -0,0 +1,200 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+
+class AuthBusy(Exception):
+    """Raised when the password hashing pool has no room for another request"""
+
+
+class Throttled(Exception):
+    """Raised when a login or sign-up is over its rate; retry_after is in seconds"""
+
+    def __init__(self, scope, retry_after):
+        super().__init__(f"Too many attempts for this {scope}")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+def canonical_method(method):
+    """The method string werkzeug stores in front of a hash, with defaults filled in"""
+    name, *args = method.split(':')
+    if name == 'pbkdf2':
+        hash_name = args[0] if args else 'sha256'
+        iterations = args[1] if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    if name == 'scrypt' and not args:
+        return 'scrypt:32768:8:1'
+    return method
+
+
+class KdfPool:
+    """Runs password hashing on a few dedicated threads.
+
+    pbkdf2 and scrypt run inside hashlib with the GIL released, so a
+    thread pool gives real parallelism while capping how many cores a
+    login burst can take from page and PDF rendering. Requests beyond
+    the cap queue for at most queue_timeout seconds, then fail with
+    AuthBusy instead of piling up behind the hashes.
+    """
+
+    def __init__(self):
+        self.workers = 0
+        self.queue_timeout = 0
+        self.method = canonical_method('pbkdf2')
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+        self.hashed = 0
+        self.verified = 0
+        self.rehashed = 0
+        self.rejected = 0
+        self.busy_seconds = 0.0
+
+    def init_app(self, app):
+        self.workers = app.config['AUTH_KDF_WORKERS']
+        self.queue_timeout = app.config['AUTH_KDF_QUEUE_TIMEOUT']
+        self.method = canonical_method(app.config['AUTH_PASSWORD_METHOD'])
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        if self.workers <= 0:
+            # Hash on the request thread, as before the pool existed
+            self._executor = None
+            return
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='kdf')
+        # Running plus waiting; a waiting request still holds a gunicorn thread
+        self._slots = threading.BoundedSemaphore(self.workers * app.config['AUTH_KDF_QUEUE_FACTOR'])
+
+    def _timed(self, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.busy_seconds += time.perf_counter() - start
+
+    def _run(self, fn, *args):
+        if self._executor is None:
+            return self._timed(fn, *args)
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self.rejected += 1
+            raise AuthBusy('Password hashing is saturated')
+        try:
+            return self._executor.submit(self._timed, fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash_password(self, password):
+        password_hash = self._run(generate_password_hash, password, self.method)
+        with self._lock:
+            self.hashed += 1
+        return password_hash
+
+    def needs_rehash(self, password_hash):
+        return password_hash.split('$', 1)[0] != self.method
+
+    def verify(self, password_hash, password):
+        """Check a password; returns (ok, new_hash) where new_hash replaces an outdated hash"""
+        ok = self._run(check_password_hash, password_hash, password)
+        with self._lock:
+            self.verified += 1
+        if not ok or not self.needs_rehash(password_hash):
+            return ok, None
+        new_hash = self.hash_password(password)
+        with self._lock:
+            self.rehashed += 1
+        return ok, new_hash
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'method': self.method,
+                'hashed': self.hashed,
+                'verified': self.verified,
+                'rehashed': self.rehashed,
+                'rejected': self.rejected,
+                'busy_seconds': round(self.busy_seconds, 3),
+            }
+
+
+class TokenBucket:
+    """Per-key token buckets: capacity tokens, refilled at rate tokens per second.
+
+    Keys are kept in a bounded LRU; a key that falls out simply starts
+    over with a full bucket. Buckets are per worker process.
+    """
+
+    def __init__(self, capacity, rate, max_keys=100000):
+        self.capacity = capacity
+        self.rate = rate
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = 0
+
+    def take(self, key):
+        """Spend one token; returns 0 when allowed, otherwise seconds until one is available"""
+        if self.capacity <= 0:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+                self.allowed += 1
+            else:
+                wait = (1 - tokens) / self.rate if self.rate > 0 else 3600
+                self.rejected += 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def stats(self):
+        with self._lock:
+            return {'keys': len(self._buckets), 'allowed': self.allowed, 'rejected': self.rejected}
+
+
+class LoginThrottle:
+    """Per-IP and per-account rate limits checked before any hashing"""
+
+    def __init__(self):
+        self.by_ip = TokenBucket(0, 0)
+        self.by_account = TokenBucket(0, 0)
+
+    def init_app(self, app):
+        self.by_ip = TokenBucket(app.config['AUTH_IP_BURST'], app.config['AUTH_IP_PER_MINUTE'] / 60)
+        self.by_account = TokenBucket(app.config['AUTH_ACCOUNT_BURST'], app.config['AUTH_ACCOUNT_PER_MINUTE'] / 60)
+
+    def check(self, ip, account=None):
+        wait = self.by_ip.take(ip or 'unknown')
+        if wait:
+            raise Throttled('address', math.ceil(wait))
+        if account:
+            wait = self.by_account.take(account.strip().lower())
+            if wait:
+                raise Throttled('account', math.ceil(wait))
+
+    def stats(self):
+        return {'ip': self.by_ip.stats(), 'account': self.by_account.stats()}
+
+
+kdf_pool = KdfPool()
+login_throttle = LoginThrottle()
+
+
+def auth_stats():
+    return {'kdf': kdf_pool.stats(), 'throttle': login_throttle.stats()}
+
+
+def init_auth_service(app):
+    kdf_pool.init_app(app)
+    login_throttle.init_app(app)
@@ -0,0 +1,203 @@
+import itertools
+import json
+import logging
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+import click
+from flask import current_app
+from flask_login import login_user
+from .models import db, Resume, User
+from .pdf_service import generate_resume_pdf
+from .resume_loader import load_resume_snapshot
+from .storage import storage
+
+logger = logging.getLogger(__name__)
+
+COPY_CHUNK = 64 * 1024
+
+
+class _ZipSink:
+    """Write-only buffer the ZipFile writes into; drained after every chunk"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _archive_name(resume_id, title):
+    safe_title = "".join(c for c in (title or '') if c.isalnum() or c in (' ', '-', '_')).strip()
+    return f"{safe_title or 'resume'}_{resume_id}.pdf"
+
+
+def _render_one(app, resume_id):
+    """Render one resume in its own request context; runs on a pool thread"""
+    start = time.perf_counter()
+    with app.test_request_context():
+        resume = load_resume_snapshot(resume_id)
+        if resume is None:
+            raise LookupError("Resume no longer exists")
+        # The print template is rendered as the owner, like a real download
+        login_user(db.session.get(User, resume.user_id))
+        pdf = generate_resume_pdf(resume)
+    return {
+        'resume_id': resume_id,
+        'file': _archive_name(resume_id, resume.title),
+        'pdf_name': pdf.name,
+        'data': pdf.data,
+        'render_ms': round((time.perf_counter() - start) * 1000, 1),
+    }
+
+
+def render_concurrently(app, resume_ids, concurrency):
+    """Yield (resume_id, result, error) as renders finish.
+
+    At most concurrency renders are in flight, and a finished one is
+    handed to the caller before the next is submitted, so only that many
+    PDFs are ever held in memory.
+    """
+    pending = iter(resume_ids)
+    running = {}
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='pdf-export') as pool:
+        for resume_id in pending:
+            running[pool.submit(_render_one, app, resume_id)] = resume_id
+            if len(running) >= concurrency:
+                break
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                resume_id = running.pop(future)
+                try:
+                    yield resume_id, future.result(), None
+                except Exception as e:
+                    yield resume_id, None, str(e) or type(e).__name__
+                next_id = next(pending, None)
+                if next_id is not None:
+                    running[pool.submit(_render_one, app, next_id)] = next_id
+
+
+def _pdf_chunks(result):
+    if result['data'] is not None:
+        data = result['data']
+        for offset in range(0, len(data), COPY_CHUNK):
+            yield data[offset:offset + COPY_CHUNK]
+        return
+    # Cache hit: stream it back out of the pdf store
+    stream = storage.pdfs.open(result['pdf_name'])
+    try:
+        for chunk in iter(lambda: stream.read(COPY_CHUNK), b''):
+            yield chunk
+    finally:
+        stream.close()
+
+
+def stream_resume_zip(app, resume_ids, concurrency=None, progress=None):
+    """Yield a ZIP archive of the resumes' PDFs chunk by chunk.
+
+    PDFs are added in completion order as they finish rendering. A
+    resume that fails is recorded in manifest.json instead of aborting
+    the export, with 'truncated': True if part of its PDF was already
+    written; the manifest is the last entry of the archive. progress,
+    if given, is called with (done, total, entry) after each resume.
+    """
+    concurrency = concurrency or app.config['PDF_EXPORT_CONCURRENCY']
+    resume_ids = list(resume_ids)
+    entries = []
+    sink = _ZipSink()
+    used_names = set()
+
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for resume_id, result, error in render_concurrently(app, resume_ids, concurrency):
+            written = None
+            if result is not None:
+                chunks = _pdf_chunks(result)
+                size = 0
+                try:
+                    # Only add the member once the PDF could be read at all
+                    first = next(chunks, b'')
+                    name = result['file']
+                    if name in used_names:
+                        name = f"{name[:-4]}_{len(used_names)}.pdf"
+                    used_names.add(name)
+                    # PDFs are already compressed; stored entries cost no CPU
+                    with archive.open(name, 'w', force_zip64=True) as member:
+                        written = name
+                        for chunk in itertools.chain([first], chunks):
+                            member.write(chunk)
+                            size += len(chunk)
+                            yield sink.drain()
+                    entry = {'resume_id': resume_id, 'status': 'ok', 'file': name,
+                             'bytes': size, 'render_ms': result['render_ms']}
+                except Exception as e:
+                    error = str(e) or type(e).__name__
+                finally:
+                    chunks.close()
+            if error is not None:
+                logger.warning(f"Bulk export: resume {resume_id} failed: {error}")
+                entry = {'resume_id': resume_id, 'status': 'error', 'error': error}
+                if written:
+                    # Bytes already streamed out cannot be taken back; flag the partial member
+                    entry.update(file=written, bytes=size, truncated=True)
+            entries.append(entry)
+            if progress:
+                progress(len(entries), len(resume_ids), entry)
+            yield sink.drain()
+
+        failed = sum(1 for entry in entries if entry['status'] != 'ok')
+        manifest = {
+            'generated_at': datetime.utcnow().isoformat() + 'Z',
+            'requested': len(resume_ids),
+            'exported': len(entries) - failed,
+            'failed': failed,
+            'resumes': entries,
+        }
+        archive.writestr('manifest.json', json.dumps(manifest, indent=2), compress_type=zipfile.ZIP_DEFLATED)
+    yield sink.drain()
+
+
+def select_export_ids(user_id, requested_ids=None, limit=None):
+    """Resume ids owned by user_id, restricted to requested_ids when given"""
+    query = db.select(Resume.id).where(Resume.user_id == user_id).order_by(Resume.id)
+    if requested_ids:
+        query = query.where(Resume.id.in_(requested_ids))
+    if limit:
+        query = query.limit(limit)
+    return db.session.scalars(query).all()
+
+
+def init_bulk_export(app):
+    @app.cli.command('pdf-export')
+    @click.option('--user-id', type=int, help='Export every resume of this user.')
+    @click.option('--resume-id', 'resume_ids', type=int, multiple=True, help='Resume to export; repeatable.')
+    @click.option('--output', type=click.Path(dir_okay=False, writable=True), required=True)
+    @click.option('--concurrency', type=int, help='Renders in flight (default PDF_EXPORT_CONCURRENCY).')
+    def pdf_export_command(user_id, resume_ids, output, concurrency):
+        """Render many resumes to PDF and write them into one ZIP archive."""
+        if user_id:
+            ids = select_export_ids(user_id, resume_ids)
+        elif resume_ids:
+            ids = list(resume_ids)
+        else:
+            raise click.UsageError("Pass --user-id and/or --resume-id.")
+
+        def report(done, total, entry):
+            detail = f"{entry['bytes']} bytes in {entry['render_ms']} ms" if entry['status'] == 'ok' else entry['error']
+            click.echo(f"[{done}/{total}] resume {entry['resume_id']}: {entry['status']} ({detail})")
+
+        app_obj = current_app._get_current_object()
+        with open(output, 'wb') as f:
+            for chunk in stream_resume_zip(app_obj, ids, concurrency, progress=report):
+                f.write(chunk)
+        click.echo(f"Wrote {output}")
@@ -0,0 +1,221 @@
+import hmac
+import logging
+import threading
+import time
+from flask import abort, current_app, jsonify, request
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from .models import db
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_database_url(url):
+    """Heroku still hands out postgres:// URLs, which SQLAlchemy 1.4+ rejects"""
+    if url and url.startswith('postgres://'):
+        return 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def engine_options(url, config):
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured database"""
+    backend = make_url(url).get_backend_name()
+    if backend == 'postgresql':
+        timeouts = f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT_MS']}"
+        if config['DB_LOCK_TIMEOUT_MS']:
+            timeouts += f" -c lock_timeout={config['DB_LOCK_TIMEOUT_MS']}"
+        return {
+            # Per worker process: gunicorn workers x (size + overflow) must fit max_connections
+            'pool_size': config['DB_POOL_SIZE'],
+            'max_overflow': config['DB_MAX_OVERFLOW'],
+            'pool_timeout': config['DB_POOL_TIMEOUT'],
+            # Recycle before server or proxy idle timeouts silently drop the connection
+            'pool_recycle': config['DB_POOL_RECYCLE'],
+            'pool_pre_ping': True,
+            'pool_use_lifo': True,
+            'connect_args': {
+                'options': timeouts,
+                'connect_timeout': config['DB_CONNECT_TIMEOUT'],
+                'application_name': config['DB_APPLICATION_NAME'],
+            },
+        }
+    if backend == 'sqlite':
+        # Seconds the driver waits on a locked database before raising
+        return {'connect_args': {'timeout': config['DB_BUSY_TIMEOUT_MS'] / 1000}}
+    return {'pool_pre_ping': True, 'pool_recycle': config['DB_POOL_RECYCLE']}
+
+
+def sqlite_pragmas(wal, busy_timeout_ms):
+    """Connect listener that tunes every new SQLite connection"""
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            # WAL lets readers run alongside the single writer, across worker processes too
+            if wal:
+                cursor.execute('PRAGMA journal_mode=WAL')
+            # Safe with WAL: a power loss can drop the last commits but never corrupts the file
+            cursor.execute('PRAGMA synchronous=NORMAL')
+            cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        finally:
+            cursor.close()
+    return set_pragmas
+
+
+class PoolMonitor:
+    """Counts pool activity for one engine.
+
+    Checkout waits are timed from the statement that needs a connection
+    to the moment the session has begun on one, so a saturated pool shows
+    up as growing wait times before it shows up as timeouts.
+    """
+
+    def __init__(self):
+        self.engine = None
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.invalidated = 0
+        self.timeouts = 0
+        self.peak_checked_out = 0
+        self.slow_checkouts = 0
+        self.slow_checkout_ms = 100
+
+    def attach(self, engine, slow_checkout_ms):
+        self.engine = engine
+        self.slow_checkout_ms = slow_checkout_ms
+        event.listen(engine, 'connect', self._on_connect)
+        event.listen(engine, 'checkout', self._on_checkout)
+        event.listen(engine, 'invalidate', self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        checked_out = self._checked_out()
+        with self._lock:
+            self.checkouts += 1
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidated += 1
+
+    def record_wait(self, seconds):
+        if seconds * 1000 >= self.slow_checkout_ms:
+            with self._lock:
+                self.slow_checkouts += 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def _checked_out(self):
+        pool = self.engine.pool
+        return pool.checkedout() if hasattr(pool, 'checkedout') else 0
+
+    def stats(self):
+        pool = self.engine.pool
+        stats = {'pool': type(pool).__name__, 'checked_out': self._checked_out()}
+        if hasattr(pool, 'size'):
+            stats.update({
+                'size': pool.size(),
+                'overflow': pool.overflow(),
+                'checked_in': pool.checkedin(),
+                'max_overflow': getattr(pool, '_max_overflow', 0),
+            })
+            capacity = stats['size'] + max(stats['max_overflow'], 0)
+            stats['saturation'] = round(stats['checked_out'] / capacity, 3) if capacity else None
+        with self._lock:
+            stats.update({
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'peak_checked_out': self.peak_checked_out,
+                'slow_checkouts': self.slow_checkouts,
+                'invalidated': self.invalidated,
+                'timeouts': self.timeouts,
+            })
+        return stats
+
+
+pool_monitor = PoolMonitor()
+
+
+def pool_stats():
+    """Pool gauges and counters of this worker's engine"""
+    return pool_monitor.stats()
+
+
+def _authorized():
+    """Whether the request carries MONITORING_TOKEN.
+
+    The monitoring endpoints fail closed: with no token configured they
+    404 outside debug and testing instead of being open to everyone.
+    """
+    token = current_app.config.get('MONITORING_TOKEN')
+    if not token:
+        if current_app.debug or current_app.testing:
+            return True
+        abort(404)
+    supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+    return hmac.compare_digest(supplied, token)
+
+
+def database_health():
+    """Pool stats plus a round-trip check; used by /health/db"""
+    if not _authorized():
+        abort(401)
+    start = time.perf_counter()
+    try:
+        db.session.execute(text('SELECT 1'))
+        ok, error = True, None
+    except Exception as e:
+        ok, error = False, str(e)
+    finally:
+        db.session.rollback()
+    body = {
+        'ok': ok,
+        'error': error,
+        'ping_ms': round((time.perf_counter() - start) * 1000, 1),
+        'pool': pool_stats(),
+    }
+    return jsonify(body), 200 if ok else 503
+
+
+def _stamp_checkout_start(execute_state):
+    execute_state.session.info['checkout_start'] = time.perf_counter()
+
+
+def _record_checkout_wait(session, transaction, connection):
+    start = session.info.pop('checkout_start', None)
+    if start is not None:
+        pool_monitor.record_wait(time.perf_counter() - start)
+
+
+def _clear_checkout_start(session, transaction):
+    # Statements inside an open transaction needed no checkout
+    session.info.pop('checkout_start', None)
+
+
+# Connections are checked out lazily by the first statement; time that one.
+# db.session is shared by every app, so these are registered once, on import.
+event.listen(db.session, 'do_orm_execute', _stamp_checkout_start)
+event.listen(db.session, 'after_begin', _record_checkout_wait)
+event.listen(db.session, 'after_transaction_end', _clear_checkout_start)
+
+
+def init_database(app):
+    with app.app_context():
+        engine = db.engine
+        if engine.dialect.name == 'sqlite' and engine.url.database not in (None, '', ':memory:'):
+            event.listen(engine, 'connect', sqlite_pragmas(app.config['DB_SQLITE_WAL'], app.config['DB_BUSY_TIMEOUT_MS']))
+        pool_monitor.attach(engine, app.config['DB_SLOW_CHECKOUT_MS'])
+
+    @app.errorhandler(PoolTimeoutError)
+    def _pool_exhausted(e):
+        pool_monitor.record_timeout()
+        logger.error(f"Database pool exhausted: {e}")
+        return "The service is busy, please retry in a moment.", 503
+
+    app.add_url_rule('/health/db', 'database_health', database_health)
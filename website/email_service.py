@@ -1,48 +1,258 @@
-from flask import Flask, render_template_string
+from flask import Flask, current_app, render_template_string
 from flask_mail import Mail, Message
-from datetime import datetime
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from .metrics import email_batch_seconds, email_send_seconds
 from .models import db, EmailNotification
+import atexit
+import click
+import logging
 import os
+import smtplib
+import threading
+import time
+
+logger = logging.getLogger(__name__)
 
 mail = Mail()
 
+
+class EmailSender:
+    """Background delivery of the EmailNotification outbox.
+
+    Requests only insert a queued row. A daemon thread per worker claims
+    ready rows with a guarded UPDATE, so several processes can share the
+    outbox, and sends each batch over a single SMTP connection. Failed
+    messages are retried with exponential backoff and marked dead after
+    max_attempts.
+    """
+
+    def __init__(self, batch_size=50, poll_interval=5.0, max_attempts=5, retry_delay=30, send_timeout=300):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.send_timeout = send_timeout
+        self.enabled = True
+        self.sent = 0
+        self.retried = 0
+        self.dead = 0
+        self._app = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def init_app(self, app):
+        self._app = app
+        self.enabled = app.config.get('MAIL_OUTBOX_IN_PROCESS', self.enabled)
+        self.batch_size = app.config.get('MAIL_OUTBOX_BATCH_SIZE', self.batch_size)
+        self.poll_interval = app.config.get('MAIL_OUTBOX_POLL_INTERVAL', self.poll_interval)
+        self.max_attempts = app.config.get('MAIL_OUTBOX_MAX_ATTEMPTS', self.max_attempts)
+        self.retry_delay = app.config.get('MAIL_OUTBOX_RETRY_DELAY', self.retry_delay)
+        atexit.register(self.shutdown)
+
+    def notify(self):
+        """Wake the sender after a message was queued in this process"""
+        if not self.enabled or self._app is None:
+            return
+        self._ensure_thread()
+        self._wake.set()
+
+    def shutdown(self):
+        self._stop.set()
+        self._wake.set()
+        thread = self._thread
+        if thread is not None and self._pid == os.getpid():
+            thread.join(timeout=10)
+        self._thread = None
+
+    def stats(self):
+        with self._lock:
+            return {'sent': self.sent, 'retried': self.retried, 'dead': self.dead}
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            # A forked worker inherits the attributes but not the thread
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._stop.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='email-sender', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                with self._app.app_context():
+                    while self.send_pending() == self.batch_size and not self._stop.is_set():
+                        pass
+            except Exception as e:
+                logger.exception(f"Email sender error: {e}")
+
+    def recover_stale(self):
+        """Requeue messages left in 'sending' by a worker that died"""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.send_timeout)
+        db.session.execute(
+            update(EmailNotification)
+            .where(EmailNotification.status == 'sending', EmailNotification.next_attempt_at < cutoff)
+            .values(status='queued')
+        )
+        db.session.commit()
+
+    def claim(self):
+        """Mark up to batch_size ready messages as sending and return them"""
+        now = datetime.utcnow()
+        ids = db.session.scalars(
+            db.select(EmailNotification.id)
+            .where(EmailNotification.status == 'queued', EmailNotification.next_attempt_at <= now)
+            .order_by(EmailNotification.id)
+            .limit(self.batch_size)
+        ).all()
+        claimed = []
+        for message_id in ids:
+            # The status guard makes the claim safe across several processes
+            result = db.session.execute(
+                update(EmailNotification)
+                .where(EmailNotification.id == message_id, EmailNotification.status == 'queued')
+                .values(status='sending', attempts=EmailNotification.attempts + 1, next_attempt_at=now)
+            )
+            if result.rowcount == 1:
+                claimed.append(message_id)
+        db.session.commit()
+        if not claimed:
+            return []
+        return db.session.scalars(
+            db.select(EmailNotification).where(EmailNotification.id.in_(claimed)).order_by(EmailNotification.id)
+        ).all()
+
+    def send_pending(self):
+        """Send one claimed batch over a single connection; returns the batch size"""
+        start = time.perf_counter()
+        sent = self._send_pending()
+        if sent:
+            # Idle polls would swamp the histogram
+            email_batch_seconds.observe(time.perf_counter() - start)
+        return sent
+
+    def _send_pending(self):
+        self.recover_stale()
+        batch = self.claim()
+        if not batch:
+            return 0
+
+        pending = list(batch)
+        try:
+            with mail.connect() as connection:
+                while pending:
+                    notification = pending[0]
+                    start = time.perf_counter()
+                    try:
+                        connection.send(_build_message(notification))
+                    except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError):
+                        email_send_seconds.observe(time.perf_counter() - start, result='disconnected')
+                        raise
+                    except Exception as e:
+                        email_send_seconds.observe(time.perf_counter() - start, result='failed')
+                        self._failed(notification, e)
+                    else:
+                        email_send_seconds.observe(time.perf_counter() - start, result='sent')
+                        self._delivered(notification)
+                    pending.pop(0)
+        except Exception as e:
+            # The connection itself failed; everything not yet handled backs off
+            logger.warning(f"SMTP connection error: {e}")
+            for notification in pending:
+                self._failed(notification, e)
+
+        db.session.commit()
+        return len(batch)
+
+    def _delivered(self, notification):
+        notification.status = 'sent'
+        notification.is_sent = True
+        notification.sent_at = datetime.utcnow()
+        notification.last_error = None
+        with self._lock:
+            self.sent += 1
+
+    def _failed(self, notification, error):
+        notification.last_error = (str(error) or type(error).__name__)[:500]
+        if notification.attempts >= self.max_attempts:
+            notification.status = 'dead'
+            logger.error(f"Email {notification.id} dead after {notification.attempts} attempts: {error}")
+            with self._lock:
+                self.dead += 1
+        else:
+            notification.status = 'queued'
+            delay = self.retry_delay * 2 ** (notification.attempts - 1)
+            notification.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+            with self._lock:
+                self.retried += 1
+
+
+email_sender = EmailSender()
+
+
+def _build_message(notification):
+    msg = Message(notification.subject, recipients=notification.recipients.split(','))
+    if notification.body:
+        msg.body = notification.body
+    if notification.html:
+        msg.html = notification.html
+    return msg
+
+
 def init_email(app):
     mail.init_app(app)
+    email_sender.init_app(app)
 
-def send_email_async(subject, recipients, text_body=None, html_body=None, user_id=None):
-    try:
-        msg = Message(subject, recipients=recipients)
-        if text_body:
-            msg.body = text_body
-        if html_body:
-            msg.html = html_body
-
-        mail.send(msg)
-
-        if user_id:
-            notification = EmailNotification(
-                user_id=user_id,
-                subject=subject,
-                body=text_body or html_body,
-                is_sent=True
+    @app.cli.command('email-worker')
+    @click.option('--once', is_flag=True, help='Exit once no message is ready to send.')
+    @click.option('--requeue-dead', is_flag=True, help='Give dead messages another round of attempts first.')
+    def email_worker_command(once, requeue_dead):
+        """Deliver queued emails from the outbox."""
+        if requeue_dead:
+            db.session.execute(
+                update(EmailNotification)
+                .where(EmailNotification.status == 'dead')
+                .values(status='queued', attempts=0, next_attempt_at=datetime.utcnow())
             )
-            db.session.add(notification)
             db.session.commit()
+        while True:
+            if email_sender.send_pending():
+                continue
+            if once:
+                break
+            time.sleep(email_sender.poll_interval)
+        click.echo(f"Email outbox: {email_sender.stats()}")
 
-        return True
+
+def send_email_async(subject, recipients, text_body=None, html_body=None, user_id=None):
+    """Queue an email in the outbox; delivery happens in the background sender"""
+    try:
+        notification = EmailNotification(
+            user_id=user_id,
+            recipients=','.join(recipients),
+            subject=subject,
+            body=text_body,
+            html=html_body
+        )
+        db.session.add(notification)
+        db.session.commit()
     except Exception as e:
-        print(f"Error sending email: {e}")
-        if user_id:
-            notification = EmailNotification(
-                user_id=user_id,
-                subject=subject,
-                body=text_body or html_body,
-                is_sent=False
-            )
-            db.session.add(notification)
-            db.session.commit()
+        logger.exception(f"Error queueing email: {e}")
+        db.session.rollback()
         return False
 
+    email_sender.notify()
+    return True
+
 def send_welcome_email(user_email, username):
     subject = "Welcome to Resume Builder"
     html_body = f"""
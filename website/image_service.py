@@ -0,0 +1,268 @@
+import hashlib
+import io
+import logging
+import os
+import re
+import tempfile
+import click
+from flask import Request, current_app, url_for
+from PIL import Image, ImageOps, UnidentifiedImageError
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+from .models import db, PersonalInfo, Resume
+from .storage import storage
+
+logger = logging.getLogger(__name__)
+
+# Local storage root for pictures; other backends keep only the bundled default here
+UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'uploads')
+DEFAULT_PICTURE = 'default.jpg'
+DEFAULT_PICTURE_PATH = os.path.join(UPLOAD_FOLDER, DEFAULT_PICTURE)
+
+ALLOWED_FORMATS = {'JPEG', 'PNG', 'WEBP', 'GIF'}
+MAX_UPLOAD_PIXELS = 40_000_000
+
+# Leading bytes of the allowed formats, checked as soon as a file part starts arriving
+_SIGNATURES = (
+    (0, b'\xff\xd8\xff'),
+    (0, b'\x89PNG\r\n\x1a\n'),
+    (0, b'GIF87a'),
+    (0, b'GIF89a'),
+    (8, b'WEBP'),
+)
+_SNIFF_BYTES = 12
+
+# The print variant is the file stored in PersonalInfo.profile_pic; it is
+# what the resume page and the PDF render embed. The thumbnail is derived
+# from the same content hash.
+PRINT_SIZE = 600
+THUMB_SIZE = 128
+PRINT_QUALITY = 85
+THUMB_QUALITY = 80
+
+_HASHED_NAME = re.compile(r'^img_([0-9a-f]{32})\.jpg$')
+
+
+class ImageError(Exception):
+    """Raised for uploads that are not a usable image"""
+    pass
+
+
+def is_processed(filename):
+    return bool(filename and _HASHED_NAME.match(filename))
+
+
+def thumb_name(filename):
+    """Thumbnail file for a stored picture, or the picture itself for legacy uploads"""
+    match = _HASHED_NAME.match(filename or '')
+    if not match:
+        return filename or DEFAULT_PICTURE
+    return f"img_{match.group(1)}_thumb.webp"
+
+
+class UploadStream:
+    """Write target for one uploaded file part.
+
+    Hashes the bytes as they arrive, checks the file signature from the
+    first chunk and enforces max_bytes while parsing, so an oversized or
+    non-image upload is rejected without reading the rest of it. Data is
+    kept in memory up to spool_bytes, then spilled to a temporary file.
+    """
+
+    def __init__(self, max_bytes, spool_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._hasher = hashlib.sha256()
+        self._head = b''
+        self._file = tempfile.SpooledTemporaryFile(max_size=spool_bytes)
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise RequestEntityTooLarge(f"Profile pictures are limited to {self.max_bytes // (1024 * 1024)} MB.")
+        if len(self._head) < _SNIFF_BYTES:
+            self._head += data[:_SNIFF_BYTES - len(self._head)]
+            if len(self._head) >= _SNIFF_BYTES and not self._known_signature():
+                raise UnsupportedMediaType("The uploaded file is not a JPEG, PNG, WebP or GIF image.")
+        self._hasher.update(data)
+        return self._file.write(data)
+
+    def _known_signature(self):
+        return any(self._head[offset:offset + len(magic)] == magic for offset, magic in _SIGNATURES)
+
+    @property
+    def hexdigest(self):
+        return self._hasher.hexdigest()[:32]
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+    def __iter__(self):
+        return iter(self._file)
+
+
+class UploadRequest(Request):
+    """Request class that streams file uploads through UploadStream"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if filename and content_type and not content_type.startswith('image/'):
+            raise UnsupportedMediaType("Only image uploads are accepted.")
+        config = current_app.config
+        return UploadStream(config['UPLOAD_MAX_FILE_BYTES'], config['UPLOAD_SPOOL_BYTES'])
+
+
+def _save_encoded(image, name, **options):
+    buffer = io.BytesIO()
+    image.save(buffer, **options)
+    buffer.seek(0)
+    storage.uploads.save(name, buffer)
+
+
+def _open_image(stream):
+    try:
+        probe = Image.open(stream)
+        probe.verify()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError) as e:
+        raise ImageError("The uploaded file is not a valid image.") from e
+    if probe.format not in ALLOWED_FORMATS:
+        raise ImageError(f"Unsupported image format: {probe.format}.")
+    if probe.width * probe.height > MAX_UPLOAD_PIXELS:
+        raise ImageError("The uploaded image is too large.")
+
+    # verify() leaves the image unusable, so decode again from the start
+    stream.seek(0)
+    image = Image.open(stream)
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    elif image.mode != 'RGB':
+        image = image.convert('RGB')
+    return image
+
+
+def _write_variants(image, digest):
+    print_name = f"img_{digest}.jpg"
+    thumb = thumb_name(print_name)
+
+    if not storage.uploads.exists(print_name):
+        printable = image.copy()
+        printable.thumbnail((PRINT_SIZE, PRINT_SIZE), Image.LANCZOS)
+        # Re-encoding without exif/icc arguments strips all metadata
+        _save_encoded(printable, print_name, format='JPEG', quality=PRINT_QUALITY, optimize=True, progressive=True)
+    if not storage.uploads.exists(thumb):
+        _save_encoded(ImageOps.fit(image, (THUMB_SIZE, THUMB_SIZE), Image.LANCZOS), thumb,
+                      format='WEBP', quality=THUMB_QUALITY, method=4)
+    return print_name
+
+
+def store_image(stream, digest=None):
+    """Validate an image stream and store its variants under a content hash.
+
+    Returns the stored file name. Identical uploads map to the same files,
+    so a repeat upload only costs the hash.
+    """
+    if digest is None:
+        hasher = hashlib.sha256()
+        for chunk in iter(lambda: stream.read(64 * 1024), b''):
+            hasher.update(chunk)
+        digest = hasher.hexdigest()[:32]
+        stream.seek(0)
+
+    filename = f"img_{digest}.jpg"
+    if storage.uploads.exists(filename) and storage.uploads.exists(thumb_name(filename)):
+        return filename
+
+    image = _open_image(stream)
+    try:
+        return _write_variants(image, digest)
+    finally:
+        image.close()
+
+
+def process_upload(file_storage):
+    """Store an uploaded werkzeug FileStorage and return its file name"""
+    stream = file_storage.stream
+    # UploadStream already hashed the body while it was parsed
+    digest = stream.hexdigest if isinstance(stream, UploadStream) else None
+    stream.seek(0)
+    return store_image(stream, digest=digest)
+
+
+def release_image(filename):
+    """Delete a stored picture once no resume references it any more.
+
+    Call after the change that dropped the reference is committed.
+    """
+    if not filename or filename == DEFAULT_PICTURE:
+        return
+    if PersonalInfo.query.filter_by(profile_pic=filename).first() is not None:
+        return
+    names = [filename]
+    if is_processed(filename):
+        names.append(thumb_name(filename))
+    for name in names:
+        try:
+            storage.uploads.delete(name)
+        except Exception as e:
+            logger.warning(f"Could not delete image {name}: {e}")
+
+
+def backfill_images():
+    """Convert legacy uploads to hashed variants and regenerate missing thumbnails"""
+    converted = regenerated = failed = 0
+    names = db.session.scalars(
+        db.select(PersonalInfo.profile_pic).where(PersonalInfo.profile_pic != DEFAULT_PICTURE).distinct()
+    ).all()
+    for name in names:
+        if not name or not storage.uploads.exists(name):
+            continue
+        try:
+            if is_processed(name):
+                if storage.uploads.exists(thumb_name(name)):
+                    continue
+                with Image.open(storage.uploads.open(name)) as image:
+                    thumb = ImageOps.fit(image.convert('RGB'), (THUMB_SIZE, THUMB_SIZE), Image.LANCZOS)
+                _save_encoded(thumb, thumb_name(name), format='WEBP', quality=THUMB_QUALITY, method=4)
+                regenerated += 1
+                continue
+            # Image.open needs a seekable stream, which an S3 body is not
+            new_name = store_image(io.BytesIO(storage.uploads.read(name)))
+            # Bump the affected resumes so no cached page keeps linking the old file
+            db.session.execute(
+                db.update(Resume)
+                .where(Resume.id.in_(db.select(PersonalInfo.resume_id).where(PersonalInfo.profile_pic == name)))
+                .values(version=Resume.version + 1)
+            )
+            PersonalInfo.query.filter_by(profile_pic=name).update({'profile_pic': new_name})
+            db.session.commit()
+            release_image(name)
+            converted += 1
+        except ImageError as e:
+            logger.warning(f"Skipping {name}: {e}")
+            failed += 1
+    return converted, regenerated, failed
+
+
+def media_url(filename):
+    """Browser URL for a stored picture"""
+    if not filename or filename == DEFAULT_PICTURE:
+        return url_for('static', filename='uploads/' + DEFAULT_PICTURE)
+    return storage.uploads.url(filename) or url_for('views.media', name=filename)
+
+
+def profile_thumb_url(filename):
+    return media_url(thumb_name(filename))
+
+
+def init_images(app):
+    app.request_class = UploadRequest
+    app.add_template_global(media_url)
+    app.add_template_global(profile_thumb_url)
+
+    @app.cli.command('images-backfill')
+    def images_backfill_command():
+        """Re-encode existing profile pictures into hashed, resized variants."""
+        converted, regenerated, failed = backfill_images()
+        click.echo(f"Converted {converted} uploads, regenerated {regenerated} thumbnails, {failed} failed")
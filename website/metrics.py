@@ -0,0 +1,311 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from flask import Response, abort, g, has_request_context, request, before_render_template, template_rendered
+from sqlalchemy import event
+from .database import _authorized
+from .models import db
+
+PREFIX = 'resume_builder'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, 5)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense, one series per label set"""
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += 1
+            series[2] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: (list(counts), count, total) for key, (counts, count, total) in self._series.items()}
+        for key, (counts, count, total) in sorted(series.items()):
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{_labels(self.labels, key, ('le', _number(bound)))} {bucket_count}")
+            lines.append(f"{self.name}_bucket{_labels(self.labels, key, ('le', '+Inf'))} {count}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {_number(round(total, 6))}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_labels(self.labels, key)} {_number(value)}")
+        return lines
+
+
+class Metrics:
+    """Process-wide metric registry rendered in the Prometheus text format.
+
+    Every gunicorn worker keeps its own numbers, like the other in-process
+    stats; scrape each worker or sum the series in Prometheus. Collectors
+    are callables returning a stats dict whose numbers are exported as
+    gauges, so the existing stats() methods show up without changes.
+    """
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self.collectors = {}
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        name = f"{PREFIX}_{name}"
+        if name not in self.histograms:
+            self.histograms[name] = Histogram(name, help, labels, buckets)
+        return self.histograms[name]
+
+    def counter(self, name, help, labels=()):
+        name = f"{PREFIX}_{name}"
+        if name not in self.counters:
+            self.counters[name] = Counter(name, help, labels)
+        return self.counters[name]
+
+    def register_collector(self, name, collect):
+        self.collectors[name] = collect
+
+    def _collected(self):
+        lines = []
+        for component, collect in sorted(self.collectors.items()):
+            try:
+                values = collect()
+            except Exception as e:
+                _config['logger'].exception(f"Metrics collector {component} failed: {e}")
+                continue
+            for key, value in sorted(_flatten(values)):
+                name = f"{PREFIX}_{component}_{key}"
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_number(value)}")
+        return lines
+
+    def render(self):
+        lines = []
+        for metric in list(self.histograms.values()) + list(self.counters.values()):
+            lines.extend(metric.render())
+        lines.extend(self._collected())
+        return '\n'.join(lines) + '\n'
+
+
+def _flatten(values, prefix=''):
+    """Numeric leaves of a nested stats dict as (name, value) pairs"""
+    for key, value in values.items():
+        name = f"{prefix}{key}".replace('-', '_').replace('.', '_')
+        if isinstance(value, dict):
+            yield from _flatten(value, name + '_')
+        elif isinstance(value, bool):
+            yield name, int(value)
+        elif isinstance(value, (int, float)):
+            yield name, value
+
+
+metrics = Metrics()
+
+request_seconds = metrics.histogram('http_request_duration_seconds', 'Request latency by route',
+                                    ('method', 'endpoint', 'status'))
+request_queries = metrics.histogram('http_request_queries', 'SQL statements per request', ('endpoint',),
+                                    COUNT_BUCKETS)
+request_db_seconds = metrics.histogram('http_request_db_seconds', 'Time in SQL per request', ('endpoint',))
+query_seconds = metrics.histogram('db_query_duration_seconds', 'Duration of single SQL statements', (),
+                                  QUERY_BUCKETS)
+slow_requests = metrics.counter('slow_requests_total', 'Requests over SLOW_REQUEST_MS', ('endpoint',))
+slow_queries = metrics.counter('slow_queries_total', 'SQL statements over SLOW_QUERY_MS')
+template_seconds = metrics.histogram('template_render_seconds', 'Jinja template rendering', ('template',))
+pdf_render_seconds = metrics.histogram('pdf_render_seconds', 'PDF engine render time', ('engine',), SLOW_BUCKETS)
+pdf_cache_lookups = metrics.counter('pdf_cache_lookups_total', 'Rendered PDF cache lookups', ('result',))
+pdf_job_seconds = metrics.histogram('pdf_job_duration_seconds', 'Background PDF jobs, load to commit',
+                                    ('status',), SLOW_BUCKETS)
+email_send_seconds = metrics.histogram('email_send_seconds', 'SMTP delivery per message', ('result',))
+email_batch_seconds = metrics.histogram('email_batch_seconds', 'Claiming and sending one outbox batch', (),
+                                        SLOW_BUCKETS)
+
+
+@contextmanager
+def timed(histogram, **labels):
+    """Observe the duration of the block; labels may be filled in inside it"""
+    start = time.perf_counter()
+    try:
+        yield labels
+    finally:
+        histogram.observe(time.perf_counter() - start, **labels)
+
+
+_local = threading.local()
+_config = {'slow_query_ms': 500, 'slow_request_ms': 1000, 'slow_request_queries': 10,
+           'logger': logging.getLogger(__name__)}
+
+
+def _on_before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _on_after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    query_seconds.observe(elapsed)
+    if elapsed * 1000 >= _config['slow_query_ms']:
+        slow_queries.inc()
+        # Statements also run outside requests (CLI, workers), so keep the app logger at hand
+        _config['logger'].warning(f"Slow query ({elapsed * 1000:.0f} ms): {_shorten(statement)}")
+    if has_request_context():
+        queries = g.get('_metrics_queries')
+        if queries is not None:
+            queries.append((elapsed, statement))
+
+
+def _on_before_render(sender, template, context, **extra):
+    stack = getattr(_local, 'templates', None)
+    if stack is None:
+        stack = _local.templates = []
+    stack.append(time.perf_counter())
+
+
+def _on_rendered(sender, template, context, **extra):
+    stack = getattr(_local, 'templates', None)
+    if stack:
+        template_seconds.observe(time.perf_counter() - stack.pop(), template=template.name or 'string')
+
+
+def _shorten(statement, limit=300):
+    statement = ' '.join(statement.split())
+    return statement if len(statement) <= limit else statement[:limit] + '...'
+
+
+def _log_slow_request(app, endpoint, status, elapsed, queries):
+    by_statement = {}
+    for duration, statement in queries:
+        count, total = by_statement.get(statement, (0, 0.0))
+        by_statement[statement] = (count + 1, total + duration)
+    worst = sorted(by_statement.items(), key=lambda item: item[1][1], reverse=True)
+    lines = [f"Slow request {request.method} {request.path} ({endpoint}) {status}: {elapsed * 1000:.0f} ms, "
+             f"{len(queries)} queries in {sum(d for d, _ in queries) * 1000:.0f} ms"]
+    for statement, (count, total) in worst[:_config['slow_request_queries']]:
+        # A statement repeated many times is usually an N+1 loop
+        lines.append(f"  {total * 1000:7.1f} ms  x{count:<3} {_shorten(statement)}")
+    app.logger.warning('\n'.join(lines))
+
+
+def metrics_endpoint():
+    """Prometheus scrape target; guarded by MONITORING_TOKEN like /health/db"""
+    if not _authorized():
+        abort(401)
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+def _register_collectors():
+    from .analytics_service import event_buffer
+    from .auth_service import auth_stats
+    from .database import pool_stats
+    from .email_service import email_sender
+    from .template_cache import fragment_cache
+    from .user_cache import user_cache
+
+    metrics.register_collector('db_pool', pool_stats)
+    metrics.register_collector('fragment_cache', fragment_cache.stats)
+    metrics.register_collector('user_cache', user_cache.stats)
+    metrics.register_collector('email_outbox', email_sender.stats)
+    metrics.register_collector('analytics_buffer', event_buffer.stats)
+    metrics.register_collector('auth', auth_stats)
+
+
+def init_metrics(app):
+    if not app.config['METRICS_ENABLED']:
+        return
+    _config['slow_query_ms'] = app.config['SLOW_QUERY_MS']
+    _config['slow_request_ms'] = app.config['SLOW_REQUEST_MS']
+    _config['slow_request_queries'] = app.config['SLOW_REQUEST_QUERIES']
+    _config['logger'] = app.logger
+
+    with app.app_context():
+        engine = db.engine
+        event.listen(engine, 'before_cursor_execute', _on_before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _on_after_cursor_execute)
+    before_render_template.connect(_on_before_render, app)
+    template_rendered.connect(_on_rendered, app)
+    _register_collectors()
+
+    @app.before_request
+    def _start_request_timer():
+        g._metrics_start = time.perf_counter()
+        g._metrics_queries = []
+
+    @app.teardown_request
+    def _observe_request(exc):
+        start = g.pop('_metrics_start', None)
+        queries = g.pop('_metrics_queries', None)
+        if start is None or request.endpoint in ('static', 'metrics_endpoint'):
+            return
+        elapsed = time.perf_counter() - start
+        endpoint = request.endpoint or 'unmatched'
+        status = 500 if exc is not None else g.pop('_metrics_status', 0)
+        request_seconds.observe(elapsed, method=request.method, endpoint=endpoint, status=status)
+        request_queries.observe(len(queries), endpoint=endpoint)
+        request_db_seconds.observe(sum(duration for duration, _ in queries), endpoint=endpoint)
+        if elapsed * 1000 >= _config['slow_request_ms']:
+            slow_requests.inc(endpoint=endpoint)
+            _log_slow_request(app, endpoint, status, elapsed, queries)
+
+    @app.after_request
+    def _remember_status(response):
+        g._metrics_status = response.status_code
+        return response
+
+    app.add_url_rule('/metrics', 'metrics_endpoint', metrics_endpoint)
@@ -16,22 +16,35 @@ class User(db.Model, UserMixin):
 
 class Resume(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), index=True)
     title = db.Column(db.String(50), nullable=False)
     style = db.Column(db.String(20), nullable=False, default='modern')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Bumped on every save; keys rendered fragments and the view ETag
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     is_active = db.Column(db.Boolean, default=True)
     download_count = db.Column(db.Integer, default=0)
 
+    # Completeness, kept up to date by the save path (see section_sync); repair with resume-stats-reconcile
+    has_personal_info = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    education_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    experience_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    project_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    skill_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    certification_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    completion_percentage = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+
     personal_info = db.relationship('PersonalInfo', backref='resume', uselist=False, cascade="all, delete")
 
-    education = db.relationship('Education', backref='resume', cascade="all, delete", lazy=True)
-    experience = db.relationship('Experience', backref='resume', cascade="all, delete", lazy=True)
-    projects = db.relationship('Project', backref='resume', cascade="all, delete", lazy=True)
-    skills = db.relationship('Skill', backref='resume', cascade="all, delete", lazy=True)
-    certifications = db.relationship('Certification', backref='resume', cascade="all, delete", lazy=True)
+    education = db.relationship('Education', backref='resume', cascade="all, delete", lazy=True, order_by='Education.id')
+    experience = db.relationship('Experience', backref='resume', cascade="all, delete", lazy=True, order_by='Experience.id')
+    projects = db.relationship('Project', backref='resume', cascade="all, delete", lazy=True, order_by='Project.id')
+    skills = db.relationship('Skill', backref='resume', cascade="all, delete", lazy=True, order_by='Skill.id')
+    certifications = db.relationship('Certification', backref='resume', cascade="all, delete", lazy=True, order_by='Certification.id')
     analytics = db.relationship('ResumeAnalytic', backref='resume', cascade="all, delete", lazy=True)
+    pdf_jobs = db.relationship('PdfJob', backref='resume', cascade="all, delete", lazy=True)
+    analytics_rollups = db.relationship('ResumeAnalyticRollup', backref='resume', cascade="all, delete", lazy=True)
 class PersonalInfo(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     resume_id = db.Column(db.Integer, db.ForeignKey('resume.id'), unique=True)
@@ -46,7 +59,7 @@ class PersonalInfo(db.Model):
 
 class Education(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    resume_id = db.Column(db.Integer, db.ForeignKey('resume.id'))
+    resume_id = db.Column(db.Integer, db.ForeignKey('resume.id'), index=True)
     degree = db.Column(db.String(100))
     institution = db.Column(db.String(100))
     start_year = db.Column(db.Integer)
@@ -56,7 +69,7 @@ class Education(db.Model):
 
 class Experience(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    resume_id = db.Column(db.Integer, db.ForeignKey('resume.id'))
+    resume_id = db.Column(db.Integer, db.ForeignKey('resume.id'), index=True)
     job_title = db.Column(db.String(100))
     company = db.Column(db.String(100))
     start_date = db.Column(db.String(20))
@@ -65,7 +78,7 @@ class Experience(db.Model):
 
 class Project(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    resume_id = db.Column(db.Integer, db.ForeignKey('resume.id'))
+    resume_id = db.Column(db.Integer, db.ForeignKey('resume.id'), index=True)
     title = db.Column(db.String(100))
     description = db.Column(db.String(300))
     tech_stack = db.Column(db.String(200))
@@ -73,30 +86,89 @@ class Project(db.Model):
 
 class Skill(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    resume_id = db.Column(db.Integer, db.ForeignKey('resume.id'))
+    resume_id = db.Column(db.Integer, db.ForeignKey('resume.id'), index=True)
     name = db.Column(db.String(50))
     level = db.Column(db.String(20)) 
 
 class Certification(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    resume_id = db.Column(db.Integer, db.ForeignKey('resume.id'))
+    resume_id = db.Column(db.Integer, db.ForeignKey('resume.id'), index=True)
     name = db.Column(db.String(100))
     issuer = db.Column(db.String(100))
     issue_date = db.Column(db.String(20))
     credential_link = db.Column(db.String(200))
 
 class ResumeAnalytic(db.Model):
+    __table_args__ = (
+        db.Index('ix_resume_analytic_user_resume_action_created', 'user_id', 'resume_id', 'action', 'created_at'),
+        # Ids must never be reused after pruning, the rollup watermark relies on it
+        {'sqlite_autoincrement': True},
+    )
+
     id = db.Column(db.Integer, primary_key=True)
+    # user_id lookups use the composite index above
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
-    resume_id = db.Column(db.Integer, db.ForeignKey('resume.id'))
+    resume_id = db.Column(db.Integer, db.ForeignKey('resume.id'), index=True)
     action = db.Column(db.String(50))
     details = db.Column(db.String(500))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Retention pruning scans by age
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+class ResumeAnalyticRollup(db.Model):
+    __table_args__ = (
+        db.UniqueConstraint('granularity', 'bucket_start', 'resume_id', 'action', name='uq_resume_analytic_rollup_bucket'),
+        db.Index('ix_resume_analytic_rollup_user_bucket', 'user_id', 'granularity', 'bucket_start'),
+    )
 
-class EmailNotification(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    resume_id = db.Column(db.Integer, db.ForeignKey('resume.id'), index=True)
+    action = db.Column(db.String(50), nullable=False)
+    granularity = db.Column(db.String(10), nullable=False)  # hour, day
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class AnalyticsRollupState(db.Model):
+    name = db.Column(db.String(50), primary_key=True)
+    last_event_id = db.Column(db.Integer, nullable=False, default=0)
+    # PostgreSQL commit horizon: newest id seen by the last run and its snapshot's xmax
+    pending_event_id = db.Column(db.Integer)
+    pending_xmax = db.Column(db.BigInteger)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class EmailNotification(db.Model):
+    __table_args__ = (
+        db.Index('ix_email_notification_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), index=True)
+    recipients = db.Column(db.Text)  # comma separated
     subject = db.Column(db.String(200))
     body = db.Column(db.Text)
-    sent_at = db.Column(db.DateTime, default=datetime.utcnow)
+    html = db.Column(db.Text)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, sending, sent, dead
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.String(500))
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
     is_sent = db.Column(db.Boolean, default=False)
+
+class PdfJob(db.Model):
+    __table_args__ = (
+        db.Index('ix_pdf_job_resume_status', 'resume_id', 'status'),
+        db.Index('ix_pdf_job_status_available', 'status', 'available_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), index=True)
+    resume_id = db.Column(db.Integer, db.ForeignKey('resume.id'))
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.String(500))
+    file_path = db.Column(db.String(300))
+    available_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
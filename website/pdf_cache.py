@@ -0,0 +1,119 @@
+import hashlib
+import logging
+import threading
+import time
+from .storage import storage
+
+logger = logging.getLogger(__name__)
+
+# Eviction frees space down to this fraction of max_bytes
+EVICT_TO = 0.9
+
+
+class PdfCache:
+    """LRU of generated PDFs in the pdf store, keyed by the content that produced them.
+
+    Files are named resume_<id>_<sha256>.pdf so one resume's artifacts can be
+    dropped by prefix when it is edited. Recency is tracked with the file
+    mtime, which keeps eviction consistent across workers sharing the store.
+
+    Listing the store is a full paginated LIST on S3, so it is not done on
+    every put: the total size is tracked as PDFs are added and the store
+    is only listed once that estimate exceeds max_bytes, or every
+    scan_interval seconds to pick up what other workers wrote.
+    """
+
+    def __init__(self, max_bytes=200 * 1024 * 1024, scan_interval=60):
+        self.max_bytes = max_bytes
+        self.scan_interval = scan_interval
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Bytes in the store as of the last listing plus what this process added since; None until listed
+        self._size = None
+        self._scanned_at = 0.0
+
+    def init_app(self, app):
+        self.max_bytes = app.config.get('PDF_CACHE_MAX_BYTES', self.max_bytes)
+        self.scan_interval = app.config.get('PDF_CACHE_SCAN_INTERVAL', self.scan_interval)
+        self._size = None
+
+    @staticmethod
+    def make_key(html_content, *parts):
+        """Hash the rendered HTML document plus anything else that feeds the PDF"""
+        digest = hashlib.sha256(html_content.encode('utf-8'))
+        for part in parts:
+            digest.update(b'\0')
+            digest.update(part.encode('utf-8') if isinstance(part, str) else part)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _name(resume_id, key):
+        return f"resume_{resume_id}_{key}.pdf"
+
+    def get(self, resume_id, key):
+        """Return the stored PDF name, or None on a miss"""
+        name = self._name(resume_id, key)
+        if not storage.pdfs.touch(name):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return name
+
+    def put(self, resume_id, key, data):
+        """Store PDF bytes or a stream and return the stored name"""
+        name = self._name(resume_id, key)
+        storage.pdfs.save(name, data)
+        with self._lock:
+            if self._size is not None and isinstance(data, (bytes, bytearray)):
+                self._size += len(data)
+            else:
+                self._size = None
+            due = (self._size is None or self._size > self.max_bytes
+                   or time.monotonic() - self._scanned_at >= self.scan_interval)
+        if due:
+            self._evict(keep=name)
+        return name
+
+    def invalidate(self, resume_id):
+        """Drop every cached PDF for a resume"""
+        for name, size, _ in list(storage.pdfs.list(f"resume_{resume_id}_")):
+            try:
+                storage.pdfs.delete(name)
+            except Exception as e:
+                logger.warning(f"Could not remove cached PDF {name}: {e}")
+                continue
+            with self._lock:
+                if self._size is not None:
+                    self._size = max(self._size - size, 0)
+
+    def _evict(self, keep=None):
+        with self._lock:
+            entries = []
+            total = 0
+            for name, size, mtime in storage.pdfs.list("resume_"):
+                entries.append((mtime, size, name))
+                total += size
+
+            # Once over the limit, make some headroom so the next puts do not list again at once
+            target = self.max_bytes if total <= self.max_bytes else self.max_bytes * EVICT_TO
+            entries.sort()
+            for _, size, name in entries:
+                if total <= target:
+                    break
+                if name == keep:
+                    continue
+                try:
+                    storage.pdfs.delete(name)
+                    total -= size
+                except Exception:
+                    pass
+            self._size = total
+            self._scanned_at = time.monotonic()
+
+
+pdf_cache = PdfCache()
+
+
+def init_pdf_cache(app):
+    pdf_cache.init_app(app)
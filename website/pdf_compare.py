@@ -0,0 +1,107 @@
+import json
+import os
+import re
+import statistics
+import time
+import click
+from flask import current_app
+from flask_login import login_user
+from .models import db, Resume, User
+from .pdf_service import RENDERERS, build_resume_document
+from .resume_loader import load_resume_snapshot
+
+_PAGE_OBJECT = re.compile(rb'/Type\s*/Page(?!s)\b')
+
+
+def count_pages(pdf_bytes):
+    """Page objects in an uncompressed PDF; None when they sit in object streams"""
+    pages = len(_PAGE_OBJECT.findall(pdf_bytes))
+    return pages or None
+
+
+def compare_resume(resume, engines, runs, output_dir=None):
+    """Render one ResumeSnapshot through every engine; returns a result per engine"""
+    results = {}
+    for engine in engines:
+        try:
+            html, css_path = build_resume_document(resume, engine)
+            start = time.perf_counter()
+            pdf_bytes = engine.render(html, css_path)
+            first = time.perf_counter() - start
+
+            timings = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                pdf_bytes = engine.render(html, css_path)
+                timings.append(time.perf_counter() - start)
+        except Exception as e:
+            results[engine.name] = {'error': str(e)}
+            continue
+
+        if output_dir:
+            with open(os.path.join(output_dir, f"resume_{resume.id}_{engine.name}.pdf"), 'wb') as f:
+                f.write(pdf_bytes)
+        results[engine.name] = {
+            'first_ms': round(first * 1000, 1),
+            'median_ms': round(statistics.median(timings) * 1000, 1) if timings else None,
+            'max_ms': round(max(timings) * 1000, 1) if timings else None,
+            'bytes': len(pdf_bytes),
+            'pages': count_pages(pdf_bytes),
+        }
+
+    page_counts = {r['pages'] for r in results.values() if r.get('pages')}
+    return {
+        'resume_id': resume.id,
+        'style': resume.style,
+        'engines': results,
+        # Layout drift between engines usually shows up as a different page count first
+        'same_page_count': len(page_counts) <= 1,
+    }
+
+
+def compare_engines(app, resume_ids, runs=3, output_dir=None, engine_names=None):
+    """Render the same resumes through each engine and collect timings and output stats"""
+    engines = [RENDERERS[name] for name in (engine_names or RENDERERS)]
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    report = []
+    for resume_id in resume_ids:
+        with app.test_request_context():
+            resume = load_resume_snapshot(resume_id)
+            if resume is None or resume.personal_info is None:
+                continue
+            # The print template is rendered as the owner, like a real download
+            login_user(db.session.get(User, resume.user_id))
+            report.append(compare_resume(resume, engines, runs, output_dir))
+    return report
+
+
+def init_pdf_compare(app):
+    @app.cli.command('pdf-compare')
+    @click.option('--resume-id', 'resume_ids', type=int, multiple=True, help='Resume to render; repeatable.')
+    @click.option('--limit', type=int, default=5, show_default=True, help='Newest resumes to use without --resume-id.')
+    @click.option('--runs', type=int, default=3, show_default=True, help='Timed renders per engine after a warm-up.')
+    @click.option('--engine', 'engine_names', type=click.Choice(sorted(RENDERERS)), multiple=True)
+    @click.option('--output', type=click.Path(file_okay=False), help='Write each PDF here for side-by-side review.')
+    @click.option('--json', 'as_json', is_flag=True, help='Print the raw report as JSON.')
+    def pdf_compare_command(resume_ids, limit, runs, engine_names, output, as_json):
+        """Render the same resumes with each PDF engine and compare speed and output."""
+        if not resume_ids:
+            resume_ids = db.session.scalars(db.select(Resume.id).order_by(Resume.id.desc()).limit(limit)).all()
+        report = compare_engines(current_app._get_current_object(), resume_ids, runs, output, engine_names)
+
+        if as_json:
+            click.echo(json.dumps(report, indent=2))
+            return
+        for entry in report:
+            flag = '' if entry['same_page_count'] else '  << page count differs'
+            click.echo(f"Resume {entry['resume_id']} ({entry['style']}){flag}")
+            for name, result in entry['engines'].items():
+                if 'error' in result:
+                    click.echo(f"  {name:<11} error: {result['error']}")
+                    continue
+                click.echo(
+                    f"  {name:<11} first {result['first_ms']:>8.1f} ms  median {result['median_ms'] or 0:>8.1f} ms  "
+                    f"{result['bytes']:>9} bytes  pages {result['pages'] or '?'}"
+                )
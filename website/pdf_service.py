@@ -0,0 +1,480 @@
+import asyncio
+import atexit
+import base64
+import concurrent.futures
+import logging
+import mimetypes
+import os
+import threading
+from typing import NamedTuple, Optional
+from flask import abort, jsonify, render_template
+from markupsafe import Markup
+from playwright.async_api import async_playwright
+from .pdf_cache import pdf_cache
+from .database import _authorized
+from .image_service import DEFAULT_PICTURE, DEFAULT_PICTURE_PATH
+from .metrics import pdf_cache_lookups, pdf_render_seconds, timed
+from .storage import storage
+from .template_cache import render_resume_fragment
+
+logger = logging.getLogger(__name__)
+
+STATIC_FOLDER = os.path.abspath(os.path.join(os.path.dirname(__file__), 'static'))
+
+CHROMIUM_ARGS = ['--disable-blink-features=AutomationControlled']
+
+PDF_OPTIONS = {
+    'format': 'A4',
+    'print_background': True,
+    'margin': {
+        'top': '0.5in',
+        'bottom': '0.5in',
+        'left': '0.5in',
+        'right': '0.5in'
+    }
+}
+
+
+class _PooledPage:
+    def __init__(self, context, page, generation):
+        self.context = context
+        self.page = page
+        self.generation = generation
+        self.uses = 0
+
+
+class PdfRenderer:
+    """Turns a resume HTML document into PDF bytes.
+
+    inline_css tells generate_resume_pdf whether the engine wants the
+    stylesheet inlined in the document or passed to render() as a path.
+    """
+
+    name = None
+    inline_css = True
+
+    def init_app(self, app):
+        pass
+
+    def render(self, html, css_path=None):
+        raise NotImplementedError
+
+    def health_check(self):
+        return {'running': True}
+
+    def shutdown(self):
+        pass
+
+
+class PlaywrightRenderer(PdfRenderer):
+    """Warm Chromium kept alive for the lifetime of a worker process.
+
+    Playwright runs on a private event loop in a daemon thread. Request
+    threads hand work to that loop and block on the result, so the browser
+    launch is paid once per worker instead of once per download.
+    """
+
+    name = 'playwright'
+
+    def __init__(self, pool_size=2, max_page_uses=50, render_timeout=60):
+        self.pool_size = pool_size
+        self.max_page_uses = max_page_uses
+        self.render_timeout = render_timeout
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = None
+        self._loop = None
+        self._thread = None
+        self._playwright = None
+        self._browser = None
+        self._generation = 0
+        self._slots = None
+        self._browser_lock = None
+
+    def init_app(self, app):
+        self.pool_size = app.config.get('PDF_POOL_SIZE', self.pool_size)
+        self.max_page_uses = app.config.get('PDF_PAGE_MAX_USES', self.max_page_uses)
+        self.render_timeout = app.config.get('PDF_RENDER_TIMEOUT', self.render_timeout)
+        atexit.register(self.shutdown)
+
+    def render(self, html, css_path=None):
+        """Print a self-contained HTML document and return the PDF bytes, reusing a pooled page"""
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(self._render(html), loop)
+        try:
+            return future.result(timeout=self.render_timeout)
+        except concurrent.futures.TimeoutError:
+            # Stop the render so its page and pool slot come back instead of running on
+            future.cancel()
+            raise
+
+    def health_check(self):
+        """Report whether the pooled browser is up and how busy the pool is"""
+        loop = self._loop
+        if loop is None or self._pid != os.getpid():
+            return {'running': False, 'launched': False, 'connected': False, 'idle_pages': 0, 'pool_size': self.pool_size}
+
+        async def _probe():
+            launched = self._browser is not None
+            return {
+                'running': True,
+                'launched': launched,
+                'connected': launched and self._browser.is_connected(),
+                'idle_pages': self._slots.qsize() if self._slots else 0,
+                'pool_size': self.pool_size
+            }
+
+        return asyncio.run_coroutine_threadsafe(_probe(), loop).result(timeout=5)
+
+    def shutdown(self):
+        """Close every page, the browser and the loop thread (best effort)"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if loop is None or self._pid != os.getpid():
+                self._reset()
+                return
+            try:
+                asyncio.run_coroutine_threadsafe(self._close_pool(), loop).result(timeout=10)
+            except Exception as e:
+                logger.warning(f"PDF renderer shutdown error: {e}")
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=5)
+            self._reset()
+
+    def _ensure_loop(self):
+        with self._lock:
+            # A forked worker inherits the attributes but not the thread
+            if self._loop is not None and self._pid == os.getpid():
+                return self._loop
+            self._reset()
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=self._run_loop, args=(loop,),
+                                      name='pdf-renderer', daemon=True)
+            thread.start()
+            self._loop, self._thread, self._pid = loop, thread, os.getpid()
+            asyncio.run_coroutine_threadsafe(self._init_pool(), loop).result(timeout=10)
+            return loop
+
+    @staticmethod
+    def _run_loop(loop):
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+        loop.close()
+
+    async def _init_pool(self):
+        self._browser_lock = asyncio.Lock()
+        self._slots = asyncio.Queue()
+        for _ in range(self.pool_size):
+            self._slots.put_nowait(None)
+
+    async def _get_browser(self):
+        async with self._browser_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return self._browser
+            if self._browser is not None:
+                logger.warning("PDF renderer: browser disconnected, relaunching")
+                try:
+                    await self._browser.close()
+                except Exception:
+                    pass
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(args=CHROMIUM_ARGS)
+            self._generation += 1
+            return self._browser
+
+    def _is_healthy(self, slot):
+        return (
+            slot is not None
+            and slot.generation == self._generation
+            and slot.uses < self.max_page_uses
+            and self._browser is not None
+            and self._browser.is_connected()
+            and not slot.page.is_closed()
+        )
+
+    async def _checkout(self, slot):
+        if self._is_healthy(slot):
+            return slot
+        await self._discard(slot)
+        browser = await self._get_browser()
+        context = await browser.new_context()
+        # Documents arrive with CSS and images inlined; nothing may hit the network or disk
+        await context.route('**/*', lambda route: route.abort())
+        page = await context.new_page()
+        return _PooledPage(context, page, self._generation)
+
+    async def _discard(self, slot):
+        # Pages from a previous browser died with it
+        if slot is None or slot.generation != self._generation:
+            return
+        try:
+            await slot.context.close()
+        except Exception as e:
+            logger.warning(f"Could not close pooled page: {e}")
+
+    async def _render(self, html):
+        slot = await self._slots.get()
+        try:
+            slot = await self._checkout(slot)
+            await slot.page.set_content(html, wait_until="load", timeout=30000)
+            pdf = await slot.page.pdf(**PDF_OPTIONS)
+            slot.uses += 1
+            return pdf
+        except (Exception, asyncio.CancelledError):
+            # A failed or cancelled render may leave the page mid-load; never reuse it
+            await self._discard(slot)
+            slot = None
+            raise
+        finally:
+            self._slots.put_nowait(slot)
+
+    async def _close_pool(self):
+        if self._slots is not None:
+            while not self._slots.empty():
+                await self._discard(self._slots.get_nowait())
+        await self._close_browser()
+
+    async def _close_browser(self):
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception as e:
+                logger.warning(f"Could not close browser: {e}")
+            self._browser = None
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception as e:
+                logger.warning(f"Could not stop Playwright: {e}")
+            self._playwright = None
+
+
+class WeasyPrintRenderer(PdfRenderer):
+    """Pure-Python layout through WeasyPrint, no browser process.
+
+    The FontConfiguration and the parsed CSS objects are expensive to
+    build, so each thread keeps its own and reuses them until the
+    stylesheet's mtime changes; WeasyPrint objects are not shared across
+    threads. Any URL other than data: is refused, like the Chromium path.
+    """
+
+    name = 'weasyprint'
+    inline_css = False
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _state(self):
+        state = getattr(self._local, 'state', None)
+        if state is None:
+            try:
+                from weasyprint import CSS, default_url_fetcher
+                from weasyprint.text.fonts import FontConfiguration
+            except (ImportError, OSError) as e:
+                raise PdfGenerationError("The WeasyPrint engine is not available on this server.") from e
+            font_config = FontConfiguration()
+            margin = PDF_OPTIONS['margin']
+            page_css = CSS(
+                string=f"@page {{ size: {PDF_OPTIONS['format']}; margin: {margin['top']} {margin['right']} "
+                       f"{margin['bottom']} {margin['left']}; }}",
+                font_config=font_config
+            )
+            state = self._local.state = {
+                'css_class': CSS,
+                'url_fetcher': default_url_fetcher,
+                'font_config': font_config,
+                'page_css': page_css,
+                'stylesheets': {},
+            }
+        return state
+
+    def _stylesheet(self, state, css_path):
+        mtime = os.path.getmtime(css_path)
+        cached = state['stylesheets'].get(css_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        stylesheet = state['css_class'](filename=css_path, font_config=state['font_config'])
+        state['stylesheets'][css_path] = (mtime, stylesheet)
+        return stylesheet
+
+    def render(self, html, css_path=None):
+        from weasyprint import HTML
+        state = self._state()
+
+        def fetch_inline_only(url, *args, **kwargs):
+            if not url.startswith('data:'):
+                raise ValueError(f"Blocked resource: {url}")
+            return state['url_fetcher'](url, *args, **kwargs)
+
+        stylesheets = [state['page_css']]
+        if css_path:
+            stylesheets.append(self._stylesheet(state, css_path))
+        return HTML(string=html, url_fetcher=fetch_inline_only).write_pdf(
+            stylesheets=stylesheets,
+            font_config=state['font_config']
+        )
+
+
+renderer = PlaywrightRenderer()
+weasyprint_renderer = WeasyPrintRenderer()
+RENDERERS = {renderer.name: renderer, weasyprint_renderer.name: weasyprint_renderer}
+
+_engine_config = {'default': renderer.name, 'by_style': {}}
+
+
+def parse_engine_map(value):
+    """Parse 'classic=weasyprint,modern=playwright' into a dict"""
+    engines = {}
+    for item in (value or '').split(','):
+        if '=' not in item:
+            continue
+        style, engine = (part.strip() for part in item.split('=', 1))
+        if engine not in RENDERERS:
+            raise ValueError(f"Unknown PDF engine '{engine}' for style '{style}'")
+        engines[style] = engine
+    return engines
+
+
+def get_renderer(style=None):
+    """Renderer for a resume style: PDF_ENGINE_BY_STYLE first, then PDF_ENGINE"""
+    engine = _engine_config['by_style'].get(style, _engine_config['default'])
+    return RENDERERS[engine]
+
+
+def init_pdf(app):
+    default = app.config.get('PDF_ENGINE', renderer.name)
+    if default not in RENDERERS:
+        raise ValueError(f"Unknown PDF_ENGINE '{default}'")
+    _engine_config['default'] = default
+    _engine_config['by_style'] = parse_engine_map(app.config.get('PDF_ENGINE_BY_STYLE'))
+    for engine in RENDERERS.values():
+        engine.init_app(app)
+
+    app.add_url_rule('/health/pdf', 'pdf_health', pdf_health)
+
+
+def pdf_health():
+    """Status of every PDF engine in this worker; used by /health/pdf"""
+    if not _authorized():
+        abort(401)
+    engines = {}
+    ok = True
+    for name, engine in RENDERERS.items():
+        try:
+            engines[name] = engine.health_check()
+        except Exception as e:
+            engines[name] = {'running': False, 'error': str(e)}
+            ok = False
+            continue
+        # The browser starts with the first render; one that started and died is down
+        if engines[name].get('launched') and not engines[name].get('connected'):
+            ok = False
+    return jsonify({'ok': ok, 'default': _engine_config['default'], 'engines': engines}), 200 if ok else 503
+
+
+class PdfGenerationError(Exception):
+    """Raised when a resume cannot be turned into a PDF for a user-facing reason"""
+
+
+class RenderedPdf(NamedTuple):
+    name: str
+    data: Optional[bytes]
+
+
+_asset_cache = {}
+_asset_lock = threading.Lock()
+
+
+def _read_asset(path):
+    """File bytes, kept in memory until the file's mtime changes"""
+    mtime = os.path.getmtime(path)
+    with _asset_lock:
+        cached = _asset_cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+    with open(path, 'rb') as f:
+        data = f.read()
+    with _asset_lock:
+        _asset_cache[path] = (mtime, data)
+    return data
+
+
+def _data_uri(data, mimetype):
+    return f"data:{mimetype};base64,{base64.b64encode(data).decode('ascii')}"
+
+
+def _profile_image_src(profile_pic):
+    """Profile picture as a data URI, so the print page never loads a file"""
+    if profile_pic and profile_pic != DEFAULT_PICTURE:
+        try:
+            data = storage.uploads.read(profile_pic)
+            return _data_uri(data, mimetypes.guess_type(profile_pic)[0] or 'image/jpeg')
+        except FileNotFoundError:
+            pass
+    return _data_uri(_read_asset(DEFAULT_PICTURE_PATH), 'image/jpeg')
+
+
+def build_resume_document(resume, engine):
+    """Render the print HTML for engine; returns (html, css_path or None).
+
+    css_path is only returned for engines that load the stylesheet
+    themselves; otherwise it is already inlined in the HTML.
+    """
+    info = resume.personal_info
+    if not info:
+        raise PdfGenerationError("Resume information not found.")
+
+    css_path = os.path.join(STATIC_FOLDER, 'css', f"{resume.style}.css")
+    if not os.path.exists(css_path):
+        raise PdfGenerationError("Resume style not found.")
+
+    # The picture is only read and encoded when the body is not cached yet
+    resume_body = render_resume_fragment(
+        "resume_body.html", resume, 'download',
+        extra=lambda: {'is_download': True, 'image_src': _profile_image_src(info.profile_pic)}
+    )
+    html_content = render_template(
+        "resume_base.html",
+        resume=resume,
+        resume_body=resume_body,
+        is_download=True,
+        inline_css=Markup(_read_asset(css_path).decode('utf-8')) if engine.inline_css else None
+    )
+    return html_content, None if engine.inline_css else css_path
+
+
+def generate_resume_pdf(resume):
+    """Render a ResumeSnapshot to PDF and store it in the PDF cache.
+
+    Returns a RenderedPdf with the stored name, plus the bytes when they
+    were just rendered (None on a cache hit). Needs an app and request
+    context for render_template. Everything stays in memory: the picture
+    is inlined and the engine chosen for the style returns PDF bytes.
+    """
+    engine = get_renderer(resume.style)
+    html_content, css_path = build_resume_document(resume, engine)
+
+    # The picture is inlined; the stylesheet is hashed separately when the engine loads it itself
+    key_parts = [engine.name] if css_path is None else [engine.name, _read_asset(css_path)]
+    cache_key = pdf_cache.make_key(html_content, *key_parts)
+    cached_name = pdf_cache.get(resume.id, cache_key)
+    pdf_cache_lookups.inc(result='hit' if cached_name else 'miss')
+    if cached_name:
+        return RenderedPdf(cached_name, None)
+
+    try:
+        with timed(pdf_render_seconds, engine=engine.name):
+            pdf_bytes = engine.render(html_content, css_path)
+    except PdfGenerationError:
+        raise
+    except Exception as render_error:
+        logger.exception(f"PDF render error ({engine.name}): {render_error}")
+        raise Exception(f"PDF generation failed: {str(render_error)}")
+
+    if not pdf_bytes:
+        raise Exception("PDF file was not generated properly")
+
+    return RenderedPdf(pdf_cache.put(resume.id, cache_key, pdf_bytes), pdf_bytes)
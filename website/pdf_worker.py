@@ -0,0 +1,163 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask_login import login_user
+from sqlalchemy import func, update
+from .metrics import pdf_job_seconds, timed
+from .models import db, PdfJob, User
+from .pdf_service import generate_resume_pdf, PdfGenerationError
+from .resume_loader import load_resume_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_pdf_job(resume):
+    """Queue a PDF render for resume, reusing a job that has not started yet"""
+    job = PdfJob.query.filter_by(resume_id=resume.id, status='queued').order_by(PdfJob.id.desc()).first()
+    if job:
+        return job
+
+    job = PdfJob(user_id=resume.user_id, resume_id=resume.id)
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def recover_stale_jobs(timeout, max_attempts):
+    """Requeue jobs whose worker died mid-render"""
+    cutoff = datetime.utcnow() - timedelta(seconds=timeout)
+    stale = PdfJob.query.filter(PdfJob.status == 'running', PdfJob.started_at < cutoff).all()
+    for job in stale:
+        job.error = 'Render timed out or worker exited'
+        job.status = 'failed' if job.attempts >= max_attempts else 'queued'
+    if stale:
+        db.session.commit()
+    return len(stale)
+
+
+def claim_jobs(limit, per_user_limit):
+    """Atomically mark up to limit queued jobs as running and return their ids.
+
+    Each pass takes the oldest ready job of every user that is below its
+    running limit, so one user queueing hundreds of renders only gets one
+    slot per pass instead of the whole pool.
+    """
+    claimed = []
+    while len(claimed) < limit:
+        now = datetime.utcnow()
+        running = dict(
+            db.session.query(PdfJob.user_id, func.count(PdfJob.id))
+            .filter(PdfJob.status == 'running')
+            .group_by(PdfJob.user_id)
+            .all()
+        )
+        oldest_per_user = (
+            db.session.query(PdfJob.user_id, func.min(PdfJob.id))
+            .filter(PdfJob.status == 'queued', PdfJob.available_at <= now)
+            .group_by(PdfJob.user_id)
+            .order_by(func.min(PdfJob.id))
+            .all()
+        )
+
+        claimed_this_pass = 0
+        for user_id, job_id in oldest_per_user:
+            if len(claimed) >= limit:
+                break
+            if running.get(user_id, 0) >= per_user_limit:
+                continue
+            # The status guard makes the claim safe across several worker processes
+            result = db.session.execute(
+                update(PdfJob)
+                .where(PdfJob.id == job_id, PdfJob.status == 'queued')
+                .values(status='running', attempts=PdfJob.attempts + 1, started_at=now, updated_at=now)
+            )
+            if result.rowcount == 1:
+                claimed.append(job_id)
+                claimed_this_pass += 1
+        db.session.commit()
+
+        if claimed_this_pass == 0:
+            break
+    return claimed
+
+
+def process_job(app, job_id, max_attempts, retry_delay):
+    """Render one claimed job inside its own app and request context"""
+    with app.test_request_context(), timed(pdf_job_seconds) as labels:
+        job = db.session.get(PdfJob, job_id)
+        if job is None:
+            labels['status'] = 'missing'
+            return
+
+        try:
+            resume = load_resume_snapshot(job.resume_id)
+            if resume is None:
+                raise PdfGenerationError("Resume no longer exists.")
+            # Render exactly what the owner would get from a synchronous download
+            login_user(db.session.get(User, resume.user_id))
+            job.file_path = generate_resume_pdf(resume).name
+            job.status = 'done'
+            job.error = None
+        except PdfGenerationError as e:
+            job.status = 'failed'
+            job.error = str(e)
+        except Exception as e:
+            logger.warning(f"PDF job {job_id} error: {e}")
+            job.error = str(e)[:500]
+            if job.attempts >= max_attempts:
+                job.status = 'failed'
+            else:
+                job.status = 'queued'
+                job.available_at = datetime.utcnow() + timedelta(seconds=retry_delay * 2 ** (job.attempts - 1))
+
+        db.session.commit()
+        labels['status'] = job.status
+
+
+def run_worker(app, concurrency=None, per_user_limit=None, poll_interval=1.0, once=False):
+    """Drain the PdfJob table until interrupted, or until empty when once=True"""
+    concurrency = concurrency or app.config['PDF_WORKER_CONCURRENCY']
+    per_user_limit = per_user_limit or app.config['PDF_WORKER_PER_USER']
+    max_attempts = app.config['PDF_JOB_MAX_ATTEMPTS']
+    retry_delay = app.config['PDF_JOB_RETRY_DELAY']
+
+    running = {}
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='pdf-job') as pool:
+        while True:
+            with app.app_context():
+                recover_stale_jobs(app.config['PDF_JOB_TIMEOUT'], max_attempts)
+                free = concurrency - len(running)
+                job_ids = claim_jobs(free, per_user_limit) if free else []
+            for job_id in job_ids:
+                running[pool.submit(process_job, app, job_id, max_attempts, retry_delay)] = job_id
+
+            if not running:
+                if once:
+                    with app.app_context():
+                        pending = PdfJob.query.filter_by(status='queued').count()
+                    if not pending:
+                        break
+                time.sleep(poll_interval)
+                continue
+
+            done, _ = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+            for future in done:
+                job_id = running.pop(future)
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.exception(f"PDF job {job_id} crashed: {e}")
+
+
+def init_pdf_worker(app):
+    @app.cli.command('pdf-worker')
+    @click.option('--concurrency', type=int, help='Renders to run at once (default PDF_WORKER_CONCURRENCY).')
+    @click.option('--per-user', type=int, help='Running renders allowed per user (default PDF_WORKER_PER_USER).')
+    @click.option('--poll-interval', type=float, default=1.0, show_default=True)
+    @click.option('--once', is_flag=True, help='Exit once the queue is empty.')
+    def pdf_worker_command(concurrency, per_user, poll_interval, once):
+        """Render queued PDF download jobs."""
+        run_worker(current_app._get_current_object(), concurrency, per_user, poll_interval, once)
@@ -0,0 +1,103 @@
+import json
+import sys
+from datetime import datetime
+import click
+from sqlalchemy import select, text
+from .models import (db, Resume, PersonalInfo, Education, Experience, Project, Skill, Certification,
+                     ResumeAnalytic, ResumeAnalyticRollup, EmailNotification, PdfJob)
+
+
+def plan_checks():
+    """(description, statement, table that must be read through an index) for the hot queries"""
+    now = datetime.utcnow()
+    checks = [
+        ('manage page: resumes of a user', select(Resume).where(Resume.user_id == 1), 'resume'),
+        ('resume load: personal info', select(PersonalInfo).where(PersonalInfo.resume_id == 1), 'personal_info'),
+    ]
+    for model in (Education, Experience, Project, Skill, Certification):
+        checks.append((f"resume load: {model.__tablename__} rows", select(model).where(model.resume_id == 1),
+                       model.__tablename__))
+    checks += [
+        ('resume stats: raw analytics of a resume', select(ResumeAnalytic).where(ResumeAnalytic.resume_id == 1),
+         'resume_analytic'),
+        ('dashboard: raw analytics of a user', select(ResumeAnalytic.resume_id, ResumeAnalytic.action).where(
+            ResumeAnalytic.user_id == 1, ResumeAnalytic.action.in_(['view', 'download'])), 'resume_analytic'),
+        ('dashboard: rollups of a user', select(ResumeAnalyticRollup).where(
+            ResumeAnalyticRollup.user_id == 1, ResumeAnalyticRollup.granularity == 'day',
+            ResumeAnalyticRollup.bucket_start >= now), 'resume_analytic_rollup'),
+        ('delete resume: rollups of a resume', select(ResumeAnalyticRollup.id).where(
+            ResumeAnalyticRollup.resume_id == 1), 'resume_analytic_rollup'),
+        ('download: queued job of a resume', select(PdfJob).where(PdfJob.resume_id == 1, PdfJob.status == 'queued'),
+         'pdf_job'),
+        ('pdf worker: claimable jobs', select(PdfJob.id).where(PdfJob.status == 'queued', PdfJob.available_at <= now),
+         'pdf_job'),
+        ('email worker: due messages', select(EmailNotification.id).where(
+            EmailNotification.status == 'queued', EmailNotification.next_attempt_at <= now), 'email_notification'),
+    ]
+    return checks
+
+
+def _explain_sqlite(sql):
+    rows = db.session.execute(text('EXPLAIN QUERY PLAN ' + sql)).all()
+    return [row[-1] for row in rows]
+
+
+def _sqlite_full_scans(details, table):
+    # "SCAN resume" is a table scan; "SCAN resume USING COVERING INDEX ..." is not
+    return [detail for detail in details if detail.split(' ')[:2] == ['SCAN', table] and 'INDEX' not in detail]
+
+
+def _explain_postgres(sql):
+    # Tiny development tables would make the planner prefer a sequential scan;
+    # this asks whether an index can serve the query at all
+    db.session.execute(text('SET LOCAL enable_seqscan = off'))
+    plan = db.session.execute(text('EXPLAIN (FORMAT JSON) ' + sql)).scalar()
+    return plan if isinstance(plan, list) else json.loads(plan)
+
+
+def _postgres_full_scans(plan, table):
+    scans = []
+    nodes = [entry['Plan'] for entry in plan]
+    while nodes:
+        node = nodes.pop()
+        if node.get('Node Type') == 'Seq Scan' and node.get('Relation Name') == table:
+            scans.append(f"Seq Scan on {table}")
+        nodes.extend(node.get('Plans', []))
+    return scans
+
+
+def check_query_plans():
+    """Explain every hot query; returns a list of (description, ok, plan lines)"""
+    dialect = db.engine.dialect
+    results = []
+    for description, statement, table in plan_checks():
+        sql = str(statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+        if dialect.name == 'postgresql':
+            plan = _explain_postgres(sql)
+            scans = _postgres_full_scans(plan, table)
+            lines = [json.dumps(plan)]
+        elif dialect.name == 'sqlite':
+            lines = _explain_sqlite(sql)
+            scans = _sqlite_full_scans(lines, table)
+        else:
+            raise click.ClickException(f"Query plan checks are not implemented for {dialect.name}")
+        db.session.rollback()
+        results.append((description, not scans, lines))
+    return results
+
+
+def init_query_plans(app):
+    @app.cli.command('query-plans')
+    @click.option('--verbose', is_flag=True, help='Print the plan of every query, not only failures.')
+    def query_plans_command(verbose):
+        """Fail if a hot-path query would scan a whole table instead of using an index."""
+        failed = 0
+        for description, ok, lines in check_query_plans():
+            click.echo(f"{'ok  ' if ok else 'SCAN'} {description}")
+            if verbose or not ok:
+                for line in lines:
+                    click.echo(f"       {line}")
+            failed += not ok
+        if failed:
+            click.echo(f"{failed} queries fall back to a full table scan")
+            sys.exit(1)
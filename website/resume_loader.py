@@ -0,0 +1,134 @@
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, selectinload
+from .models import db, Resume
+
+
+@dataclass(frozen=True)
+class PersonalInfoSnapshot:
+    profile_pic: Optional[str]
+    full_name: Optional[str]
+    phone: Optional[str]
+    resume_email: Optional[str]
+    linkedin: Optional[str]
+    github: Optional[str]
+    address: Optional[str]
+    summary: Optional[str]
+
+
+@dataclass(frozen=True)
+class EducationSnapshot:
+    id: int
+    degree: Optional[str]
+    institution: Optional[str]
+    start_year: Optional[int]
+    end_year: Optional[int]
+    cgpa: Optional[float]
+    description: Optional[str]
+
+
+@dataclass(frozen=True)
+class ExperienceSnapshot:
+    id: int
+    job_title: Optional[str]
+    company: Optional[str]
+    start_date: Optional[str]
+    end_date: Optional[str]
+    description: Optional[str]
+
+
+@dataclass(frozen=True)
+class ProjectSnapshot:
+    id: int
+    title: Optional[str]
+    description: Optional[str]
+    tech_stack: Optional[str]
+    link: Optional[str]
+
+
+@dataclass(frozen=True)
+class SkillSnapshot:
+    id: int
+    name: Optional[str]
+    level: Optional[str]
+
+
+@dataclass(frozen=True)
+class CertificationSnapshot:
+    id: int
+    name: Optional[str]
+    issuer: Optional[str]
+    issue_date: Optional[str]
+    credential_link: Optional[str]
+
+
+@dataclass(frozen=True)
+class ResumeSnapshot:
+    """Read-only view of a resume and every section, detached from the session"""
+    id: int
+    user_id: int
+    title: str
+    style: str
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    version: int
+    download_count: int
+    personal_info: Optional[PersonalInfoSnapshot]
+    education: Tuple[EducationSnapshot, ...]
+    experience: Tuple[ExperienceSnapshot, ...]
+    projects: Tuple[ProjectSnapshot, ...]
+    skills: Tuple[SkillSnapshot, ...]
+    certifications: Tuple[CertificationSnapshot, ...]
+
+
+def _copy(snapshot_cls, row):
+    return snapshot_cls(**{f.name: getattr(row, f.name) for f in fields(snapshot_cls)})
+
+
+def resume_aggregate_options():
+    """Loader options that fetch a resume and all its sections in one round-trip per table"""
+    return (
+        joinedload(Resume.personal_info),
+        selectinload(Resume.education),
+        selectinload(Resume.experience),
+        selectinload(Resume.projects),
+        selectinload(Resume.skills),
+        selectinload(Resume.certifications),
+    )
+
+
+def load_resume(resume_id):
+    """Fetch the Resume ORM object with every section eagerly loaded"""
+    stmt = select(Resume).options(*resume_aggregate_options()).where(Resume.id == resume_id)
+    return db.session.execute(stmt).unique().scalar_one_or_none()
+
+
+def snapshot_resume(resume):
+    """Freeze an eagerly loaded Resume into a ResumeSnapshot"""
+    info = resume.personal_info
+    return ResumeSnapshot(
+        id=resume.id,
+        user_id=resume.user_id,
+        title=resume.title,
+        style=resume.style,
+        created_at=resume.created_at,
+        updated_at=resume.updated_at,
+        version=resume.version or 1,
+        download_count=resume.download_count or 0,
+        personal_info=_copy(PersonalInfoSnapshot, info) if info else None,
+        education=tuple(_copy(EducationSnapshot, row) for row in resume.education),
+        experience=tuple(_copy(ExperienceSnapshot, row) for row in resume.experience),
+        projects=tuple(_copy(ProjectSnapshot, row) for row in resume.projects),
+        skills=tuple(_copy(SkillSnapshot, row) for row in resume.skills),
+        certifications=tuple(_copy(CertificationSnapshot, row) for row in resume.certifications),
+    )
+
+
+def load_resume_snapshot(resume_id):
+    """Load a resume aggregate and return it as a ResumeSnapshot, or None if missing"""
+    resume = load_resume(resume_id)
+    if resume is None:
+        return None
+    return snapshot_resume(resume)
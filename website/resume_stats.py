@@ -0,0 +1,79 @@
+import click
+from sqlalchemy import func, select, update
+from .models import db, Resume, PersonalInfo
+from .section_sync import SECTIONS
+from .utils import completion_percentage, get_resume_statistics
+
+STAT_COLUMNS = (
+    Resume.has_personal_info,
+    Resume.education_count,
+    Resume.experience_count,
+    Resume.project_count,
+    Resume.skill_count,
+    Resume.certification_count,
+    Resume.completion_percentage,
+)
+
+
+def bulk_resume_statistics(user_id=None, resume_ids=None):
+    """Completion statistics for many resumes in one query, keyed by resume id"""
+    query = select(Resume.id, *STAT_COLUMNS)
+    if user_id is not None:
+        query = query.where(Resume.user_id == user_id)
+    if resume_ids is not None:
+        query = query.where(Resume.id.in_(resume_ids))
+    return {row.id: get_resume_statistics(row) for row in db.session.execute(query)}
+
+
+def _actual_counts_query():
+    columns = [Resume.id, Resume.updated_at, *STAT_COLUMNS]
+    for section in SECTIONS:
+        model = section['model']
+        columns.append(
+            select(func.count(model.id)).where(model.resume_id == Resume.id)
+            .scalar_subquery().label('actual_' + section['counter'])
+        )
+    columns.append(select(PersonalInfo.id).where(PersonalInfo.resume_id == Resume.id).exists().label('actual_info'))
+    return select(*columns)
+
+
+def reconcile_resume_stats(batch_size=1000, dry_run=False):
+    """Recount every resume's sections and repair counters that drifted.
+
+    Works through resumes in id order, one query per batch, and returns
+    (checked, repaired).
+    """
+    checked = repaired = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            _actual_counts_query().where(Resume.id > last_id).order_by(Resume.id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        fixes = []
+        for row in rows:
+            actual = {section['counter']: getattr(row, 'actual_' + section['counter']) for section in SECTIONS}
+            values = dict(actual, has_personal_info=bool(row.actual_info))
+            values['completion_percentage'] = completion_percentage(values['has_personal_info'], actual)
+            if any(getattr(row, column) != value for column, value in values.items()):
+                # Keep updated_at: the resume's content did not change
+                fixes.append({'id': row.id, 'updated_at': row.updated_at, **values})
+        if fixes and not dry_run:
+            db.session.execute(update(Resume), fixes)
+            db.session.commit()
+        checked += len(rows)
+        repaired += len(fixes)
+        last_id = rows[-1].id
+    return checked, repaired
+
+
+def init_resume_stats(app):
+    @app.cli.command('resume-stats-reconcile')
+    @click.option('--batch-size', type=int, default=1000, show_default=True)
+    @click.option('--dry-run', is_flag=True, help='Only report how many resumes have drifted.')
+    def resume_stats_reconcile_command(batch_size, dry_run):
+        """Recount resume sections and fix the denormalized completeness counters."""
+        checked, repaired = reconcile_resume_stats(batch_size, dry_run)
+        verb = 'would repair' if dry_run else 'repaired'
+        click.echo(f"Checked {checked} resumes, {verb} {repaired}")
@@ -0,0 +1,269 @@
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+import click
+from markupsafe import Markup, escape
+from sqlalchemy import text
+from .models import db, Resume
+from .resume_loader import load_resume_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Snippet highlight markers; the text is HTML-escaped before they become <mark>
+_MARK_START = '\x02'
+_MARK_STOP = '\x03'
+
+# The resume_search table itself is created by migration 0005
+
+_POSTGRES_UPSERT = """
+INSERT INTO resume_search (resume_id, user_id, title, full_name, summary, skills, experience, projects, document)
+VALUES (
+    :resume_id, :user_id, :title, :full_name, :summary, :skills, :experience, :projects,
+    setweight(to_tsvector('english', coalesce(:title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(:full_name, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(:skills, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(:summary, '')), 'C') ||
+    setweight(to_tsvector('english', coalesce(:experience, '') || ' ' || coalesce(:projects, '')), 'D')
+)
+ON CONFLICT (resume_id) DO UPDATE SET
+    user_id = EXCLUDED.user_id, title = EXCLUDED.title, full_name = EXCLUDED.full_name,
+    summary = EXCLUDED.summary, skills = EXCLUDED.skills, experience = EXCLUDED.experience,
+    projects = EXCLUDED.projects, document = EXCLUDED.document
+"""
+
+_POSTGRES_SEARCH = """
+SELECT r.id, r.title, r.style, r.created_at, r.download_count, s.full_name,
+       ts_headline('english', concat_ws(' ', s.summary, s.skills, s.experience, s.projects), q, :headline_opts) AS snippet,
+       ts_rank(s.document, q) AS rank,
+       count(*) OVER () AS total
+FROM resume_search s
+JOIN resume r ON r.id = s.resume_id
+CROSS JOIN to_tsquery('english', :tsquery) q
+WHERE s.user_id = :user_id AND s.document @@ q
+ORDER BY rank DESC, r.id DESC
+LIMIT :limit OFFSET :offset
+"""
+
+# FTS5 auxiliary functions cannot run inside a window query, so rank in a CTE first
+_SQLITE_FTS_SEARCH = """
+WITH matches AS (
+    SELECT resume_id, full_name,
+           snippet(resume_search, -1, :mark_start, :mark_stop, '...', 16) AS snippet,
+           bm25(resume_search, 0.0, 0.0, 10.0, 8.0, 3.0, 4.0, 2.0, 2.0) AS rank
+    FROM resume_search
+    WHERE resume_search MATCH :match AND user_id = :user_id
+)
+SELECT r.id, r.title, r.style, r.created_at, r.download_count, m.full_name, m.snippet, m.rank,
+       count(*) OVER () AS total
+FROM matches m
+JOIN resume r ON r.id = m.resume_id
+ORDER BY m.rank, r.id DESC
+LIMIT :limit OFFSET :offset
+"""
+
+_SQLITE_LIKE_SEARCH = """
+SELECT r.id, r.title, r.style, r.created_at, r.download_count, s.full_name,
+       NULL AS snippet, 0 AS rank, count(*) OVER () AS total
+FROM resume_search s
+JOIN resume r ON r.id = s.resume_id
+WHERE s.user_id = :user_id AND ({conditions})
+ORDER BY r.id DESC
+LIMIT :limit OFFSET :offset
+"""
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    id: int
+    title: str
+    style: str
+    created_at: Optional[datetime]
+    download_count: int
+    full_name: Optional[str]
+    snippet: Optional[Markup]
+    rank: float
+
+
+@dataclass(frozen=True)
+class SearchPage:
+    hits: Tuple[SearchHit, ...]
+    total: int
+    page: int
+    per_page: int
+
+    @property
+    def pages(self):
+        return max(1, -(-self.total // self.per_page))
+
+    @property
+    def has_prev(self):
+        return self.page > 1
+
+    @property
+    def has_next(self):
+        return self.page < self.pages
+
+
+def _dialect():
+    return db.engine.dialect.name
+
+
+def _tokens(query):
+    return re.findall(r'\w+', query.lower())[:16]
+
+
+def _highlight(snippet):
+    if not snippet:
+        return None
+    html = str(escape(snippet))
+    return Markup(html.replace(_MARK_START, '<mark>').replace(_MARK_STOP, '</mark>'))
+
+
+def _sqlite_has_fts_table():
+    row = db.session.execute(
+        text("SELECT sql FROM sqlite_master WHERE name = 'resume_search'")
+    ).first()
+    return bool(row and 'fts5' in (row[0] or '').lower())
+
+
+def _document(resume):
+    info = resume.personal_info
+    return {
+        'resume_id': resume.id,
+        'user_id': resume.user_id,
+        'title': resume.title,
+        'full_name': info.full_name if info else None,
+        'summary': info.summary if info else None,
+        'skills': ' '.join(s.name or '' for s in resume.skills),
+        'experience': ' '.join(
+            ' '.join(filter(None, [e.job_title, e.company, e.description])) for e in resume.experience
+        ),
+        'projects': ' '.join(
+            ' '.join(filter(None, [p.title, p.description, p.tech_stack])) for p in resume.projects
+        ),
+    }
+
+
+def _write_document(doc):
+    if _dialect() == 'postgresql':
+        db.session.execute(text(_POSTGRES_UPSERT), doc)
+        return
+    # rowid mirrors resume_id so replacing a document is a keyed lookup, not a scan
+    db.session.execute(text("DELETE FROM resume_search WHERE rowid = :resume_id"), doc)
+    db.session.execute(
+        text(
+            "INSERT INTO resume_search (rowid, resume_id, user_id, title, full_name, summary, skills, experience, projects) "
+            "VALUES (:resume_id, :resume_id, :user_id, :title, :full_name, :summary, :skills, :experience, :projects)"
+        ),
+        doc,
+    )
+
+
+def index_resume(resume_id):
+    """Refresh the search document for one resume and commit"""
+    try:
+        resume = load_resume_snapshot(resume_id)
+        if resume is None:
+            remove_from_index(resume_id)
+        else:
+            _write_document(_document(resume))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.exception(f"Error indexing resume {resume_id}: {e}")
+
+
+def remove_from_index(resume_id):
+    """Delete a resume's search document; the caller commits"""
+    key = 'resume_id' if _dialect() == 'postgresql' else 'rowid'
+    db.session.execute(text(f"DELETE FROM resume_search WHERE {key} = :resume_id"), {'resume_id': resume_id})
+
+
+def rebuild_search_index(batch_size=200):
+    """Rebuild every search document from the resume tables"""
+    if _dialect() == 'postgresql':
+        db.session.execute(text("TRUNCATE resume_search"))
+    else:
+        db.session.execute(text("DELETE FROM resume_search"))
+    db.session.commit()
+
+    count = 0
+    last_id = 0
+    while True:
+        ids = db.session.scalars(
+            db.select(Resume.id).where(Resume.id > last_id).order_by(Resume.id).limit(batch_size)
+        ).all()
+        if not ids:
+            break
+        for resume_id in ids:
+            resume = load_resume_snapshot(resume_id)
+            if resume is not None:
+                _write_document(_document(resume))
+                count += 1
+        db.session.commit()
+        db.session.expunge_all()
+        last_id = ids[-1]
+    return count
+
+
+def search_resumes(user_id, query, page=1, per_page=10):
+    """Rank a user's resumes against query with a single indexed SQL query"""
+    page = max(page, 1)
+    tokens = _tokens(query)
+    if not tokens:
+        return SearchPage(hits=(), total=0, page=page, per_page=per_page)
+
+    params = {'user_id': user_id, 'limit': per_page, 'offset': (page - 1) * per_page}
+    dialect = _dialect()
+    if dialect == 'postgresql':
+        sql = _POSTGRES_SEARCH
+        params['tsquery'] = ' & '.join(f"{token}:*" for token in tokens)
+        params['headline_opts'] = (
+            f"StartSel={_MARK_START}, StopSel={_MARK_STOP}, MaxWords=24, MinWords=8, MaxFragments=2"
+        )
+    elif _sqlite_has_fts_table():
+        sql = _SQLITE_FTS_SEARCH
+        params['match'] = ' '.join(f'"{token}"*' for token in tokens)
+        params['mark_start'] = _MARK_START
+        params['mark_stop'] = _MARK_STOP
+    else:
+        columns = ['s.title', 's.full_name', 's.summary', 's.skills', 's.experience', 's.projects']
+        conditions = []
+        for i, token in enumerate(tokens):
+            params[f'tok{i}'] = f'%{token}%'
+            conditions.append('(' + ' OR '.join(f"{col} LIKE :tok{i}" for col in columns) + ')')
+        sql = _SQLITE_LIKE_SEARCH.format(conditions=' AND '.join(conditions))
+
+    stmt = text(sql).columns(
+        db.column('id', db.Integer), db.column('title', db.String), db.column('style', db.String),
+        db.column('created_at', db.DateTime), db.column('download_count', db.Integer),
+        db.column('full_name', db.String), db.column('snippet', db.String),
+        db.column('rank', db.Float), db.column('total', db.Integer),
+    )
+    rows = db.session.execute(stmt, params).all()
+
+    hits = tuple(
+        SearchHit(
+            id=row.id,
+            title=row.title,
+            style=row.style,
+            created_at=row.created_at,
+            download_count=row.download_count or 0,
+            full_name=row.full_name,
+            snippet=_highlight(row.snippet),
+            rank=row.rank or 0.0,
+        )
+        for row in rows
+    )
+    total = rows[0].total if rows else 0
+    return SearchPage(hits=hits, total=total, page=page, per_page=per_page)
+
+
+def init_search(app):
+    @app.cli.command('search-reindex')
+    def search_reindex_command():
+        """Rebuild the resume full-text search index."""
+        count = rebuild_search_index()
+        click.echo(f"Indexed {count} resumes")
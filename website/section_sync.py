@@ -0,0 +1,209 @@
+import threading
+from sqlalchemy import insert, update, delete
+from .models import db, Education, Experience, Project, Skill, Certification
+from .utils import completion_percentage
+
+# Per section: model, relationship on Resume, its row counter on Resume, hidden
+# row-id input, the field that must be non-empty for a row to be kept, and
+# column -> form list name.
+SECTIONS = [
+    {
+        'model': Education,
+        'relationship': 'education',
+        'counter': 'education_count',
+        'id_field': 'edu_id[]',
+        'required': 'degree',
+        'fields': {
+            'degree': 'degree[]',
+            'institution': 'institution[]',
+            'start_year': 'start_year[]',
+            'end_year': 'end_year[]',
+            'description': 'edu_description[]',
+        },
+        'defaults': {},
+    },
+    {
+        'model': Experience,
+        'relationship': 'experience',
+        'counter': 'experience_count',
+        'id_field': 'exp_id[]',
+        'required': 'job_title',
+        'fields': {
+            'job_title': 'job_title[]',
+            'company': 'company[]',
+            'start_date': 'start_date[]',
+            'end_date': 'end_date[]',
+            'description': 'exp_description[]',
+        },
+        'defaults': {},
+    },
+    {
+        'model': Project,
+        'relationship': 'projects',
+        'counter': 'project_count',
+        'id_field': 'project_id[]',
+        'required': 'title',
+        'fields': {
+            'title': 'project_title[]',
+            'description': 'project_description[]',
+            'tech_stack': 'tech_stack[]',
+            'link': 'project_link[]',
+        },
+        'defaults': {},
+    },
+    {
+        'model': Skill,
+        'relationship': 'skills',
+        'counter': 'skill_count',
+        'id_field': 'skill_id[]',
+        'required': 'name',
+        'fields': {
+            'name': 'skill_name[]',
+            'level': 'skill_level[]',
+        },
+        'defaults': {'level': 'intermediate'},
+    },
+    {
+        'model': Certification,
+        'relationship': 'certifications',
+        'counter': 'certification_count',
+        'id_field': 'cert_id[]',
+        'required': 'name',
+        'fields': {
+            'name': 'cert_name[]',
+            'issuer': 'issuer[]',
+            'issue_date': 'issue_date[]',
+            'credential_link': 'credential_link[]',
+        },
+        'defaults': {},
+    },
+]
+
+_stats_lock = threading.Lock()
+save_stats = {
+    'saves': 0,
+    'rows_inserted': 0,
+    'rows_updated': 0,
+    'rows_deleted': 0,
+    'rows_unchanged': 0,
+    'rows_touched': 0,
+}
+
+
+def _normalize(value):
+    # SQLite hands back 2020 for a '2020' form value stored in an Integer column
+    return '' if value is None else str(value)
+
+
+def _parse_row_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_section_form(form, section):
+    """Turn the parallel form lists for one section into (row_id, values) pairs"""
+    columns = {column: form.getlist(name) for column, name in section['fields'].items()}
+    row_ids = form.getlist(section['id_field'])
+    required = columns[section['required']]
+
+    rows = []
+    for i, key_value in enumerate(required):
+        if not key_value.strip():  # Only save if not empty
+            continue
+        values = {}
+        for column, submitted in columns.items():
+            default = section['defaults'].get(column, '')
+            values[column] = submitted[i] if i < len(submitted) else default
+        row_id = _parse_row_id(row_ids[i]) if i < len(row_ids) else None
+        rows.append((row_id, values))
+    return rows
+
+
+def reconcile_section(model, resume_id, existing_rows, submitted_rows):
+    """Apply the difference between stored rows and submitted rows.
+
+    Rows are matched by the id carried through the form. Only ids that
+    already belong to this resume are honoured, so a tampered id becomes an
+    insert rather than an update of someone else's row.
+    """
+    existing = {row.id: row for row in existing_rows}
+    matched = set()
+    updates = []
+    inserts = []
+    unchanged = 0
+
+    for row_id, values in submitted_rows:
+        row = existing.get(row_id)
+        if row is None or row_id in matched:
+            inserts.append({'resume_id': resume_id, **values})
+            continue
+        matched.add(row_id)
+        if any(_normalize(getattr(row, column)) != _normalize(value) for column, value in values.items()):
+            updates.append({'id': row_id, **values})
+        else:
+            unchanged += 1
+
+    deleted_ids = [row_id for row_id in existing if row_id not in matched]
+
+    if updates:
+        db.session.execute(update(model), updates)
+    if inserts:
+        db.session.execute(insert(model), inserts)
+    if deleted_ids:
+        db.session.execute(delete(model).where(model.id.in_(deleted_ids)))
+
+    return {
+        'inserted': len(inserts),
+        'updated': len(updates),
+        'deleted': len(deleted_ids),
+        'unchanged': unchanged,
+    }
+
+
+def reconcile_resume_sections(resume, form):
+    """Sync every list section of an eagerly loaded Resume with a submitted form.
+
+    Statements are only added to the session; the caller commits, so the
+    whole save is one transaction. Returns per-section change counts.
+    """
+    results = {}
+    for section in SECTIONS:
+        existing_rows = getattr(resume, section['relationship'])
+        submitted_rows = parse_section_form(form, section)
+        results[section['relationship']] = reconcile_section(
+            section['model'], resume.id, existing_rows, submitted_rows
+        )
+    update_section_counters(resume, results)
+
+    with _stats_lock:
+        save_stats['saves'] += 1
+        save_stats['rows_touched'] += rows_touched(results)
+        for counts in results.values():
+            save_stats['rows_inserted'] += counts['inserted']
+            save_stats['rows_updated'] += counts['updated']
+            save_stats['rows_deleted'] += counts['deleted']
+            save_stats['rows_unchanged'] += counts['unchanged']
+    return results
+
+
+def update_section_counters(resume, results):
+    """Set the denormalized counters on resume from one reconcile's results.
+
+    Every kept row was either matched (updated or unchanged) or inserted,
+    so the new counts follow without a COUNT query; they are written in
+    the same transaction as the rows.
+    """
+    counts = {}
+    for section in SECTIONS:
+        changes = results[section['relationship']]
+        counts[section['counter']] = changes['updated'] + changes['unchanged'] + changes['inserted']
+        setattr(resume, section['counter'], counts[section['counter']])
+    resume.has_personal_info = resume.personal_info is not None
+    resume.completion_percentage = completion_percentage(resume.has_personal_info, counts)
+
+
+def rows_touched(results):
+    """Number of rows written by one reconcile_resume_sections call"""
+    return sum(c['inserted'] + c['updated'] + c['deleted'] for c in results.values())
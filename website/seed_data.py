@@ -0,0 +1,305 @@
+import csv
+import io
+import random
+import time
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from sqlalchemy import func, select, text
+from werkzeug.security import generate_password_hash
+from .auth_service import canonical_method
+from .models import (db, User, Resume, PersonalInfo, Education, Experience, Project, Skill, Certification,
+                     ResumeAnalytic, EmailNotification)
+from .utils import SECTION_COUNTERS, completion_percentage
+
+SEED_EMAIL_DOMAIN = 'seed.example.com'
+DEFAULT_PASSWORD = 'Seed-pass1!'
+# Ids reserved from a table's sequence at a time; the unused tail of the last block is a gap
+ID_BLOCK = 1000
+
+# Parents before children, so every batch satisfies the foreign keys
+LOAD_ORDER = [User, Resume, PersonalInfo, Education, Experience, Project, Skill, Certification,
+              ResumeAnalytic, EmailNotification]
+
+FIRST_NAMES = ('Aarav', 'Maya', 'Liam', 'Sofia', 'Noah', 'Zara', 'Ethan', 'Priya', 'Lucas', 'Amara', 'Kenji',
+               'Elena', 'Omar', 'Chloe', 'Mateo', 'Ananya', 'Felix', 'Nadia', 'Jonas', 'Leila')
+LAST_NAMES = ('Sharma', 'Okafor', 'Nguyen', 'Garcia', 'Smith', 'Kowalski', 'Haddad', 'Tanaka', 'Silva', 'Müller',
+              'Patel', 'Johansson', 'Rossi', 'Mensah', 'Kim', 'Dubois', 'Ivanova', 'Brown', 'Reyes', 'Chen')
+ROLES = ('Software Engineer', 'Data Analyst', 'Product Designer', 'Backend Developer', 'DevOps Engineer',
+         'Frontend Developer', 'Data Scientist', 'QA Engineer', 'Project Manager', 'Security Analyst')
+COMPANIES = ('Acme Corp', 'Globex', 'Initech', 'Umbrella Labs', 'Stark Industries', 'Wayne Tech', 'Hooli',
+             'Vandelay Imports', 'Soylent Systems', 'Cyberdyne')
+DEGREES = ('B.Tech Computer Science', 'BSc Mathematics', 'MSc Data Science', 'BA Design', 'MBA',
+           'BSc Information Systems', 'M.Tech Software Engineering', 'BSc Physics')
+SCHOOLS = ('State University', 'Institute of Technology', 'City College', 'National University',
+           'Polytechnic Institute', 'University of the Coast')
+SKILLS = ('Python', 'Flask', 'SQL', 'PostgreSQL', 'JavaScript', 'React', 'Docker', 'Kubernetes', 'AWS', 'Git',
+          'Linux', 'Pandas', 'Figma', 'Java', 'Go', 'Redis', 'GraphQL', 'Terraform', 'CI/CD', 'Agile')
+LEVELS = ('Beginner', 'Intermediate', 'Advanced', 'Expert')
+CERTIFICATIONS = (('AWS Certified Developer', 'Amazon'), ('Professional Scrum Master', 'Scrum.org'),
+                  ('Google Data Analytics', 'Google'), ('CKA', 'CNCF'), ('Security+', 'CompTIA'))
+VERBS = ('Built', 'Led', 'Designed', 'Automated', 'Migrated', 'Optimized', 'Shipped', 'Maintained')
+OBJECTS = ('a billing service', 'the reporting pipeline', 'an internal dashboard', 'CI for 40 repositories',
+           'the public API', 'a recommendation engine', 'the mobile checkout', 'data ingestion jobs')
+OUTCOMES = ('cutting latency by half', 'saving 10 hours a week', 'serving 2M users', 'reducing costs by 30%',
+            'with zero downtime', 'ahead of schedule')
+
+
+class SeedWriter:
+    """Buffers generated rows per table and writes them in bulk, one transaction per batch.
+
+    PostgreSQL gets COPY ... FROM STDIN through the psycopg2 connection;
+    other databases get a single executemany per table. Primary keys are
+    reserved from the table's sequence in blocks, so children can
+    reference parents without RETURNING and rows the running app inserts
+    meanwhile never collide with seeded ones.
+    """
+
+    def __init__(self, id_block=ID_BLOCK):
+        self.rows = {model: [] for model in LOAD_ORDER}
+        self.written = {model.__tablename__: 0 for model in LOAD_ORDER}
+        self.id_block = id_block
+        self.ids = {model: iter(()) for model in LOAD_ORDER}
+        self.reserved = {model: 0 for model in LOAD_ORDER}
+        self.postgres = db.engine.dialect.name == 'postgresql'
+
+    def new_id(self, model):
+        row_id = next(self.ids[model], None)
+        if row_id is None:
+            with db.engine.begin() as connection:
+                if self.postgres:
+                    ids = self._reserve_postgres(connection, model)
+                else:
+                    ids = self._reserve_sqlite(connection, model)
+            self.ids[model] = iter(ids)
+            row_id = next(self.ids[model])
+        return row_id
+
+    def _reserve_postgres(self, connection, model):
+        # nextval never hands the same id out twice, whoever else is inserting
+        return sorted(connection.execute(
+            text("SELECT nextval(pg_get_serial_sequence(:table, 'id')) FROM generate_series(1, :count)"),
+            {'table': f'"{model.__tablename__}"', 'count': self.id_block}
+        ).scalars())
+
+    def _reserve_sqlite(self, connection, model):
+        table = model.__tablename__
+        top = connection.scalar(select(func.coalesce(func.max(model.id), 0)))
+        if not model.__table__.dialect_options['sqlite']['autoincrement']:
+            # A plain rowid table has no sequence to hold the block; the app takes MAX(id) + 1
+            start = max(top, self.reserved[model]) + 1
+            self.reserved[model] = start + self.id_block - 1
+            return range(start, start + self.id_block)
+        # The first write takes SQLite's write lock, so nobody moves the sequence in between
+        params = {'table': table, 'top': top, 'count': self.id_block}
+        moved = connection.execute(text(
+            "UPDATE sqlite_sequence SET seq = MAX(seq, :top) + :count WHERE name = :table"
+        ), params).rowcount
+        if not moved:
+            connection.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES (:table, :top + :count)"),
+                               params)
+        last = connection.scalar(text("SELECT seq FROM sqlite_sequence WHERE name = :table"), params)
+        return range(last - self.id_block + 1, last + 1)
+
+    def add(self, model, **values):
+        if 'id' not in values:
+            values['id'] = self.new_id(model)
+        self.rows[model].append(values)
+        return values['id']
+
+    def flush(self):
+        with db.engine.begin() as connection:
+            for model in LOAD_ORDER:
+                rows = self.rows[model]
+                if not rows:
+                    continue
+                if self.postgres:
+                    self._copy(connection, model, rows)
+                else:
+                    connection.execute(model.__table__.insert(), rows)
+                self.written[model.__tablename__] += len(rows)
+                self.rows[model] = []
+
+    def _copy(self, connection, model, rows):
+        columns = list(rows[0])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            # An unquoted empty field is NULL in COPY's csv format
+            writer.writerow(['' if row[c] is None else _copy_value(row[c]) for c in columns])
+        buffer.seek(0)
+        cursor = connection.connection.cursor()
+        try:
+            quoted = ', '.join(f'"{column}"' for column in columns)
+            cursor.copy_expert(f'COPY "{model.__tablename__}" ({quoted}) FROM STDIN WITH (FORMAT csv)', buffer)
+        finally:
+            cursor.close()
+
+    def finish(self):
+        self.flush()
+        if self.postgres:
+            # Ids came from nextval already; this only catches rows written with explicit ids
+            # elsewhere, and never moves a sequence backwards
+            with db.engine.begin() as connection:
+                for model in LOAD_ORDER:
+                    table = model.__tablename__
+                    connection.execute(text(
+                        f"SELECT setval(seq, GREATEST((SELECT COALESCE(MAX(id), 1) FROM \"{table}\"), "
+                        f"COALESCE(pg_sequence_last_value(seq::regclass), 1))) "
+                        f"FROM (SELECT pg_get_serial_sequence('\"{table}\"', 'id') AS seq) AS s"
+                    ))
+
+
+def _copy_value(value):
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    return value
+
+
+def _sentence(rng):
+    return f"{rng.choice(VERBS)} {rng.choice(OBJECTS)}, {rng.choice(OUTCOMES)}."
+
+
+def _section_size(rng, average):
+    # Between 1 and 2 x average - 1 rows, so the mean is the requested average
+    return rng.randint(1, max(1, 2 * average - 1)) if average > 0 else 0
+
+
+def _seed_resume(writer, rng, user_id, full_name, email, created, anchor, sections, events, days):
+    counts = {
+        'education_count': _section_size(rng, sections),
+        'experience_count': _section_size(rng, sections),
+        'project_count': _section_size(rng, sections),
+        'skill_count': _section_size(rng, sections),
+        'certification_count': _section_size(rng, sections),
+    }
+    counts['skill_count'] = min(counts['skill_count'], len(SKILLS))
+    # Some resumes are abandoned half way
+    for counter in SECTION_COUNTERS:
+        if rng.random() < 0.1:
+            counts[counter] = 0
+    # Views and downloads since the resume was created, within the history window
+    history_start = max(created, anchor - timedelta(days=days))
+    history_seconds = max(1, int((anchor - history_start).total_seconds()))
+    history = [('download' if rng.random() < 0.2 else 'view',
+                history_start + timedelta(seconds=rng.randrange(history_seconds))) for _ in range(events)]
+    updated = created + timedelta(minutes=rng.randrange(1, 60 * 24 * 30))
+    role = rng.choice(ROLES)
+    resume_id = writer.add(
+        Resume, user_id=user_id, title=f"{role} Resume"[:50], style=rng.choice(['modern', 'classic']),
+        created_at=created, updated_at=min(updated, anchor), version=1, is_active=True,
+        download_count=sum(action == 'download' for action, _ in history), has_personal_info=True,
+        completion_percentage=completion_percentage(True, counts), **counts
+    )
+    writer.add(PersonalInfo, resume_id=resume_id, profile_pic='default.jpg', full_name=full_name,
+               phone=f"+1555{rng.randrange(1000000, 9999999)}", resume_email=email,
+               linkedin=f"linkedin.com/in/{email.split('@')[0]}", github=f"github.com/{email.split('@')[0]}",
+               address=f"{rng.randrange(1, 999)} Main Street", summary=f"{role}. {_sentence(rng)} {_sentence(rng)}")
+    for i in range(counts['education_count']):
+        start = rng.randrange(2000, 2020)
+        writer.add(Education, resume_id=resume_id, degree=rng.choice(DEGREES), institution=rng.choice(SCHOOLS),
+                   start_year=start, end_year=start + rng.choice([2, 3, 4]),
+                   cgpa=round(rng.uniform(6.0, 10.0), 2), description=_sentence(rng))
+    for i in range(counts['experience_count']):
+        start = rng.randrange(2010, 2024)
+        writer.add(Experience, resume_id=resume_id, job_title=rng.choice(ROLES), company=rng.choice(COMPANIES),
+                   start_date=str(start), end_date=str(start + rng.randrange(1, 4)) if i else 'Present',
+                   description=f"{_sentence(rng)} {_sentence(rng)}")
+    for i in range(counts['project_count']):
+        stack = rng.sample(SKILLS, 3)
+        writer.add(Project, resume_id=resume_id, title=f"{rng.choice(OBJECTS).split(' ')[-1].title()} {i + 1}",
+                   description=_sentence(rng), tech_stack=', '.join(stack),
+                   link=f"https://github.com/{email.split('@')[0]}/project-{i + 1}")
+    for name in rng.sample(SKILLS, min(counts['skill_count'], len(SKILLS))):
+        writer.add(Skill, resume_id=resume_id, name=name, level=rng.choice(LEVELS))
+    for i in range(counts['certification_count']):
+        name, issuer = rng.choice(CERTIFICATIONS)
+        writer.add(Certification, resume_id=resume_id, name=name, issuer=issuer,
+                   issue_date=f"{rng.randrange(2015, 2025)}-{rng.randrange(1, 13):02d}-01",
+                   credential_link=f"https://credentials.example.com/{resume_id}-{i}")
+
+    for action, created_at in history:
+        writer.add(ResumeAnalytic, user_id=user_id, resume_id=resume_id, action=action,
+                   details=f"{'Downloaded' if action == 'download' else 'Viewed'} resume", created_at=created_at)
+
+
+def seed_database(users, resumes_per_user, sections=3, events_per_resume=50, days=90, seed=1, batch_size=500,
+                  password=DEFAULT_PASSWORD, password_method=None, progress=None):
+    """Generate users with resumes, sections, analytics and sent emails, and bulk load them.
+
+    The same seed yields the same data, apart from the password salt, with
+    timestamps relative to the current UTC midnight. Rows are flushed every batch_size resumes.
+    Returns {table: rows written}.
+    """
+    rng = random.Random(seed)
+    anchor = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    method = canonical_method(password_method or current_app.config['AUTH_PASSWORD_METHOD'])
+    # Every seeded user shares one hash; hashing each would take longer than the load
+    password_hash = generate_password_hash(password, method)
+    writer = SeedWriter()
+    resumes_in_batch = 0
+
+    for _ in range(users):
+        user_id = writer.new_id(User)
+        full_name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        email = f"user{user_id}@{SEED_EMAIL_DOMAIN}"
+        joined = anchor - timedelta(days=rng.randrange(1, max(2, days * 2)), seconds=rng.randrange(86400))
+        writer.add(User, id=user_id, username=full_name.split(' ')[0][:20], email=email, password=password_hash,
+                   created_at=joined, updated_at=joined)
+        writer.add(EmailNotification, user_id=user_id, recipients=email, subject='Welcome to Resume Builder!',
+                   body=f"Welcome {full_name}!", status='sent', attempts=1, is_sent=True,
+                   created_at=joined, next_attempt_at=joined, sent_at=joined)
+        for _ in range(resumes_per_user):
+            created = joined + timedelta(minutes=rng.randrange(1, max(2, int((anchor - joined).total_seconds() // 60))))
+            _seed_resume(writer, rng, user_id, full_name, email, min(created, anchor), anchor,
+                         sections, events_per_resume, days)
+            resumes_in_batch += 1
+        if resumes_in_batch >= batch_size:
+            writer.flush()
+            resumes_in_batch = 0
+            if progress:
+                progress(writer.written)
+    writer.finish()
+    if progress:
+        progress(writer.written)
+    return writer.written
+
+
+def init_seed_data(app):
+    @app.cli.command('seed-data')
+    @click.option('--users', type=int, default=100, show_default=True)
+    @click.option('--resumes-per-user', type=int, default=3, show_default=True)
+    @click.option('--sections', type=int, default=3, show_default=True, help='Average rows per resume section.')
+    @click.option('--events-per-resume', type=int, default=50, show_default=True, help='Analytics history rows.')
+    @click.option('--days', type=int, default=90, show_default=True, help='How far back the history goes.')
+    @click.option('--seed', type=int, default=1, show_default=True)
+    @click.option('--batch-size', type=int, default=500, show_default=True, help='Resumes per transaction.')
+    @click.option('--password', default=DEFAULT_PASSWORD, show_default=True, help='Password of every seeded user.')
+    @click.option('--skip-search-index', is_flag=True, help='Leave the search index for `flask search-reindex`.')
+    def seed_data_command(users, resumes_per_user, sections, events_per_resume, days, seed, batch_size,
+                          password, skip_search_index):
+        """Bulk-load synthetic users, resumes and analytics history for scale testing."""
+        started = time.perf_counter()
+
+        def progress(written):
+            total = sum(written.values())
+            elapsed = time.perf_counter() - started
+            click.echo(f"  {written['resume']} resumes, {total} rows, {total / elapsed:,.0f} rows/s")
+
+        written = seed_database(users, resumes_per_user, sections, events_per_resume, days, seed, batch_size,
+                                password, progress=progress)
+        elapsed = time.perf_counter() - started
+        total = sum(written.values())
+        for table, count in written.items():
+            click.echo(f"{table:<20} {count:>10}")
+        click.echo(f"Loaded {total} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s) "
+                   f"on {db.engine.dialect.name}")
+        if not skip_search_index:
+            from .search_service import rebuild_search_index
+            started = time.perf_counter()
+            rebuild_search_index()
+            click.echo(f"Rebuilt the search index in {time.perf_counter() - started:.1f}s")
+        click.echo(f"Users sign in as user<id>@{SEED_EMAIL_DOMAIN} with password {password!r}; "
+                   "run `flask analytics-rollup` to fold the history into the dashboard rollups")
@@ -175,3 +175,46 @@ document.addEventListener('DOMContentLoaded', () => {
     }
   }
 });
+
+/* QUEUED PDF DOWNLOADS */
+// Links marked data-pdf-async queue the render, then poll until the PDF worker has produced the file
+async function pollPdfJob(url) {
+  let response = await fetch(url, { headers: { 'Accept': 'application/json' } });
+  let job = await response.json();
+  while (job.status === 'queued' || job.status === 'running') {
+    await new Promise(resolve => setTimeout(resolve, 1000));
+    response = await fetch(job.status_url, { headers: { 'Accept': 'application/json' } });
+    job = await response.json();
+  }
+  if (job.status === 'done') {
+    window.location = job.file_url;
+  } else {
+    throw new Error(job.error || 'unknown error');
+  }
+}
+
+document.addEventListener('click', async (event) => {
+  const link = event.target.closest('a[data-pdf-async]');
+  if (!link || link.dataset.pending) return;
+  event.preventDefault();
+  const originalText = link.textContent;
+  link.dataset.pending = '1';
+  link.textContent = '⏳ Preparing PDF...';
+  try {
+    await pollPdfJob(link.href);
+  } catch (error) {
+    alert('PDF generation failed: ' + error.message);
+  } finally {
+    link.textContent = originalText;
+    delete link.dataset.pending;
+  }
+});
+
+// The waiting page a plain navigation to an async download lands on
+document.addEventListener('DOMContentLoaded', () => {
+  const pending = document.querySelector('[data-pdf-job]');
+  if (!pending) return;
+  pollPdfJob(pending.dataset.pdfJob).catch(error => {
+    pending.textContent = 'PDF generation failed: ' + error.message;
+  });
+});
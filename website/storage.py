@@ -0,0 +1,314 @@
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+from flask import Response, redirect, send_file, url_for
+from werkzeug.security import safe_join
+
+COPY_CHUNK = 64 * 1024
+
+
+class StorageError(Exception):
+    """Raised when a storage backend cannot be configured or reached"""
+    pass
+
+
+def _as_stream(data):
+    return io.BytesIO(data) if isinstance(data, (bytes, bytearray)) else data
+
+
+class LocalStorage:
+    """Files under a directory on this node's disk.
+
+    With static_prefix the directory is also served by Flask's static
+    route (or the web server in front of it), so url() can link to it
+    directly. With accel_prefix, send() hands the file to nginx through
+    X-Accel-Redirect; USE_X_SENDFILE does the same for Apache/lighttpd
+    through send_file.
+    """
+
+    def __init__(self, root, static_prefix=None, accel_prefix=None):
+        self.root = root
+        self.static_prefix = static_prefix
+        self.accel_prefix = accel_prefix
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, name):
+        path = safe_join(self.root, name)
+        if path is None:
+            raise StorageError(f"Invalid storage name: {name}")
+        return path
+
+    def local_path(self, name):
+        return self._path(name)
+
+    def open(self, name):
+        """Binary file object for name; raises FileNotFoundError if missing"""
+        return open(self._path(name), 'rb')
+
+    def read(self, name):
+        with self.open(name) as f:
+            return f.read()
+
+    def save(self, name, data):
+        """Write bytes or a readable stream to name, replacing it atomically"""
+        path = self._path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                shutil.copyfileobj(_as_stream(data), f, COPY_CHUNK)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return name
+
+    def exists(self, name):
+        try:
+            return os.path.isfile(self._path(name))
+        except StorageError:
+            return False
+
+    def delete(self, name):
+        try:
+            os.remove(self._path(name))
+        except FileNotFoundError:
+            pass
+
+    def touch(self, name):
+        """Mark name as recently used; returns False if it does not exist"""
+        try:
+            os.utime(self._path(name))
+            return True
+        except (OSError, StorageError):
+            return False
+
+    def list(self, prefix=''):
+        """Yield (name, size, mtime) for top-level entries starting with prefix"""
+        try:
+            entries = os.scandir(self.root)
+        except FileNotFoundError:
+            return
+        with entries:
+            for entry in entries:
+                if not entry.name.startswith(prefix) or entry.name.endswith('.tmp') or not entry.is_file():
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                yield entry.name, stat.st_size, stat.st_mtime
+
+    def url(self, name):
+        if self.static_prefix is None:
+            return None
+        return url_for('static', filename=self.static_prefix + name)
+
+    def send(self, name, mimetype=None, as_attachment=False, download_name=None):
+        path = self._path(name)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(name)
+        if self.accel_prefix:
+            response = Response(mimetype=mimetype)
+            response.headers['X-Accel-Redirect'] = self.accel_prefix.rstrip('/') + '/' + name
+            if as_attachment:
+                response.headers.set('Content-Disposition', 'attachment', filename=download_name or name)
+            return response
+        return send_file(path, mimetype=mimetype, as_attachment=as_attachment, download_name=download_name)
+
+
+class MemoryStorage:
+    """Process-local store for development and tests; not shared between workers"""
+
+    def __init__(self):
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def local_path(self, name):
+        return None
+
+    def open(self, name):
+        return io.BytesIO(self.read(name))
+
+    def read(self, name):
+        with self._lock:
+            if name not in self._files:
+                raise FileNotFoundError(name)
+            return self._files[name][0]
+
+    def save(self, name, data):
+        buffer = io.BytesIO()
+        shutil.copyfileobj(_as_stream(data), buffer, COPY_CHUNK)
+        with self._lock:
+            self._files[name] = (buffer.getvalue(), time.time())
+        return name
+
+    def exists(self, name):
+        with self._lock:
+            return name in self._files
+
+    def delete(self, name):
+        with self._lock:
+            self._files.pop(name, None)
+
+    def touch(self, name):
+        with self._lock:
+            if name not in self._files:
+                return False
+            self._files[name] = (self._files[name][0], time.time())
+            return True
+
+    def list(self, prefix=''):
+        with self._lock:
+            entries = [(name, len(data), mtime) for name, (data, mtime) in self._files.items()]
+        for name, size, mtime in entries:
+            if name.startswith(prefix):
+                yield name, size, mtime
+
+    def url(self, name):
+        return None
+
+    def send(self, name, mimetype=None, as_attachment=False, download_name=None):
+        return send_file(io.BytesIO(self.read(name)), mimetype=mimetype, as_attachment=as_attachment,
+                         download_name=download_name or name)
+
+
+class S3Storage:
+    """Objects in an S3-compatible bucket (AWS, MinIO, R2) under a key prefix.
+
+    Needs boto3. Reads and writes stream through boto3's managed transfer,
+    and send() redirects the client to a short-lived presigned URL so the
+    bytes never pass through the web worker.
+    """
+
+    def __init__(self, bucket, prefix='', endpoint_url=None, region=None, presign_ttl=300, public_url=None):
+        try:
+            import boto3
+            from botocore.exceptions import ClientError
+        except ImportError as e:
+            raise StorageError("STORAGE_BACKEND=s3 requires boto3 (pip install boto3)") from e
+        self._client_error = ClientError
+        self.client = boto3.client('s3', endpoint_url=endpoint_url, region_name=region)
+        self.bucket = bucket
+        self.prefix = prefix
+        self.presign_ttl = presign_ttl
+        self.public_url = public_url.rstrip('/') if public_url else None
+
+    def _key(self, name):
+        return self.prefix + name
+
+    def _missing(self, error):
+        return error.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound')
+
+    def local_path(self, name):
+        return None
+
+    def open(self, name):
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._key(name))['Body']
+        except self._client_error as e:
+            if self._missing(e):
+                raise FileNotFoundError(name) from e
+            raise
+
+    def read(self, name):
+        body = self.open(name)
+        try:
+            return body.read()
+        finally:
+            body.close()
+
+    def save(self, name, data):
+        self.client.upload_fileobj(_as_stream(data), self.bucket, self._key(name))
+        return name
+
+    def exists(self, name):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(name))
+            return True
+        except self._client_error as e:
+            if self._missing(e):
+                return False
+            raise
+
+    def delete(self, name):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(name))
+
+    def touch(self, name):
+        # Objects carry no access time; LRU eviction over S3 degrades to oldest-written
+        return self.exists(name)
+
+    def list(self, prefix=''):
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix)):
+            for obj in page.get('Contents', []):
+                yield obj['Key'][len(self.prefix):], obj['Size'], obj['LastModified'].timestamp()
+
+    def url(self, name):
+        if self.public_url:
+            return f"{self.public_url}/{self._key(name)}"
+        return None
+
+    def presigned_url(self, name, as_attachment=False, download_name=None, mimetype=None):
+        params = {'Bucket': self.bucket, 'Key': self._key(name)}
+        if as_attachment:
+            params['ResponseContentDisposition'] = f'attachment; filename="{download_name or name}"'
+        if mimetype:
+            params['ResponseContentType'] = mimetype
+        return self.client.generate_presigned_url('get_object', Params=params, ExpiresIn=self.presign_ttl)
+
+    def send(self, name, mimetype=None, as_attachment=False, download_name=None):
+        if not self.exists(name):
+            raise FileNotFoundError(name)
+        response = redirect(self.presigned_url(name, as_attachment, download_name, mimetype))
+        response.headers['Cache-Control'] = 'private, max-age=60'
+        return response
+
+
+class Storages:
+    """The two stores the app writes to: profile pictures and generated PDFs"""
+
+    def __init__(self):
+        self.uploads = None
+        self.pdfs = None
+
+    def init_app(self, app):
+        backend = app.config.get('STORAGE_BACKEND', 'local')
+        if backend == 'local':
+            accel = app.config.get('STORAGE_ACCEL_PREFIX')
+            self.uploads = LocalStorage(
+                os.path.join(app.static_folder, 'uploads'),
+                static_prefix='uploads/',
+                accel_prefix=f"{accel.rstrip('/')}/uploads" if accel else None
+            )
+            self.pdfs = LocalStorage(
+                app.config.get('PDF_CACHE_DIR') or os.path.join(app.instance_path, 'pdf_cache'),
+                accel_prefix=f"{accel.rstrip('/')}/pdfs" if accel else None
+            )
+        elif backend == 'memory':
+            self.uploads = MemoryStorage()
+            self.pdfs = MemoryStorage()
+        elif backend == 's3':
+            bucket = app.config.get('STORAGE_S3_BUCKET')
+            if not bucket:
+                raise StorageError("STORAGE_BACKEND=s3 requires STORAGE_S3_BUCKET")
+            options = {
+                'endpoint_url': app.config.get('STORAGE_S3_ENDPOINT_URL'),
+                'region': app.config.get('STORAGE_S3_REGION'),
+                'presign_ttl': app.config.get('STORAGE_PRESIGN_TTL', 300),
+            }
+            self.uploads = S3Storage(bucket, prefix='uploads/', public_url=app.config.get('STORAGE_S3_PUBLIC_URL'), **options)
+            self.pdfs = S3Storage(bucket, prefix='pdfs/', **options)
+        else:
+            raise StorageError(f"Unknown STORAGE_BACKEND: {backend}")
+
+
+storage = Storages()
+
+
+def init_storage(app):
+    storage.init_app(app)
@@ -0,0 +1,130 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+import click
+from flask import render_template
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup
+
+
+class FragmentCache:
+    """Process-local LRU of rendered resume fragments, bounded by size.
+
+    Keys carry the resume's version stamp, which every save bumps, so an
+    edited resume simply misses and its old fragments age out; nothing
+    has to be invalidated on save.
+    """
+
+    def __init__(self):
+        self.max_bytes = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        self.max_bytes = app.config['FRAGMENT_CACHE_MAX_BYTES']
+        if app.jinja_env.auto_reload:
+            # Template edits would not change the key; render fresh while developing
+            self.max_bytes = 0
+
+    def get_or_render(self, key, render):
+        with self._lock:
+            fragment = self._entries.get(key)
+            if fragment is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return fragment
+            self.misses += 1
+
+        fragment = Markup(render())
+        size = len(fragment)
+        if size > self.max_bytes // 4:
+            return fragment
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = fragment
+                self._size += size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+        return fragment
+
+    def invalidate(self, resume_id):
+        """Drop every fragment of a deleted resume"""
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == resume_id]:
+                self._size -= len(self._entries.pop(key))
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._size, 'hits': self.hits, 'misses': self.misses}
+
+
+fragment_cache = FragmentCache()
+
+
+def resume_context(resume):
+    """Template variables for a ResumeSnapshot under both naming schemes the templates use"""
+    return {
+        'resume': resume,
+        'Resume': resume,
+        'info': resume.personal_info,
+        'PersonalInfo': resume.personal_info,
+        'educations': resume.education,
+        'experiences': resume.experience,
+        'projects': resume.projects,
+        'skills': resume.skills,
+        'certifications': resume.certifications,
+    }
+
+
+def render_resume_fragment(template, resume, variant='page', extra=None):
+    """Render template for a ResumeSnapshot, reusing the output until the resume changes.
+
+    extra is a callable returning more context; it only runs on a miss,
+    so costly values such as an inlined picture are skipped on a hit.
+    """
+    def render():
+        context = resume_context(resume)
+        if extra is not None:
+            context.update(extra())
+        return render_template(template, **context)
+
+    return fragment_cache.get_or_render((template, resume.id, resume.version, variant), render)
+
+
+def compile_templates(app):
+    """Load every template once so its bytecode lands in the shared cache"""
+    compiled = 0
+    for name in app.jinja_env.list_templates(extensions=['html']):
+        app.jinja_env.get_template(name)
+        compiled += 1
+    return compiled
+
+
+def template_fingerprint(app):
+    """Short hash of the build id and every template's source, the inputs the bytecode cache checks"""
+    digest = hashlib.sha1((app.config.get('BUILD_ID') or '').encode())
+    for name in sorted(app.jinja_env.list_templates(extensions=['html'])):
+        source, _, _ = app.jinja_env.loader.get_source(app.jinja_env, name)
+        digest.update(name.encode())
+        digest.update(source.encode())
+    return digest.hexdigest()[:12]
+
+
+def init_template_cache(app):
+    cache_dir = app.config.get('TEMPLATE_BYTECODE_DIR') or os.path.join(app.instance_path, 'jinja_cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    # Compiled templates are written to disk, so every worker on the node reuses them
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+    fragment_cache.init_app(app)
+    # Part of the view page ETag, so a deploy that changes a template invalidates 304s
+    app.config['TEMPLATE_FINGERPRINT'] = template_fingerprint(app)
+
+    @app.cli.command('templates-compile')
+    def templates_compile_command():
+        """Precompile all templates into the bytecode cache (run on deploy)."""
+        click.echo(f"Compiled {compile_templates(app)} templates into {cache_dir}")
@@ -0,0 +1,217 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import abort, has_request_context, jsonify, request, session
+from flask_login import UserMixin, user_logged_in, user_logged_out
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+from .database import _authorized
+from .models import db, User
+
+# Session key of the signed identity; Flask signs the whole session cookie
+SESSION_IDENTITY_KEY = '_identity'
+
+
+class UserIdentity(UserMixin):
+    """The user fields pages read, detached from any database session.
+
+    Safe to share between requests and threads, unlike a User row. Views
+    only use id, username and email; anything else needs a real query.
+    """
+
+    def __init__(self, id, username, email, stamp):
+        self.id = id
+        self.username = username
+        self.email = email
+        self.stamp = stamp
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.username, user.email,
+                   user.updated_at.isoformat() if user.updated_at else None)
+
+    def to_session(self):
+        return {'id': self.id, 'username': self.username, 'email': self.email,
+                'stamp': self.stamp, 'issued': int(time.time())}
+
+
+class UserCache:
+    """Process-local LRU of user identities with a short TTL.
+
+    Updates and deletes of a User drop its entry in this process, once at
+    flush and again after commit. Other gunicorn workers keep their copy
+    until the TTL runs out, which bounds how long a renamed or deleted
+    user can be served stale.
+    """
+
+    def __init__(self):
+        self.max_entries = 0
+        self.ttl = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.session_hits = 0
+        self.expired = 0
+        self.invalidations = 0
+
+    def init_app(self, app):
+        self.max_entries = app.config['USER_CACHE_MAX_ENTRIES']
+        self.ttl = app.config['USER_CACHE_TTL']
+
+    def get(self, user_id, load):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                expires_at, identity = entry
+                if expires_at > now:
+                    self._entries.move_to_end(user_id)
+                    self.hits += 1
+                    return identity
+                del self._entries[user_id]
+                self.expired += 1
+            self.misses += 1
+
+        identity = load(user_id)
+        if identity is None or self.max_entries <= 0 or self.ttl <= 0:
+            return identity
+        with self._lock:
+            self._entries[user_id] = (now + self.ttl, identity)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return identity
+
+    def invalidate(self, user_id):
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def record_session_hit(self):
+        with self._lock:
+            self.session_hits += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else None,
+                'session_hits': self.session_hits,
+                'expired': self.expired,
+                'invalidations': self.invalidations,
+            }
+
+
+user_cache = UserCache()
+
+
+def _load_identity(user_id):
+    user = db.session.get(User, user_id)
+    return UserIdentity.from_user(user) if user else None
+
+
+def _session_identity(user_id, max_age):
+    """The identity carried in the signed session, if it is usable for this request"""
+    # Only read-only requests trust the cookie; anything that writes re-checks the row
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    data = session.get(SESSION_IDENTITY_KEY)
+    if not data or data.get('id') != user_id:
+        return None
+    if time.time() - data.get('issued', 0) > max_age:
+        return None
+    return UserIdentity(data['id'], data['username'], data['email'], data.get('stamp'))
+
+
+def _store_session_identity(identity, max_age):
+    current = session.get(SESSION_IDENTITY_KEY)
+    # Rewriting the cookie on every request would only add Set-Cookie headers
+    if current and current.get('id') == identity.id and current.get('stamp') == identity.stamp \
+            and time.time() - current.get('issued', 0) <= max_age:
+        return
+    session[SESSION_IDENTITY_KEY] = identity.to_session()
+
+
+def load_user(user_id, session_identity=False, session_max_age=300):
+    """user_loader for Flask-Login: signed session, then the LRU, then the database"""
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    if session_identity:
+        identity = _session_identity(user_id, session_max_age)
+        if identity is not None:
+            user_cache.record_session_hit()
+            return identity
+    identity = user_cache.get(user_id, _load_identity)
+    if identity is not None and session_identity:
+        _store_session_identity(identity, session_max_age)
+    return identity
+
+
+def _pending_invalidations(target):
+    sess = object_session(target)
+    return sess.info.setdefault('user_cache_invalidate', set()) if sess is not None else set()
+
+
+def _on_user_changed(mapper, connection, target):
+    user_cache.invalidate(target.id)
+    _pending_invalidations(target).add(target.id)
+
+
+def _after_commit(sess):
+    user_ids = sess.info.pop('user_cache_invalidate', None)
+    if not user_ids:
+        return
+    # A request may have reloaded the old row between flush and commit
+    for user_id in user_ids:
+        user_cache.invalidate(user_id)
+    if has_request_context():
+        data = session.get(SESSION_IDENTITY_KEY)
+        if data and data.get('id') in user_ids:
+            session.pop(SESSION_IDENTITY_KEY, None)
+
+
+def _after_rollback(sess, previous_transaction):
+    sess.info.pop('user_cache_invalidate', None)
+
+
+# The User mapper and db.session are shared by every app, so listen once, on import
+event.listen(User, 'after_update', _on_user_changed)
+event.listen(User, 'after_delete', _on_user_changed)
+event.listen(db.session, 'after_commit', _after_commit)
+event.listen(db.session, 'after_soft_rollback', _after_rollback)
+
+
+def user_cache_health():
+    """Counters of this worker's user cache; used by /health/user-cache"""
+    if not _authorized():
+        abort(401)
+    return jsonify(user_cache.stats())
+
+
+def init_user_cache(app, login_manager):
+    user_cache.init_app(app)
+    session_identity = app.config['USER_SESSION_IDENTITY']
+    session_max_age = app.config['USER_SESSION_IDENTITY_MAX_AGE']
+
+    @login_manager.user_loader
+    def _user_loader(user_id):
+        return load_user(user_id, session_identity, session_max_age)
+
+    @user_logged_in.connect_via(app)
+    def _remember_identity(sender, user):
+        if session_identity:
+            session[SESSION_IDENTITY_KEY] = UserIdentity.from_user(user).to_session()
+
+    @user_logged_out.connect_via(app)
+    def _forget_identity(sender, user):
+        session.pop(SESSION_IDENTITY_KEY, None)
+
+    app.add_url_rule('/health/user-cache', 'user_cache_health', user_cache_health)
@@ -1,10 +1,9 @@
 import json
 from datetime import datetime
-from .models import Resume, PersonalInfo, Education, Experience, Project, Skill, Certification
 
 def serialize_resume_to_dict(resume):
-    """Convert resume to dictionary for JSON export"""
-    info = PersonalInfo.query.filter_by(resume_id=resume.id).first()
+    """Convert a ResumeSnapshot to dictionary for JSON export"""
+    info = resume.personal_info
 
     resume_dict = {
         'id': resume.id,
@@ -25,7 +24,6 @@ def serialize_resume_to_dict(resume):
             'summary': info.summary
         }
 
-    educations = Education.query.filter_by(resume_id=resume.id).all()
     resume_dict['education'] = [
         {
             'degree': edu.degree,
@@ -34,10 +32,9 @@ def serialize_resume_to_dict(resume):
             'end_year': edu.end_year,
             'cgpa': edu.cgpa,
             'description': edu.description
-        } for edu in educations
+        } for edu in resume.education
     ]
 
-    experiences = Experience.query.filter_by(resume_id=resume.id).all()
     resume_dict['experience'] = [
         {
             'job_title': exp.job_title,
@@ -45,35 +42,32 @@ def serialize_resume_to_dict(resume):
             'start_date': exp.start_date,
             'end_date': exp.end_date,
             'description': exp.description
-        } for exp in experiences
+        } for exp in resume.experience
     ]
 
-    projects = Project.query.filter_by(resume_id=resume.id).all()
     resume_dict['projects'] = [
         {
             'title': proj.title,
             'description': proj.description,
             'tech_stack': proj.tech_stack,
             'link': proj.link
-        } for proj in projects
+        } for proj in resume.projects
     ]
 
-    skills = Skill.query.filter_by(resume_id=resume.id).all()
     resume_dict['skills'] = [
         {
             'name': skill.name,
             'level': skill.level
-        } for skill in skills
+        } for skill in resume.skills
     ]
 
-    certifications = Certification.query.filter_by(resume_id=resume.id).all()
     resume_dict['certifications'] = [
         {
             'name': cert.name,
             'issuer': cert.issuer,
             'issue_date': cert.issue_date,
             'credential_link': cert.credential_link
-        } for cert in certifications
+        } for cert in resume.certifications
     ]
 
     return resume_dict
@@ -83,50 +77,21 @@ def export_resume_json(resume):
     resume_dict = serialize_resume_to_dict(resume)
     return json.dumps(resume_dict, indent=2)
 
-def search_resumes(user_id, query):
-    """Search resumes by title and personal info"""
-    from . import db
+SECTION_COUNTERS = ('education_count', 'experience_count', 'project_count', 'skill_count', 'certification_count')
 
-    resumes = Resume.query.filter_by(user_id=user_id).all()
-    results = []
-
-    for resume in resumes:
-        if query.lower() in resume.title.lower():
-            results.append(resume)
-            continue
-
-        info = PersonalInfo.query.filter_by(resume_id=resume.id).first()
-        if info and query.lower() in info.full_name.lower():
-            results.append(resume)
-
-    return results
+def completion_percentage(has_personal_info, counts):
+    """Share of the six resume parts that have content, as a percentage"""
+    completion_items = [bool(has_personal_info)] + [counts.get(counter, 0) > 0 for counter in SECTION_COUNTERS]
+    return round((sum(completion_items) / len(completion_items)) * 100, 2)
 
 def get_resume_statistics(resume):
-    """Get statistics about resume completion"""
-    info = PersonalInfo.query.filter_by(resume_id=resume.id).first()
-    education_count = Education.query.filter_by(resume_id=resume.id).count()
-    experience_count = Experience.query.filter_by(resume_id=resume.id).count()
-    project_count = Project.query.filter_by(resume_id=resume.id).count()
-    skill_count = Skill.query.filter_by(resume_id=resume.id).count()
-    cert_count = Certification.query.filter_by(resume_id=resume.id).count()
-
-    completion_items = [
-        bool(info),
-        bool(education_count > 0),
-        bool(experience_count > 0),
-        bool(project_count > 0),
-        bool(skill_count > 0),
-        bool(cert_count > 0)
-    ]
-
-    completion_percentage = (sum(completion_items) / len(completion_items)) * 100
-
+    """Completion statistics from a Resume row's denormalized counters"""
     return {
-        'personal_info': bool(info),
-        'education_count': education_count,
-        'experience_count': experience_count,
-        'project_count': project_count,
-        'skill_count': skill_count,
-        'certification_count': cert_count,
-        'completion_percentage': round(completion_percentage, 2)
+        'personal_info': bool(resume.has_personal_info),
+        'education_count': resume.education_count or 0,
+        'experience_count': resume.experience_count or 0,
+        'project_count': resume.project_count or 0,
+        'skill_count': resume.skill_count or 0,
+        'certification_count': resume.certification_count or 0,
+        'completion_percentage': round(resume.completion_percentage or 0, 2)
     }
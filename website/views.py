@@ -1,22 +1,35 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, send_file, jsonify
+from flask import Blueprint, Response, render_template, request, redirect, url_for, flash, send_file, jsonify, current_app, abort, session
 from flask_login import login_required, current_user
-from werkzeug.utils import secure_filename
+from sqlalchemy import update
+from sqlalchemy.orm import joinedload
+from werkzeug.http import is_resource_modified
 from .models import *
 from .analytics_service import track_event
-from .utils import export_resume_json, search_resumes, get_resume_statistics
-import os
-import asyncio
-import shutil
-import time
-import uuid
-from playwright.async_api import async_playwright
-from datetime import datetime
+from .utils import completion_percentage, export_resume_json, get_resume_statistics
+from .pdf_service import generate_resume_pdf, PdfGenerationError
+from .pdf_worker import enqueue_pdf_job
+from .bulk_export import select_export_ids, stream_resume_zip
+from .resume_loader import load_resume, load_resume_snapshot, snapshot_resume
+from .section_sync import reconcile_resume_sections
+from .resume_stats import bulk_resume_statistics
+from .search_service import search_resumes, index_resume, remove_from_index
+from .pdf_cache import pdf_cache
+from .image_service import DEFAULT_PICTURE, ImageError, process_upload, release_image
+from .storage import storage, StorageError
+from .template_cache import fragment_cache, render_resume_fragment
+import io
 
 views = Blueprint('views', __name__)
-UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'uploads')
+DASHBOARD_WINDOWS = (7, 30)
+
+
+@views.app_errorhandler(413)
+@views.app_errorhandler(415)
+def upload_rejected(e):
+    """Upload refused while the request body was being parsed"""
+    flash(e.description, "danger")
+    return redirect(request.referrer or url_for('views.home'))
 
-# Ensure uploads folder exists
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
 @views.route('/home', methods=['GET', 'POST'])
 @login_required
@@ -35,26 +48,18 @@ def home():
             flash("Full Name and Resume Email are required.", "danger")
             return redirect(url_for('views.home'))
 
-        filename = 'default.jpg'
+        filename = DEFAULT_PICTURE
         if profile_pic and profile_pic.filename != '':
             try:
-                os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-                
-                # Generate unique filename with timestamp for cache busting
-                ext = os.path.splitext(profile_pic.filename)[1]
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                unique_id = str(uuid.uuid4())[:8]
-                filename = f"profile_new_{timestamp}_{unique_id}{ext}"
-                filename = secure_filename(filename)
-                
-                filepath = os.path.join(UPLOAD_FOLDER, filename)
-                profile_pic.save(filepath)
+                filename = process_upload(profile_pic)
+            except ImageError as e:
+                flash(str(e), "danger")
             except Exception as e:
                 flash(f"Error uploading image: {str(e)}", "danger")
-                print(f"Image upload error: {e}")
-                filename = 'default.jpg'
+                current_app.logger.warning(f"Image upload error: {e}")
 
-        resume = Resume(user_id=current_user.id, title=f"{full_name}'s Resume", style=style)
+        resume = Resume(user_id=current_user.id, title=f"{full_name}'s Resume", style=style,
+                        has_personal_info=True, completion_percentage=completion_percentage(True, {}))
         db.session.add(resume)
         db.session.commit()
 
@@ -70,26 +75,25 @@ def home():
         )
         db.session.add(info)
         db.session.commit()
+        index_resume(resume.id)
 
         flash("Basic resume info saved! Now complete your resume.", "success")
         return redirect(url_for('views.create_resume', resume_id=resume.id))
 
     return render_template("home.html")
 
+
 @views.route('/Resume/<int:resume_id>', methods=['GET', 'POST'])
 @login_required
 def create_resume(resume_id):
-    resume = Resume.query.get_or_404(resume_id)
+    resume = load_resume(resume_id)
+    if resume is None:
+        abort(404)
     if resume.user_id != current_user.id:
         flash("Unauthorized", "danger")
         return redirect(url_for('views.home'))
 
-    info = PersonalInfo.query.filter_by(resume_id=resume.id).first()
-    educations = Education.query.filter_by(resume_id=resume.id).all()
-    experiences = Experience.query.filter_by(resume_id=resume.id).all()
-    projects = Project.query.filter_by(resume_id=resume.id).all()
-    skills = Skill.query.filter_by(resume_id=resume.id).all()
-    certifications = Certification.query.filter_by(resume_id=resume.id).all()
+    info = resume.personal_info
 
     if request.method == 'POST':
         # Update personal info
@@ -100,163 +104,82 @@ def create_resume(resume_id):
         info.linkedin = request.form.get('linkedin')
         info.summary = request.form.get('summary')
 
-        # Handle profile picture - with proper cleanup and cache busting
+        # Stored under a content hash, so a new picture always gets a new URL
+        replaced_pic = None
         profile_pic = request.files.get('profile_pic')
         if profile_pic and profile_pic.filename != '':
             try:
-                os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-                
-                # Delete old image file completely if it exists
-                if info.profile_pic and info.profile_pic != 'default.jpg':
-                    old_path = os.path.join(UPLOAD_FOLDER, info.profile_pic)
-                    if os.path.exists(old_path):
-                        try:
-                            os.remove(old_path)
-                            time.sleep(0.1)  # Small delay to ensure file is freed
-                        except Exception as e:
-                            print(f"Warning: Could not delete old image: {e}")
-                
-                # Generate unique filename with timestamp to prevent caching issues
-                ext = os.path.splitext(profile_pic.filename)[1]
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                unique_id = str(uuid.uuid4())[:8]
-                filename = f"profile_{current_user.id}_{timestamp}_{unique_id}{ext}"
-                filename = secure_filename(filename)
-                
-                filepath = os.path.join(UPLOAD_FOLDER, filename)
-                profile_pic.save(filepath)
-                
-                # Update database with new filename
-                info.profile_pic = filename
+                filename = process_upload(profile_pic)
+                if filename != info.profile_pic:
+                    replaced_pic = info.profile_pic
+                    info.profile_pic = filename
+            except ImageError as e:
+                flash(str(e), "danger")
             except Exception as e:
                 flash(f"Error uploading image: {str(e)}", "danger")
-                print(f"Image upload error: {e}")
-
-        # Update education
-        edu_degree = request.form.getlist('degree[]')
-        edu_institution = request.form.getlist('institution[]')
-        edu_start = request.form.getlist('start_year[]')
-        edu_end = request.form.getlist('end_year[]')
-        edu_desc = request.form.getlist('edu_description[]')
-        
-        # Delete old educations and create new ones
-        Education.query.filter_by(resume_id=resume.id).delete()
-        for i, degree in enumerate(edu_degree):
-            if degree.strip():  # Only save if not empty
-                edu = Education(
-                    resume_id=resume.id,
-                    degree=degree,
-                    institution=edu_institution[i] if i < len(edu_institution) else '',
-                    start_year=edu_start[i] if i < len(edu_start) else '',
-                    end_year=edu_end[i] if i < len(edu_end) else '',
-                    description=edu_desc[i] if i < len(edu_desc) else ''
-                )
-                db.session.add(edu)
-
-        # Update experience
-        exp_title = request.form.getlist('job_title[]')
-        exp_company = request.form.getlist('company[]')
-        exp_start = request.form.getlist('start_date[]')
-        exp_end = request.form.getlist('end_date[]')
-        exp_desc = request.form.getlist('exp_description[]')
-        
-        Experience.query.filter_by(resume_id=resume.id).delete()
-        for i, title in enumerate(exp_title):
-            if title.strip():
-                exp = Experience(
-                    resume_id=resume.id,
-                    job_title=title,
-                    company=exp_company[i] if i < len(exp_company) else '',
-                    start_date=exp_start[i] if i < len(exp_start) else '',
-                    end_date=exp_end[i] if i < len(exp_end) else '',
-                    description=exp_desc[i] if i < len(exp_desc) else ''
-                )
-                db.session.add(exp)
-
-        # Update projects
-        proj_title = request.form.getlist('project_title[]')
-        proj_desc = request.form.getlist('project_description[]')
-        proj_tech = request.form.getlist('tech_stack[]')
-        proj_link = request.form.getlist('project_link[]')
-        
-        Project.query.filter_by(resume_id=resume.id).delete()
-        for i, title in enumerate(proj_title):
-            if title.strip():
-                proj = Project(
-                    resume_id=resume.id,
-                    title=title,
-                    description=proj_desc[i] if i < len(proj_desc) else '',
-                    tech_stack=proj_tech[i] if i < len(proj_tech) else '',
-                    link=proj_link[i] if i < len(proj_link) else ''
-                )
-                db.session.add(proj)
-
-        # Update skills
-        skill_names = request.form.getlist('skill_name[]')
-        skill_levels = request.form.getlist('skill_level[]')
-        
-        Skill.query.filter_by(resume_id=resume.id).delete()
-        for i, name in enumerate(skill_names):
-            if name.strip():
-                skill = Skill(
-                    resume_id=resume.id,
-                    name=name,
-                    level=skill_levels[i] if i < len(skill_levels) else 'intermediate'
-                )
-                db.session.add(skill)
-
-        # Update certifications
-        cert_names = request.form.getlist('cert_name[]')
-        cert_issuers = request.form.getlist('issuer[]')
-        cert_dates = request.form.getlist('issue_date[]')
-        cert_links = request.form.getlist('credential_link[]')
-        
-        Certification.query.filter_by(resume_id=resume.id).delete()
-        for i, name in enumerate(cert_names):
-            if name.strip():
-                cert = Certification(
-                    resume_id=resume.id,
-                    name=name,
-                    issuer=cert_issuers[i] if i < len(cert_issuers) else '',
-                    issue_date=cert_dates[i] if i < len(cert_dates) else '',
-                    credential_link=cert_links[i] if i < len(cert_links) else ''
-                )
-                db.session.add(cert)
+                current_app.logger.warning(f"Image upload error: {e}")
+
+        # Apply only the section rows that changed
+        reconcile_resume_sections(resume, request.form)
+        # Section-only edits do not touch the resume row, so bump it explicitly
+        resume.version = Resume.version + 1
 
         db.session.add(info)
         db.session.commit()
+        release_image(replaced_pic)
+        pdf_cache.invalidate(resume.id)
+        index_resume(resume.id)
 
         flash("Resume updated successfully!", "success")
         return redirect(url_for('views.view_resume', resume_id=resume.id))
 
-    return render_template("resumetemplate.html", Resume=resume, PersonalInfo=info, 
-                           educations=educations, experiences=experiences, projects=projects,
-                           skills=skills, certifications=certifications)
+    snapshot = snapshot_resume(resume)
+    return render_template("resumetemplate.html", Resume=snapshot,
+                           resume_form=render_resume_fragment("resume_form.html", snapshot))
+
 
 @views.route('/resume/view/<int:resume_id>')
 @login_required
 def view_resume(resume_id):
-    resume = Resume.query.get_or_404(resume_id)
-    if resume.user_id != current_user.id:
+    stamp = db.session.execute(
+        db.select(Resume.user_id, Resume.version, Resume.updated_at).where(Resume.id == resume_id)
+    ).first()
+    if stamp is None:
+        abort(404)
+    if stamp.user_id != current_user.id:
         flash("You are not authorized to view this resume.", "danger")
         return redirect(url_for('views.home'))
 
-    info = PersonalInfo.query.filter_by(resume_id=resume.id).first()
-    educations = Education.query.filter_by(resume_id=resume.id).all()
-    experiences = Experience.query.filter_by(resume_id=resume.id).all()
-    projects = Project.query.filter_by(resume_id=resume.id).all()
-    skills = Skill.query.filter_by(resume_id=resume.id).all()
-    certifications = Certification.query.filter_by(resume_id=resume.id).all()
+    etag = f"resume-{resume_id}-v{stamp.version}-u{current_user.id}-{current_app.config['TEMPLATE_FINGERPRINT']}"
+    # A pending flash message has to be rendered, so never answer 304 over it
+    if '_flashes' not in session and not is_resource_modified(
+        request.environ, etag=etag, last_modified=stamp.updated_at
+    ):
+        return _resume_page_headers(Response(status=304), etag, stamp.updated_at)
+
+    resume = load_resume_snapshot(resume_id)
+    if resume is None:
+        abort(404)
+    page = render_template("resume_base.html", resume=resume,
+                           resume_body=render_resume_fragment("resume_body.html", resume))
+    return _resume_page_headers(Response(page), etag, stamp.updated_at)
+
+
+def _resume_page_headers(response, etag, updated_at):
+    response.set_etag(etag)
+    if updated_at:
+        response.last_modified = updated_at
+    # Owner-only page: the browser may keep it but must revalidate each time
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
-    return render_template("resume_base.html", resume=resume, info=info, 
-                           educations=educations, experiences=experiences, 
-                           projects=projects, skills=skills, certifications=certifications)
 
 @views.route('/resume/manage')
 @login_required
 def manage_resumes():
-    resumes = Resume.query.filter_by(user_id=current_user.id).all()
-    return render_template("manage.html", resumes=resumes)
+    resumes = Resume.query.options(joinedload(Resume.personal_info)).filter_by(user_id=current_user.id).all()
+    return render_template("manage.html", resumes=resumes, stats=bulk_resume_statistics(user_id=current_user.id))
+
 
 @views.route('/resume/delete/<int:resume_id>')
 @login_required
@@ -266,130 +189,177 @@ def delete_resume(resume_id):
         flash("Unauthorized", "danger")
         return redirect(url_for('views.manage_resumes'))
     info = PersonalInfo.query.filter_by(resume_id=resume.id).first()
-    if info and info.profile_pic and info.profile_pic != 'default.jpg':
-        img_path = os.path.join(UPLOAD_FOLDER, info.profile_pic)
-        if os.path.exists(img_path):
-            os.remove(img_path)
+    profile_pic = info.profile_pic if info else None
     PersonalInfo.query.filter_by(resume_id=resume.id).delete()
     Education.query.filter_by(resume_id=resume.id).delete()
     Experience.query.filter_by(resume_id=resume.id).delete()
     Project.query.filter_by(resume_id=resume.id).delete()
     Skill.query.filter_by(resume_id=resume.id).delete()
     Certification.query.filter_by(resume_id=resume.id).delete()
+    ResumeAnalyticRollup.query.filter_by(resume_id=resume.id).delete()
+    remove_from_index(resume.id)
 
     db.session.delete(resume)
     db.session.commit()
+    # Other resumes may share the same deduplicated picture
+    release_image(profile_pic)
+    pdf_cache.invalidate(resume_id)
+    fragment_cache.invalidate(resume_id)
 
     flash("Resume and image deleted successfully.", "success")
     return redirect(url_for('views.manage_resumes'))
+
+
 @views.route('/resume/download/<int:resume_id>')
 @login_required
 def download_resume(resume_id):
-    """Download resume as PDF with improved error handling and async management"""
-    resume = Resume.query.get_or_404(resume_id)
+    """Download resume as PDF, or queue it for the PDF worker in async mode"""
+    resume = load_resume_snapshot(resume_id)
+    if resume is None:
+        abort(404)
     if resume.user_id != current_user.id:
         flash("Unauthorized", "danger")
         return redirect(url_for('views.manage_resumes'))
 
     track_event(current_user.id, resume_id, 'download', f'Downloaded resume: {resume.title}')
-    resume.download_count += 1
+    # Keep updated_at: it is the view page's Last-Modified and a download changes nothing shown
+    db.session.execute(
+        update(Resume).where(Resume.id == resume_id)
+        .values(download_count=Resume.download_count + 1, updated_at=Resume.updated_at)
+    )
     db.session.commit()
 
-    info = PersonalInfo.query.filter_by(resume_id=resume.id).first()
-    if not info:
-        flash("Resume information not found.", "danger")
-        return redirect(url_for('views.manage_resumes'))
-
-    educations = Education.query.filter_by(resume_id=resume.id).all()
-    experiences = Experience.query.filter_by(resume_id=resume.id).all()
-    projects = Project.query.filter_by(resume_id=resume.id).all()
-    skills = Skill.query.filter_by(resume_id=resume.id).all()
-    certifications = Certification.query.filter_by(resume_id=resume.id).all()
-
-    # Create unique temporary paths
-    temp_id = str(uuid.uuid4())[:8]
-    static_folder = os.path.abspath(os.path.join(os.path.dirname(__file__), 'static'))
-    
-    # Verify image exists
-    image_path = os.path.join(static_folder, 'uploads', info.profile_pic or 'default.jpg')
-    if not os.path.exists(image_path):
-        image_path = os.path.join(static_folder, 'uploads', 'default.jpg')
-    
-    css_path = os.path.join(static_folder, 'css', f"{resume.style}.css")
-    if not os.path.exists(css_path):
-        flash("Resume style not found.", "danger")
-        return redirect(url_for('views.manage_resumes'))
-
-    # Temporary files with unique IDs
-    html_path = os.path.join(static_folder, f"resume_{resume_id}_{temp_id}.html")
-    pdf_path = os.path.join(static_folder, f"resume_{resume_id}_{temp_id}.pdf")
+    if current_app.config['PDF_ASYNC_DOWNLOADS'] or request.args.get('async') == '1':
+        job = enqueue_pdf_job(resume)
+        if request.accept_mimetypes.best_match(['application/json', 'text/html']) == 'text/html':
+            # A plain navigation, e.g. opened in a new tab: a page that polls instead of raw JSON
+            return render_template('pdf_pending.html', resume=resume, job=_pdf_job_payload(job)), 202
+        return jsonify(_pdf_job_payload(job)), 202
 
     try:
-        # Render HTML template
-        html_content = render_template(
-            "resume_base.html", 
-            resume=resume, 
-            info=info,
-            educations=educations, 
-            experiences=experiences,
-            projects=projects, 
-            skills=skills, 
-            certifications=certifications,
-            is_download=True,
-            static_image_path=image_path,
-            css_path=css_path
-        )
-
-        # Write HTML to temporary file
-        with open(html_path, "w", encoding="utf-8") as f:
-            f.write(html_content)
-
-        # Generate PDF asynchronously with proper error handling
-        try:
-            asyncio.run(_generate_pdf_async(html_path, pdf_path))
-        except Exception as async_error:
-            print(f"Async PDF generation error: {async_error}")
-            raise Exception(f"PDF generation failed: {str(async_error)}")
-
-        # Verify PDF was created
-        if not os.path.exists(pdf_path) or os.path.getsize(pdf_path) == 0:
-            raise Exception("PDF file was not generated properly")
-
-        # Prepare file for download with safe filename
-        safe_title = "".join(c for c in resume.title if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        download_name = f"{safe_title}.pdf"
-
-        # Send file to user
-        return send_file(
-            pdf_path, 
-            as_attachment=True, 
-            download_name=download_name,
+        pdf = generate_resume_pdf(resume)
+        if pdf.data is not None:
+            # Freshly rendered: answer from memory instead of reading it back
+            return send_file(
+                io.BytesIO(pdf.data),
+                as_attachment=True,
+                download_name=_pdf_download_name(resume),
+                mimetype='application/pdf'
+            )
+        return storage.pdfs.send(
+            pdf.name,
+            as_attachment=True,
+            download_name=_pdf_download_name(resume),
             mimetype='application/pdf'
         )
-
+    except PdfGenerationError as e:
+        flash(str(e), "danger")
+        return redirect(url_for('views.manage_resumes'))
     except Exception as e:
         error_msg = f"PDF generation failed: {str(e)}"
-        print(f"Download error: {error_msg}")
+        current_app.logger.error(f"Download error: {error_msg}")
         flash(error_msg, "danger")
         return redirect(url_for('views.manage_resumes'))
 
-    finally:
-        # Clean up temporary files (best effort)
-        for temp_file in [html_path, pdf_path]:
-            try:
-                if os.path.exists(temp_file):
-                    # Delay before deletion to ensure file is released
-                    time.sleep(0.2)
-                    os.remove(temp_file)
-            except Exception as e:
-                print(f"Warning: Could not clean up {temp_file}: {e}")
+
+@views.route('/resume/download/<int:resume_id>/status')
+@login_required
+def download_resume_status(resume_id):
+    """Report the state of a queued PDF render"""
+    job = _get_pdf_job(resume_id)
+    if job is None:
+        return jsonify({'error': 'No PDF job found for this resume'}), 404
+    return jsonify(_pdf_job_payload(job))
+
+
+@views.route('/resume/download/<int:resume_id>/file')
+@login_required
+def download_resume_file(resume_id):
+    """Serve the PDF produced by a finished job"""
+    job = _get_pdf_job(resume_id)
+    if job is None:
+        return jsonify({'error': 'No PDF job found for this resume'}), 404
+    if job.status != 'done':
+        return jsonify(_pdf_job_payload(job)), 409
+    if not job.file_path or not storage.pdfs.exists(job.file_path):
+        # The cached artifact was evicted or invalidated, render it again
+        job = enqueue_pdf_job(job.resume)
+        return jsonify(_pdf_job_payload(job)), 202
+
+    return storage.pdfs.send(
+        job.file_path,
+        as_attachment=True,
+        download_name=_pdf_download_name(job.resume),
+        mimetype='application/pdf'
+    )
+
+
+@views.route('/resume/export-zip', methods=['POST'])
+@login_required
+def export_resumes_zip():
+    """Stream the selected resumes, or all of them, as one ZIP of PDFs"""
+    requested = [int(i) for i in request.form.getlist('resume_id') if i.isdigit()]
+    resume_ids = select_export_ids(current_user.id, requested, current_app.config['PDF_EXPORT_MAX_RESUMES'])
+    if not resume_ids:
+        flash("No resumes selected for export.", "danger")
+        return redirect(url_for('views.manage_resumes'))
+
+    response = Response(stream_resume_zip(current_app._get_current_object(), resume_ids), mimetype='application/zip')
+    response.headers.set('Content-Disposition', 'attachment', filename='resumes.zip')
+    response.headers['X-Export-Count'] = str(len(resume_ids))
+    # Let nginx pass chunks through as they are rendered instead of buffering the archive
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _pdf_download_name(resume):
+    safe_title = "".join(c for c in resume.title if c.isalnum() or c in (' ', '-', '_')).rstrip()
+    return f"{safe_title}.pdf"
+
+
+def _get_pdf_job(resume_id):
+    query = PdfJob.query.filter_by(resume_id=resume_id, user_id=current_user.id)
+    job_id = request.args.get('job', type=int)
+    if job_id:
+        return query.filter_by(id=job_id).first()
+    return query.order_by(PdfJob.id.desc()).first()
+
+
+def _pdf_job_payload(job):
+    resume_id = job.resume_id
+    payload = {
+        'job_id': job.id,
+        'resume_id': resume_id,
+        'status': job.status,
+        'attempts': job.attempts,
+        'error': job.error,
+        'status_url': url_for('views.download_resume_status', resume_id=resume_id, job=job.id),
+    }
+    if job.status == 'done':
+        payload['file_url'] = url_for('views.download_resume_file', resume_id=resume_id, job=job.id)
+    return payload
+
+
+@views.route('/media/<path:name>')
+def media(name):
+    """Serve a stored profile picture from backends the static route cannot reach"""
+    try:
+        response = storage.uploads.send(name)
+    except (FileNotFoundError, StorageError):
+        abort(404)
+    if response.status_code == 200:
+        # Names are content hashes, so a stored file never changes
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
 
 
 @views.route('/resume/export-json/<int:resume_id>')
 @login_required
 def export_resume_json_route(resume_id):
     """Export resume as JSON file"""
-    resume = Resume.query.get_or_404(resume_id)
+    resume = load_resume_snapshot(resume_id)
+    if resume is None:
+        abort(404)
     if resume.user_id != current_user.id:
         flash("Unauthorized", "danger")
         return redirect(url_for('views.manage_resumes'))
@@ -408,23 +378,28 @@ def export_resume_json_route(resume_id):
         flash(f"Error exporting resume: {str(e)}", "danger")
         return redirect(url_for('views.manage_resumes'))
 
+
 @views.route('/resume/search', methods=['GET', 'POST'])
 @login_required
 def search_resume():
-    """Search resumes by title or name"""
-    results = []
+    """Full-text search over a user's resumes"""
+    results = None
     query = request.args.get('q', '') if request.method == 'GET' else request.form.get('search_query', '')
+    page = request.args.get('page', 1, type=int)
 
     if query:
-        results = search_resumes(current_user.id, query)
+        results = search_resumes(current_user.id, query, page=page)
 
     return render_template("search.html", results=results, query=query)
 
+
 @views.route('/resume/stats/<int:resume_id>')
 @login_required
 def resume_stats(resume_id):
-    """Get resume statistics"""
-    resume = Resume.query.get_or_404(resume_id)
+    """Get resume statistics from the counters kept on the resume row"""
+    resume = db.session.get(Resume, resume_id)
+    if resume is None:
+        abort(404)
     if resume.user_id != current_user.id:
         flash("Unauthorized", "danger")
         return redirect(url_for('views.manage_resumes'))
@@ -432,70 +407,22 @@ def resume_stats(resume_id):
     stats = get_resume_statistics(resume)
     return render_template("stats.html", resume=resume, stats=stats)
 
+
 @views.route('/dashboard')
 @login_required
 def dashboard():
-    """User dashboard with analytics"""
+    """User dashboard with analytics, optionally limited to the last 7 or 30 days"""
     from .analytics_service import get_all_user_stats
 
-    resumes = Resume.query.filter_by(user_id=current_user.id).all()
-    all_stats = get_all_user_stats(current_user.id)
+    days = request.args.get('days', type=int)
+    if days not in DASHBOARD_WINDOWS:
+        days = None
+
+    all_stats = get_all_user_stats(current_user.id, days=days)
 
     total_downloads = sum(stat['downloads'] for stat in all_stats if stat)
     total_views = sum(stat['views'] for stat in all_stats if stat)
 
-    return render_template("dashboard.html", resumes=resumes, stats=all_stats,
+    return render_template("dashboard.html", stats=all_stats, days=days,
+                         windows=DASHBOARD_WINDOWS,
                          total_downloads=total_downloads, total_views=total_views)
-
-async def _generate_pdf_async(html_path, pdf_path):
-    """Generate PDF from HTML using Playwright with proper cleanup"""
-    browser = None
-    try:
-        # Launch browser with explicit timeout
-        async with async_playwright() as p:
-            # Use chromium with explicit args for better stability
-            browser = await p.chromium.launch(
-                args=['--disable-blink-features=AutomationControlled']
-            )
-
-            try:
-                context = await browser.new_context()
-                page = await context.new_page()
-
-                # Load HTML file with proper error handling
-                file_url = f"file:///{html_path.replace(os.sep, '/')}"
-
-                try:
-                    # Navigate to page with timeout
-                    await page.goto(file_url, wait_until="networkidle", timeout=30000)
-                except Exception as nav_error:
-                    print(f"Navigation error: {nav_error}")
-                    # Try without networkidle
-                    await page.goto(file_url, wait_until="load", timeout=30000)
-
-                # Generate PDF with proper settings
-                await page.pdf(
-                    path=pdf_path,
-                    format="A4",
-                    print_background=True,
-                    margin={
-                        'top': '0.5in',
-                        'bottom': '0.5in',
-                        'left': '0.5in',
-                        'right': '0.5in'
-                    }
-                )
-
-                await context.close()
-                print(f"PDF generated successfully: {pdf_path}")
-
-            except Exception as context_error:
-                print(f"Context error: {context_error}")
-                raise
-            finally:
-                if browser:
-                    await browser.close()
-
-    except Exception as e:
-        print(f"Playwright error: {e}")
-        raise